@@ -1,14 +1,23 @@
+import click
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from sqlalchemy import inspect
 import os
-from models.database import db, init_db
+from models.database import db, init_db, remove_duplicate_rows
+from models.score_summary import StudentScoreSummary
 from routes.student_routes import student_bp
 from routes.performance_routes import performance_bp
 from routes.analytics_routes import analytics_bp
 from routes.prediction_routes import prediction_bp
 from routes.file_routes import file_bp
+from services.import_jobs import resume_import_jobs
+from services.score_summary import rebuild_score_summaries, refresh_score_summaries
+from services.rollups import ROLLUP_MODELS, rebuild_rollups, refresh_rollups
+from services.response_cache import bump_data_versions
+from services.upload_stream import UploadRequest
 
 app = Flask(__name__)
+app.request_class = UploadRequest  # parse uploads from the buffer they are received into
 CORS(app)
 
 # Configure database
@@ -25,12 +34,65 @@ app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
 app.register_blueprint(prediction_bp, url_prefix='/api/prediction')
 app.register_blueprint(file_bp, url_prefix='/api/files')
 
+@app.before_request
+def resume_interrupted_import_jobs():
+    # Re-queue import jobs interrupted by a restart, whatever server runs the app. Waiting for the
+    # first request keeps them out of the reloader's watching parent, which never serves any.
+    resume_import_jobs(app)
+
 @app.route('/')
 def health_check():
     return jsonify({"status": "healthy", "message": "Student Performance Analytics API is running"})
 
+@app.cli.command('rebuild-score-summaries')
+def rebuild_score_summaries_command():
+    """Recompute every student's score summary from their records (flask --app app rebuild-score-summaries)."""
+    db.create_all()
+    count = rebuild_score_summaries()
+    click.echo(f"Rebuilt score summaries for {count} students")
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the monthly attendance and exam rollups from the records (flask --app app rebuild-rollups)."""
+    db.create_all()
+    for table, rows in rebuild_rollups().items():
+        click.echo(f"Rebuilt {table}: {rows} rows")
+
+def prepare_database():
+    """Create missing tables and indexes, bringing databases made by earlier versions up to date."""
+    new_tables = set(db.metadata.tables) - set(inspect(db.engine).get_table_names())
+    db.create_all()
+    
+    # create_all skips tables that already exist; add indexes introduced since they were created
+    inspector = inspect(db.engine)
+    deduplicated = set()
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            # Rows written before a unique index existed may repeat its key; keep the first of each
+            if index.unique:
+                deduplicated |= remove_duplicate_rows(table, [column.name for column in index.columns])
+                db.session.commit()
+            index.create(bind=db.engine)
+    
+    # Derived data of students who lost duplicate records is recomputed from what is left
+    if deduplicated:
+        refresh_score_summaries(deduplicated)
+        refresh_rollups(deduplicated)
+        bump_data_versions(deduplicated)
+        db.session.commit()
+    
+    # Summaries and rollups added to a database that already has records start out empty; fill them from the records
+    if StudentScoreSummary.__tablename__ in new_tables:
+        rebuild_score_summaries()
+    if any(rollup.__tablename__ in new_tables for rollup in ROLLUP_MODELS.values()):
+        rebuild_rollups()
+
 if __name__ == '__main__':
     # Create all tables in the database if they don't exist
     with app.app_context():
-        db.create_all()
+        prepare_database()
+    
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""Batch prediction benchmark: POST /api/prediction/batch against predict_future_performance, checking they agree.
+
+The per-student path is timed on a sample of the students and extrapolated to the whole school.
+
+python -m benchmarks.bench_batch_prediction [students]
+"""
+import json
+import sys
+from models.database import db
+from models.student import Student
+from services.prediction import predict_future_performance
+from benchmarks.common import make_app, generate_school, measure
+
+# Students predicted one by one for the comparison
+SAMPLE_SIZE = 1000
+
+def main(student_count):
+    app, created = make_app('prediction', student_count)
+    client = app.test_client()
+    with app.app_context():
+        if created:
+            generate_school(student_count)
+        
+        for body in ({"department": 'CS'}, {}):
+            with measure(f"POST /api/prediction/batch {json.dumps(body)}"):
+                lines = client.post('/api/prediction/batch', json=body).get_data(as_text=True).splitlines()
+            print(f"  {len(lines)} students")
+        predicted = {entry['student']['id']: entry['prediction'] for entry in map(json.loads, lines)}
+        
+        sample = list(range(1, student_count + 1, max(student_count // SAMPLE_SIZE, 1)))
+        with measure(f"predict_future_performance (per student), {len(sample)} of {student_count} students") as timing:
+            expected = {id: predict_future_performance(db.session.get(Student, id)) for id in sample}
+        print(f"  extrapolated to {student_count} students: {timing['seconds'] * student_count / len(sample):.1f}s")
+    
+    # Compared through JSON, as the endpoint sends them
+    mismatches = sum(1 for id in sample if predicted[id] != json.loads(json.dumps(expected[id])))
+    print(f"mismatches: {mismatches} of {len(sample)}")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
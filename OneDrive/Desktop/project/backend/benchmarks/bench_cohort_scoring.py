@@ -0,0 +1,32 @@
+"""Cohort scoring benchmark: score_cohort and the leaderboard against score_students, checking they agree.
+
+python -m benchmarks.bench_cohort_scoring [students]
+"""
+import sys
+from services.analytics import combine_scores, score_students
+from services.cohort_scoring import COMPONENT_COLUMNS, json_value, leaderboard, score_cohort
+from benchmarks.common import make_app, generate_school, measure
+
+def main(student_count):
+    app, created = make_app('cohort', student_count)
+    with app.app_context():
+        if created:
+            generate_school(student_count)
+        
+        with measure(f"score_students (per student), {student_count} students"):
+            expected = {student.id: overall for student, overall in score_students(list(range(1, student_count + 1)))}
+        
+        with measure("score_cohort (vectorized)"):
+            frame = score_cohort()
+        
+        with measure("leaderboard (top 100)"):
+            leaderboard(top=100, per_page=100)
+        
+        mismatches = sum(
+            1 for row in frame.itertuples(index=False)
+            if repr(combine_scores(*(json_value(getattr(row, column)) for column in COMPONENT_COLUMNS))) != repr(expected[row.id])
+        )
+        print(f"mismatches: {mismatches} of {len(expected)}")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
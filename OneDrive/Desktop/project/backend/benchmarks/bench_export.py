@@ -0,0 +1,45 @@
+"""Export benchmark: block loading (load_student_blocks) against one query per student and table.
+
+python -m benchmarks.bench_export [students]
+"""
+import json
+import os
+import sys
+from models.database import db
+from models.student import Student
+from services.data_loader import RECORD_MODELS
+from services.file_processor import export_student_data
+from benchmarks.common import make_app, generate_school, measure
+
+def export_per_student(student_ids):
+    """The export as it was built before block loading: the student and then each table, per student."""
+    students_data = []
+    for id in student_ids:
+        student = db.session.get(Student, id)
+        student_data = {"student": student.to_dict()}
+        for name, model in RECORD_MODELS.items():
+            student_data[name] = [record.to_dict() for record in model.query.filter_by(student_id=id).order_by(model.id)]
+        students_data.append(student_data)
+    return students_data
+
+def main(student_count):
+    app, created = make_app('export', student_count)
+    with app.app_context():
+        if created:
+            generate_school(student_count)
+        student_ids = list(range(1, student_count + 1))
+        
+        with measure(f"per-student queries, {student_count} students"):
+            expected = export_per_student(student_ids)
+        db.session.expunge_all()
+        
+        with measure(f"export_student_data (blocks), {student_count} students"):
+            path = export_student_data(student_ids, 'json')
+        
+        with open(path) as file:
+            exported = json.load(file)
+        os.remove(path)
+        print("identical:", exported == json.loads(json.dumps(expected, default=str)))
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,117 @@
+"""Shared setup for the benchmark scripts: an app on a scratch database and a generated school.
+
+Run the scripts from the backend folder, e.g. python -m benchmarks.bench_export 2000.
+"""
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from flask import Flask
+from sqlalchemy import event
+from models.database import db, init_db
+from models.student import Student
+from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
+from models.certifications import Certification, Project
+from routes.student_routes import student_bp
+from routes.performance_routes import performance_bp
+from routes.analytics_routes import analytics_bp
+from routes.prediction_routes import prediction_bp
+from routes.file_routes import file_bp
+from services.rollups import rebuild_rollups
+from services.score_summary import rebuild_score_summaries
+from services.upload_stream import UploadRequest
+
+# Generated databases are kept here and reused by later runs with the same size
+BENCHMARK_FOLDER = os.path.join(tempfile.gettempdir(), 'student_analytics_benchmarks')
+
+def make_app(name, student_count):
+    """Return (app, created): the application on a benchmark database, generated when it does not exist yet."""
+    os.makedirs(BENCHMARK_FOLDER, exist_ok=True)
+    path = os.path.join(BENCHMARK_FOLDER, f"{name}_{student_count}.db")
+    created = not os.path.exists(path)
+    
+    app = Flask(__name__)
+    app.request_class = UploadRequest
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_db(app)
+    
+    app.register_blueprint(student_bp, url_prefix='/api/students')
+    app.register_blueprint(performance_bp, url_prefix='/api/performance')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(prediction_bp, url_prefix='/api/prediction')
+    app.register_blueprint(file_bp, url_prefix='/api/files')
+    
+    with app.app_context():
+        db.create_all()
+    
+    return app, created
+
+def generate_school(student_count, attendance_per_student=20, exams_per_student=5, projects_per_student=2, seed=7):
+    """Bulk insert students and records with dates over the last two years, then build summaries and rollups."""
+    rng = random.Random(seed)
+    today = date.today()
+    
+    db.session.execute(Student.__table__.insert(), [
+        {
+            "student_id": f"S{index}", "first_name": 'First', "last_name": 'Last', "email": f"s{index}@example.com",
+            "department": rng.choice(['CS', 'EE', 'ME']), "year_of_study": rng.randint(1, 4), "semester": 1
+        }
+        for index in range(student_count)
+    ])
+    db.session.execute(AttendanceRecord.__table__.insert(), [
+        {
+            "student_id": 1 + index % student_count, "subject": 'Math', "date": today - timedelta(days=(index // student_count) * 9),
+            "status": rng.choice(['present', 'present', 'absent', 'excused'])
+        }
+        for index in range(student_count * attendance_per_student)
+    ])
+    db.session.execute(ExamResult.__table__.insert(), [
+        {
+            "student_id": 1 + index % student_count, "subject": 'Math', "exam_type": 'quiz', "score": rng.randint(0, 73),
+            "max_score": rng.choice([73, 100]), "date": today - timedelta(days=rng.randint(0, 720))
+        }
+        for index in range(student_count * exams_per_student)
+    ])
+    db.session.execute(Project.__table__.insert(), [
+        {
+            "student_id": 1 + index % student_count, "title": 'Project', "start_date": today - timedelta(days=rng.randint(0, 720)),
+            "grade": rng.choice([None, rng.randint(0, 9)]), "max_grade": 10
+        }
+        for index in range(student_count * projects_per_student)
+    ])
+    db.session.execute(Certification.__table__.insert(), [
+        {"student_id": 1 + index % student_count, "name": 'Cert', "issuing_organization": 'Org', "issue_date": today}
+        for index in range(student_count) if rng.random() < 0.4
+    ])
+    db.session.execute(PerformanceMetric.__table__.insert(), [
+        {
+            "student_id": 1 + index % student_count, "metric_type": rng.choice(['presentation', 'internship']),
+            "score": rng.randint(0, 7), "max_score": 7, "date_recorded": today
+        }
+        for index in range(student_count * 2)
+    ])
+    db.session.commit()
+    
+    rebuild_score_summaries()
+    rebuild_rollups()
+
+@contextmanager
+def measure(label):
+    """Print the wall time and number of SQL statements of the block; the yielded dict gets its seconds."""
+    statements = [0]
+    timing = {}
+    
+    def count(*args):
+        statements[0] += 1
+    
+    event.listen(db.engine, 'before_cursor_execute', count)
+    started_at = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        elapsed = timing['seconds'] = time.perf_counter() - started_at
+        event.remove(db.engine, 'before_cursor_execute', count)
+        print(f"{label}: {elapsed:.2f}s, {statements[0]} queries")
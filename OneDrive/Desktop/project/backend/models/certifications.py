@@ -29,6 +29,10 @@ class Certification(db.Model):
 
 class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        # Date-windowed reads of one student's projects
+        db.Index('ix_projects_student_end_date', 'student_id', 'end_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
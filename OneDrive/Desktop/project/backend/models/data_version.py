@@ -0,0 +1,14 @@
+from models.database import db
+
+class StudentDataVersion(db.Model):
+    __tablename__ = 'student_data_versions'
+    
+    # Not a foreign key: the row outlives a deleted student so that a reused id gets a new version
+    student_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'student_id': self.student_id,
+            'version': self.version
+        }
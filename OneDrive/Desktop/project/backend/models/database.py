@@ -1,7 +1,64 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import insert, select, delete, func, case, cast, type_coerce, Date, Integer
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import datetime
 
 db = SQLAlchemy()
 
 def init_db(app):
-    db.init_app(app)
\ No newline at end of file
+    db.init_app(app)
+
+def insert_or_ignore(model):
+    """Build an INSERT for model that silently skips rows violating a unique key."""
+    dialect = db.session.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        return sqlite.insert(model).on_conflict_do_nothing()
+    elif dialect == 'postgresql':
+        return postgresql.insert(model).on_conflict_do_nothing()
+    elif dialect in ('mysql', 'mariadb'):
+        return insert(model).prefix_with('IGNORE')
+    else:
+        raise ValueError(f"Insert-or-ignore is not supported for database dialect: {dialect}")
+
+def month_start(column):
+    """SQL expression for the first day of the month of a date column, typed as a date."""
+    dialect = db.session.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        # SQLite stores dates as ISO strings; a CAST would turn them into numbers
+        return type_coerce(func.date(column, 'start of month'), Date)
+    elif dialect == 'postgresql':
+        return cast(func.date_trunc('month', column), Date)
+    elif dialect in ('mysql', 'mariadb'):
+        return cast(func.date_format(column, '%Y-%m-01'), Date)
+    else:
+        raise ValueError(f"Month truncation is not supported for database dialect: {dialect}")
+
+def floor_int(value):
+    """SQL expression for the largest integer not above value, the same on every dialect."""
+    dialect = db.session.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        # floor() needs SQLite's optional math functions; CAST truncates towards zero, so step negatives down
+        truncated = cast(value, Integer)
+        return case((value < truncated, truncated - 1), else_=truncated)
+    elif dialect in ('postgresql', 'mysql', 'mariadb'):
+        # A plain CAST rounds to the nearest integer on these dialects
+        return cast(func.floor(value), Integer)
+    else:
+        raise ValueError(f"Floor is not supported for database dialect: {dialect}")
+
+def remove_duplicate_rows(table, columns):
+    """Delete rows repeating an earlier row's values in columns, keeping the lowest id.
+    
+    Run before adding a unique index to an existing table. Returns the student_ids of the
+    deleted rows; the caller owns the commit.
+    """
+    keep = select(func.min(table.c.id).label('id')).group_by(*[table.c[column] for column in columns]).subquery()
+    duplicates = table.c.id.not_in(select(keep.c.id))
+    
+    student_ids = {id for (id,) in db.session.execute(select(table.c.student_id).where(duplicates).distinct())}
+    if student_ids:
+        db.session.execute(delete(table).where(duplicates))
+    return student_ids
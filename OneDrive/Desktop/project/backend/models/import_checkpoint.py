@@ -0,0 +1,31 @@
+from models.database import db
+from datetime import datetime
+
+class ImportCheckpoint(db.Model):
+    __tablename__ = 'import_checkpoints'
+    __table_args__ = (
+        db.UniqueConstraint('file_hash', 'import_type', name='uq_import_checkpoint_file'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    file_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the uploaded file
+    import_type = db.Column(db.String(50), nullable=False)  # students, attendance, etc.
+    rows_committed = db.Column(db.Integer, nullable=False, default=0)
+    byte_offset = db.Column(db.BigInteger, nullable=True)  # only known for formats parsed incrementally
+    chunks_committed = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='in_progress')  # in_progress, completed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'file_hash': self.file_hash,
+            'import_type': self.import_type,
+            'rows_committed': self.rows_committed,
+            'byte_offset': self.byte_offset,
+            'chunks_committed': self.chunks_committed,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,40 @@
+from models.database import db
+from datetime import datetime
+import json
+
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    import_type = db.Column(db.String(50), nullable=False)  # students, attendance, exams, etc.
+    filename = db.Column(db.String(255), nullable=False)  # name of the uploaded file
+    filepath = db.Column(db.String(500), nullable=False)  # where the upload is kept until the job ends
+    options = db.Column(db.Text, nullable=True)  # JSON encoded importer keyword arguments
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed, cancelled
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    rows_per_second = db.Column(db.Float, nullable=True)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text, nullable=True)  # JSON encoded importer result
+    error = db.Column(db.Text, nullable=True)  # failure message
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'import_type': self.import_type,
+            'filename': self.filename,
+            'status': self.status,
+            'rows_processed': self.rows_processed,
+            'rows_per_second': self.rows_per_second,
+            'error_count': self.error_count,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,25 @@
+from models.database import db
+from datetime import datetime
+
+class ImportLedger(db.Model):
+    __tablename__ = 'import_ledger'
+    __table_args__ = (
+        db.UniqueConstraint('import_type', 'scope', 'fingerprint', name='uq_import_ledger_fingerprint'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # SHA-256 of the file, or of a chunk's parsed content
+    scope = db.Column(db.String(10), nullable=False)  # file, chunk
+    import_type = db.Column(db.String(50), nullable=False)  # students, attendance, etc.
+    rows = db.Column(db.Integer, nullable=False, default=0)  # data rows covered by the fingerprint
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'fingerprint': self.fingerprint,
+            'scope': self.scope,
+            'import_type': self.import_type,
+            'rows': self.rows,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
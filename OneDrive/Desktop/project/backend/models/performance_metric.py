@@ -1,6 +1,9 @@
 from models.database import db
 from datetime import datetime
 
+# Metric types accepted by the bulk importer
+METRIC_TYPES = ['attendance', 'exam', 'project', 'certification', 'presentation', 'symposium', 'internship']
+
 class PerformanceMetric(db.Model):
     __tablename__ = 'performance_metrics'
     
@@ -31,6 +34,13 @@ class PerformanceMetric(db.Model):
 
 class AttendanceRecord(db.Model):
     __tablename__ = 'attendance_records'
+    __table_args__ = (
+        # One record per student, subject and day; also backs the importer's insert-or-ignore.
+        # An index rather than a constraint, so that startup can add it to existing tables.
+        db.Index('uq_attendance_student_subject_date', 'student_id', 'subject', 'date', unique=True),
+        # Date-windowed reads of one student's attendance
+        db.Index('ix_attendance_student_date', 'student_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
@@ -51,6 +61,10 @@ class AttendanceRecord(db.Model):
 
 class ExamResult(db.Model):
     __tablename__ = 'exam_results'
+    __table_args__ = (
+        # Date-windowed reads of one student's exams
+        db.Index('ix_exam_results_student_date', 'student_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
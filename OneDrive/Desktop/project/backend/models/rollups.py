@@ -0,0 +1,41 @@
+from models.database import db
+
+class MonthlyAttendanceRollup(db.Model):
+    __tablename__ = 'monthly_attendance_rollups'
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    subject = db.Column(db.String(100), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # first day of the month
+    total = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+    excused = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'student_id': self.student_id,
+            'subject': self.subject,
+            'month': self.month.isoformat() if self.month else None,
+            'total': self.total,
+            'present': self.present,
+            'absent': self.absent,
+            'excused': self.excused
+        }
+
+class MonthlyExamRollup(db.Model):
+    __tablename__ = 'monthly_exam_rollups'
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    subject = db.Column(db.String(100), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # first day of the month
+    exam_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)  # sum of score / max_score * 100
+    
+    def to_dict(self):
+        return {
+            'student_id': self.student_id,
+            'subject': self.subject,
+            'month': self.month.isoformat() if self.month else None,
+            'exam_count': self.exam_count,
+            'score_sum': self.score_sum
+        }
@@ -0,0 +1,32 @@
+from models.database import db
+from datetime import datetime
+
+class StudentScoreSummary(db.Model):
+    __tablename__ = 'student_score_summary'
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    attendance_present = db.Column(db.Integer, nullable=False, default=0)
+    attendance_total = db.Column(db.Integer, nullable=False, default=0)
+    exam_count = db.Column(db.Integer, nullable=False, default=0)
+    exam_percentage_sum = db.Column(db.Float, nullable=False, default=0.0)  # sum of score / max_score * 100
+    project_graded_count = db.Column(db.Integer, nullable=False, default=0)  # projects with grade and max_grade
+    project_percentage_sum = db.Column(db.Float, nullable=False, default=0.0)
+    certification_count = db.Column(db.Integer, nullable=False, default=0)
+    other_metric_count = db.Column(db.Integer, nullable=False, default=0)  # presentation, symposium, internship metrics
+    other_metric_percentage_sum = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'student_id': self.student_id,
+            'attendance_present': self.attendance_present,
+            'attendance_total': self.attendance_total,
+            'exam_count': self.exam_count,
+            'exam_percentage_sum': self.exam_percentage_sum,
+            'project_graded_count': self.project_graded_count,
+            'project_percentage_sum': self.project_percentage_sum,
+            'certification_count': self.certification_count,
+            'other_metric_count': self.other_metric_count,
+            'other_metric_percentage_sum': self.other_metric_percentage_sum,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,167 +1,211 @@
 from flask import Blueprint, request, jsonify
 from models.database import db
 from models.student import Student
-from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
-from models.certifications import Certification, Project
-from services.analytics import calculate_overall_performance, analyze_attendance, analyze_exam_performance
-from sqlalchemy import func
-import json
+from models.score_summary import StudentScoreSummary
+from services.analytics import (
+    calculate_overall_from_summary, analyze_attendance, analyze_exam_performance,
+    department_performance, score_students, subject_distribution, DEPARTMENT_BREAKDOWNS
+)
+from services.percentile_index import student_percentile, PERCENTILE_COHORTS
+from services.cohort_scoring import leaderboard
+from services.date_window import parse_date_window
+from services.response_cache import cached_student_response, cache_stats, COHORT_RESPONSE_TTL
 
 analytics_bp = Blueprint('analytics_bp', __name__)
 
+DEFAULT_LEADERBOARD_PAGE_SIZE = 50
+MAX_LEADERBOARD_PAGE_SIZE = 500
+
 @analytics_bp.route('/overall/<int:student_id>', methods=['GET'])
+@cached_student_response(ttl=COHORT_RESPONSE_TTL)
 def get_overall_performance(student_id):
-    # Check if student exists
-    student = Student.query.get(student_id)
-    if not student:
+    # Optional date window: ?from=YYYY-MM-DD&to=YYYY-MM-DD or ?semester=YYYY-1|2
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    cohort = request.args.get('cohort', 'institution')
+    if cohort not in PERCENTILE_COHORTS:
+        return jsonify({"error": f"cohort must be one of: {', '.join(PERCENTILE_COHORTS)}"}), 400
+    
+    if window:
+        # Score only the records dated within the window; percentiles rank all-time scores, so none is given
+        for student, overall_score in score_students([student_id], window):
+            return jsonify(overall_score), 200
+        return jsonify({"error": "Student not found"}), 404
+    
+    # Look up the student together with their score summary by primary key
+    row = db.session.query(Student, StudentScoreSummary).outerjoin(
+        StudentScoreSummary, StudentScoreSummary.student_id == Student.id
+    ).filter(Student.id == student_id).first()
+    if not row:
         return jsonify({"error": "Student not found"}), 404
+    student, summary = row
     
-    # Get all performance data for the student
-    performance = PerformanceMetric.query.filter_by(student_id=student_id).all()
-    attendance = AttendanceRecord.query.filter_by(student_id=student_id).all()
-    exams = ExamResult.query.filter_by(student_id=student_id).all()
-    certifications = Certification.query.filter_by(student_id=student_id).all()
-    projects = Project.query.filter_by(student_id=student_id).all()
-    
-    # Calculate overall performance
-    overall_score = calculate_overall_performance(
-        student_id, 
-        performance, 
-        attendance, 
-        exams, 
-        certifications,
-        projects
-    )
+    # Calculate overall performance from the running totals
+    overall_score = calculate_overall_from_summary(summary)
+    
+    # Rank the score against the student's cohort (?cohort=institution|department|year)
+    overall_score.update(student_percentile(student, overall_score["overall_score"], cohort))
     
     return jsonify(overall_score), 200
 
 @analytics_bp.route('/attendance/<int:student_id>', methods=['GET'])
+@cached_student_response()
 def get_attendance_analysis(student_id):
     # Check if student exists
     student = Student.query.get(student_id)
     if not student:
         return jsonify({"error": "Student not found"}), 404
     
-    # Get attendance records for the student
-    attendance = AttendanceRecord.query.filter_by(student_id=student_id).all()
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    # Analyze attendance
-    attendance_analysis = analyze_attendance(attendance)
+    # Analyze attendance from counts grouped by subject and status
+    attendance_analysis = analyze_attendance(student_id, window)
     
     return jsonify(attendance_analysis), 200
 
 @analytics_bp.route('/exams/<int:student_id>', methods=['GET'])
+@cached_student_response()
 def get_exam_analysis(student_id):
     # Check if student exists
     student = Student.query.get(student_id)
     if not student:
         return jsonify({"error": "Student not found"}), 404
     
-    # Get exam results for the student
-    exams = ExamResult.query.filter_by(student_id=student_id).all()
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    # Analyze exam performance
-    exam_analysis = analyze_exam_performance(exams)
+    # Analyze exam performance from per-subject aggregates
+    exam_analysis = analyze_exam_performance(student_id, window)
     
     return jsonify(exam_analysis), 200
 
 @analytics_bp.route('/comparison', methods=['GET'])
 def compare_students():
     student_ids = request.args.get('ids')
-    if not student_ids:
-        return jsonify({"error": "Student IDs are required"}), 400
+    department = request.args.get('department')
+    year = request.args.get('year')
     
-    # Parse student IDs
-    try:
-        student_ids = [int(id) for id in student_ids.split(',')]
-    except ValueError:
-        return jsonify({"error": "Invalid student ID format"}), 400
+    cohort = request.args.get('cohort', 'institution')
+    if cohort not in PERCENTILE_COHORTS:
+        return jsonify({"error": f"cohort must be one of: {', '.join(PERCENTILE_COHORTS)}"}), 400
     
-    # Check if all students exist
-    students = Student.query.filter(Student.id.in_(student_ids)).all()
-    if len(students) != len(student_ids):
-        return jsonify({"error": "One or more students not found"}), 404
-    
-    # Get overall performance for each student
-    comparison_data = []
-    for student in students:
-        # Get all performance data for the student
-        performance = PerformanceMetric.query.filter_by(student_id=student.id).all()
-        attendance = AttendanceRecord.query.filter_by(student_id=student.id).all()
-        exams = ExamResult.query.filter_by(student_id=student.id).all()
-        certifications = Certification.query.filter_by(student_id=student.id).all()
-        projects = Project.query.filter_by(student_id=student.id).all()
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if student_ids:
+        # Parse student IDs
+        try:
+            student_ids = list(dict.fromkeys(int(id) for id in student_ids.split(',')))
+        except ValueError:
+            return jsonify({"error": "Invalid student ID format"}), 400
+    elif department or year:
+        # Compare a whole cohort: ?department=...&year=...
+        query = Student.query
+        
+        if department:
+            query = query.filter_by(department=department)
         
-        # Calculate overall performance
-        overall_score = calculate_overall_performance(
-            student.id, 
-            performance, 
-            attendance, 
-            exams, 
-            certifications,
-            projects
-        )
+        if year:
+            try:
+                query = query.filter_by(year_of_study=int(year))
+            except ValueError:
+                return jsonify({"error": "Invalid year"}), 400
         
+        student_ids = [id for (id,) in query.with_entities(Student.id).order_by(Student.id)]
+    else:
+        return jsonify({"error": "Student IDs or a department/year cohort are required"}), 400
+    
+    # Get overall performance for each student, loading each table once per block of students
+    comparison_data = []
+    for student, overall_score in score_students(student_ids, window):
+        if not window:
+            # Percentiles rank all-time scores
+            overall_score.update(student_percentile(student, overall_score["overall_score"], cohort))
         comparison_data.append({
             "student": student.to_dict(),
             "overall_performance": overall_score
         })
     
+    # Check if all students exist
+    if len(comparison_data) != len(student_ids):
+        return jsonify({"error": "One or more students not found"}), 404
+    
     return jsonify(comparison_data), 200
 
 @analytics_bp.route('/department-performance', methods=['GET'])
 def get_department_performance():
-    # Get performance by department
-    students = Student.query.all()
-    departments = {}
-    
-    for student in students:
-        department = student.department
-        if department not in departments:
-            departments[department] = {
-                "total_students": 0,
-                "avg_attendance": 0,
-                "avg_exam_score": 0,
-                "total_certifications": 0,
-                "total_projects": 0
-            }
-        
-        departments[department]["total_students"] += 1
-        
-        # Get attendance records
-        attendance_query = db.session.query(
-            func.count(AttendanceRecord.id).label('total_records'),
-            func.sum(func.case((AttendanceRecord.status == 'present', 1), else_=0)).label('present_count')
-        ).filter(AttendanceRecord.student_id == student.id)
-        
-        attendance_result = attendance_query.first()
-        if attendance_result.total_records > 0:
-            attendance_percentage = (attendance_result.present_count / attendance_result.total_records) * 100
-            departments[department]["avg_attendance"] += attendance_percentage
-        
-        # Get exam results
-        exam_query = db.session.query(
-            func.avg(ExamResult.score / ExamResult.max_score * 100).label('avg_score')
-        ).filter(ExamResult.student_id == student.id)
-        
-        exam_result = exam_query.first()
-        if exam_result.avg_score is not None:
-            departments[department]["avg_exam_score"] += exam_result.avg_score
-        
-        # Get certifications count
-        cert_count = Certification.query.filter_by(student_id=student.id).count()
-        departments[department]["total_certifications"] += cert_count
-        
-        # Get projects count
-        project_count = Project.query.filter_by(student_id=student.id).count()
-        departments[department]["total_projects"] += project_count
-    
-    # Calculate averages
-    for dept, data in departments.items():
-        if data["total_students"] > 0:
-            data["avg_attendance"] /= data["total_students"]
-            data["avg_exam_score"] /= data["total_students"]
-            data["avg_certifications"] = data["total_certifications"] / data["total_students"]
-            data["avg_projects"] = data["total_projects"] / data["total_students"]
-    
-    return jsonify(departments), 200
\ No newline at end of file
+    # Optional breakdown within each department, e.g. ?breakdown=year_of_study,semester
+    breakdown = [column for column in request.args.get('breakdown', '').split(',') if column]
+    if any(column not in DEPARTMENT_BREAKDOWNS for column in breakdown):
+        return jsonify({"error": f"breakdown must be one or more of: {', '.join(DEPARTMENT_BREAKDOWNS)}"}), 400
+    
+    # Get performance by department in one grouped query
+    departments = department_performance(list(dict.fromkeys(breakdown)))
+    
+    return jsonify(departments), 200
+
+@analytics_bp.route('/leaderboard', methods=['GET'])
+def get_leaderboard():
+    # Optional cohort filters and paging: ?department=...&year=...&top=...&page=...&per_page=...
+    department = request.args.get('department')
+    
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        year = None if request.args.get('year') is None else int(request.args['year'])
+        top = None if request.args.get('top') is None else int(request.args['top'])
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', DEFAULT_LEADERBOARD_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "year, top, page and per_page must be integers"}), 400
+    
+    if (top is not None and top < 1) or page < 1 or not 1 <= per_page <= MAX_LEADERBOARD_PAGE_SIZE:
+        return jsonify({"error": f"top and page must be positive and per_page between 1 and {MAX_LEADERBOARD_PAGE_SIZE}"}), 400
+    
+    # Score the whole cohort at once and rank it
+    total, entries = leaderboard(department, year, top, page, per_page, window)
+    
+    return jsonify({
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "leaderboard": entries
+    }), 200
+
+@analytics_bp.route('/subjects/<subject>', methods=['GET'])
+def get_subject_distribution(subject):
+    # Optional cohort filters (?department=...&year=...) and date window (?from/?to/?semester)
+    department = request.args.get('department')
+    
+    try:
+        year = None if request.args.get('year') is None else int(request.args['year'])
+    except ValueError:
+        return jsonify({"error": "Invalid year"}), 400
+    
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Histograms, quantiles and exam type statistics from two grouped queries
+    distribution = subject_distribution(subject, department, year, window)
+    
+    return jsonify(distribution), 200
+
+@analytics_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    # Hit/miss counters of this worker's response cache
+    return jsonify(cache_stats()), 200
@@ -1,65 +1,233 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app, after_this_request, Response, stream_with_context
 from werkzeug.utils import secure_filename
 import os
 import pandas as pd
 import json
+import shutil
 import tempfile
 from models.database import db
 from models.student import Student
 from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
 from models.certifications import Certification, Project
-from services.file_processor import process_student_csv, process_attendance_csv, export_student_data
+from models.import_job import ImportJob
+from services.file_processor import (
+    export_student_data, iter_student_export, validate_upload, DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE,
+    FILE_FORMAT_ALIASES, RANDOM_ACCESS_FORMATS, EXPORT_FORMATS, STREAM_EXPORT_FORMATS
+)
+from services.import_jobs import IMPORTERS, submit_import_job, cancel_import_job, new_job_filepath
+from services.upload_stream import SpooledUpload, HashingReader, spool_stream
+from services.export_cache import (
+    data_version, export_cache_key, cached_export_path, export_temp_dir, store_export
+)
+from services.compression import COMPRESSION_ENCODINGS, available_encodings, negotiate_encoding, compress_chunks
 from datetime import datetime
 
 file_bp = Blueprint('file_bp', __name__)
 
-# Ensure temp directory exists
-UPLOAD_FOLDER = tempfile.gettempdir()
-ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'json'}
+ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'json', 'parquet', 'arrow', 'feather'}
+
+# Text exports worth compressing; the other formats are already compressed containers
+COMPRESSIBLE_EXPORT_FORMATS = {'json', 'csv', 'ndjson'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def export_compression(export_format):
+    """Read the compress query parameter: returns (encoding or None, negotiated).
+    
+    compress=gzip|zstd downloads a compressed file (e.g. .csv.gz); compress=auto picks an encoding
+    from Accept-Encoding and sends it as Content-Encoding, which clients decode transparently.
+    """
+    compress = request.args.get('compress', 'none').lower()
+    
+    if compress == 'none':
+        return None, False
+    
+    if compress == 'auto':
+        if export_format not in COMPRESSIBLE_EXPORT_FORMATS:
+            return None, True
+        return negotiate_encoding(request.accept_encodings), True
+    
+    if compress not in available_encodings():
+        raise ValueError(f"Unsupported compression: {compress} (use {', '.join(available_encodings())} or auto)")
+    
+    if export_format not in COMPRESSIBLE_EXPORT_FORMATS:
+        raise ValueError(f"Compression is only available for {', '.join(sorted(COMPRESSIBLE_EXPORT_FORMATS))} exports")
+    
+    return compress, False
+
+def compressed_download(response, encoding, negotiated):
+    """Add the headers of a compressed export to response."""
+    if negotiated:
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    return response
+
 @file_bp.route('/upload', methods=['POST'])
 def upload_file():
-    if 'file' not in request.files:
-        return jsonify({"error": "No file part"}), 400
+    # Raw uploads carry the file itself as the request body (?type=...&filename=...)
+    # and are parsed while the body is still being received
+    raw_upload = request.mimetype != 'multipart/form-data'
+    params = request.args if raw_upload else request.form
     
-    file = request.files['file']
+    if raw_upload:
+        filename = secure_filename(request.args.get('filename', ''))
+        if not filename:
+            return jsonify({"error": "The filename query parameter is required for raw uploads"}), 400
+    else:
+        if 'file' not in request.files:
+            return jsonify({"error": "No file part"}), 400
+        
+        file = request.files['file']
+        
+        if file.filename == '':
+            return jsonify({"error": "No selected file"}), 400
+        
+        filename = secure_filename(file.filename)
     
-    if file.filename == '':
-        return jsonify({"error": "No selected file"}), 400
+    if not allowed_file(filename):
+        return jsonify({"error": "File type not allowed"}), 400
     
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_type = request.form.get('type', 'students')  # Default to students
+    file_type = params.get('type', 'students')  # Default to students
+    file_format = filename.rsplit('.', 1)[1].lower()
+    file_format = FILE_FORMAT_ALIASES.get(file_format, file_format)
+    
+    try:
+        batch_size = int(params.get('batch_size', DEFAULT_BATCH_SIZE))
+        chunk_size = int(params.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError:
+        return jsonify({"error": "Invalid batch or chunk size"}), 400
+    
+    if batch_size < 1 or chunk_size < 1:
+        return jsonify({"error": "Invalid batch or chunk size"}), 400
+    
+    if file_type not in IMPORTERS:
+        return jsonify({"error": "Invalid file type"}), 400
+    
+    # The upload is read from the buffer it was received into (multipart) or straight
+    # from the request body (raw); XLSX, Parquet and Arrow need random access, so those
+    # raw uploads are spooled first
+    if not raw_upload:
+        source = file.stream
+        file_hash = source.sha256 if isinstance(source, SpooledUpload) else None
+    elif file_format in RANDOM_ACCESS_FORMATS:
+        source = spool_stream(request.stream)
+        file_hash = source.sha256
         
-        # Save file temporarily
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        @after_this_request
+        def close_spooled_upload(response):
+            source.close()
+            return response
+    else:
+        source = HashingReader(request.stream)
+        file_hash = request.headers.get('X-Content-SHA256')
+    
+    # Attendance streams in checkpointed chunks, the other importers insert in batches
+    if file_type == 'attendance':
+        options = {"chunksize": chunk_size}
+    else:
+        options = {"batch_size": batch_size}
+    
+    dry_run = params.get('dry_run', 'false').lower() == 'true'
+    
+    # Files already in the import ledger are reported as applied unless the import is forced
+    force = params.get('force', 'false').lower() == 'true'
+    options["force"] = force
+    
+    # Hand large files to the background worker pool and return straight away
+    if params.get('async', 'false').lower() == 'true' and not dry_run:
+        filepath = new_job_filepath(filename)
         
-        # Process file based on type
         try:
-            if file_type == 'students':
-                result = process_student_csv(filepath)
-            elif file_type == 'attendance':
-                result = process_attendance_csv(filepath)
+            if isinstance(source, SpooledUpload):
+                source.persist(filepath)
             else:
-                return jsonify({"error": "Invalid file type"}), 400
-            
-            # Remove temporary file
-            os.remove(filepath)
+                with open(filepath, 'wb') as job_file:
+                    shutil.copyfileobj(source, job_file)
             
-            return jsonify(result), 200
-        
+            job = submit_import_job(current_app._get_current_object(), file_type, filepath, filename, options)
         except Exception as e:
-            # Remove temporary file
             if os.path.exists(filepath):
                 os.remove(filepath)
-            
             return jsonify({"error": str(e)}), 500
+        
+        return jsonify({"job_id": job.id, "status": job.status}), 202
     
-    return jsonify({"error": "File type not allowed"}), 400
+    # Process file based on type; a dry run only validates it
+    try:
+        if dry_run:
+            result = validate_upload(source, file_type, chunksize=chunk_size, file_format=file_format)
+        else:
+            result = IMPORTERS[file_type](source, file_hash=file_hash, file_format=file_format, **options)
+        
+        return jsonify(result), 200
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@file_bp.route('/jobs', methods=['GET'])
+def list_import_jobs():
+    jobs = ImportJob.query.order_by(ImportJob.created_at.desc()).limit(50).all()
+    return jsonify([job.to_dict() for job in jobs]), 200
+
+@file_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_import_job(job_id):
+    job = ImportJob.query.get(job_id)
+    if not job:
+        return jsonify({"error": "Import job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+@file_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = ImportJob.query.get(job_id)
+    if not job:
+        return jsonify({"error": "Import job not found"}), 404
+    
+    job = cancel_import_job(job)
+    
+    return jsonify(job.to_dict()), 200
+
+def send_cached_export(params, export_format, download_name, build_export, encoding=None, negotiated=False, student_id=None):
+    """Send an export from the export cache, building it with build_export(directory, encoding) on a miss.
+    
+    The cache key doubles as the ETag, so a client holding the current export gets a 304.
+    Compressed exports are compressed while they are written and cached under their own key.
+    The export is versioned by the data of student_id when it covers one student, otherwise by
+    the data of all students.
+    """
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    params = dict(params, format=export_format)
+    
+    if encoding:
+        suffix, compressed_mimetype = COMPRESSION_ENCODINGS[encoding]
+        params["compress"] = encoding
+        extension = f"{extension}.{suffix}"
+        if not negotiated:
+            mimetype = compressed_mimetype
+            download_name = f"{download_name}.{suffix}"
+    
+    key = export_cache_key(params, data_version(student_id))
+    
+    if key in request.if_none_match:
+        return compressed_download(Response(status=304, headers={"ETag": f'"{key}"'}), encoding, negotiated)
+    
+    export_file = cached_export_path(key, extension)
+    if export_file is None:
+        directory = export_temp_dir()
+        export_file = build_export(directory, encoding)
+        
+        export_file = store_export(key, extension, export_file)
+    
+    response = send_file(
+        export_file,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=download_name,
+        etag=key,
+        conditional=True
+    )
+    return compressed_download(response, encoding, negotiated)
 
 @file_bp.route('/export/<int:student_id>', methods=['GET'])
 def export_data(student_id):
@@ -71,26 +239,25 @@ def export_data(student_id):
     # Get export format from query params
     export_format = request.args.get('format', 'json').lower()
     
-    if export_format not in ['json', 'csv', 'xlsx']:
+    if export_format not in EXPORT_FORMATS:
         return jsonify({"error": "Invalid export format"}), 400
     
     try:
-        # Generate export file
-        export_file = export_student_data(student_id, export_format)
-        
-        # Set correct content type
-        if export_format == 'json':
-            mimetype = 'application/json'
-        elif export_format == 'csv':
-            mimetype = 'text/csv'
-        else:  # xlsx
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        
-        return send_file(
-            export_file,
-            mimetype=mimetype,
-            as_attachment=True,
-            download_name=f"student_{student_id}_export.{export_format}"
+        encoding, negotiated = export_compression(export_format)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        # Generate export file, or reuse it while the data is unchanged
+        extension = EXPORT_FORMATS[export_format][1]
+        return send_cached_export(
+            {"student_id": student_id},
+            export_format,
+            f"student_{student_id}_export.{extension}",
+            lambda directory, encoding: export_student_data(student_id, export_format, directory, encoding),
+            encoding,
+            negotiated,
+            student_id=student_id
         )
     
     except Exception as e:
@@ -101,9 +268,20 @@ def export_all_data():
     # Get export format from query params
     export_format = request.args.get('format', 'json').lower()
     
-    if export_format not in ['json', 'csv', 'xlsx']:
+    # NDJSON is always streamed; JSON is streamed as an array with ?stream=true
+    stream = export_format == 'ndjson' or request.args.get('stream', 'false').lower() == 'true'
+    
+    if stream and export_format not in STREAM_EXPORT_FORMATS:
+        return jsonify({"error": "Streaming export supports ndjson and json only"}), 400
+    
+    if not stream and export_format not in EXPORT_FORMATS:
         return jsonify({"error": "Invalid export format"}), 400
     
+    try:
+        encoding, negotiated = export_compression('ndjson' if stream else export_format)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     # Get optional filter params
     department = request.args.get('department')
     year = request.args.get('year')
@@ -116,29 +294,40 @@ def export_all_data():
             query = query.filter_by(department=department)
         
         if year:
-            query = query.filter_by(year_of_study=int(year))
-        
-        students = query.all()
+            year = int(year)
+            query = query.filter_by(year_of_study=year)
         
-        # Collect all student IDs
-        student_ids = [student.id for student in students]
+        def collect_student_ids():
+            return [id for (id,) in query.with_entities(Student.id).order_by(Student.id)]
         
-        # Generate export file for all filtered students
-        export_file = export_student_data(student_ids, export_format)
-        
-        # Set correct content type
-        if export_format == 'json':
-            mimetype = 'application/json'
-        elif export_format == 'csv':
-            mimetype = 'text/csv'
-        else:  # xlsx
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        if stream:
+            # Students are serialized (and compressed) while the response is being sent
+            mimetype, extension = STREAM_EXPORT_FORMATS[export_format]
+            filename = f"students_export_{datetime.now().strftime('%Y%m%d')}.{extension}"
+            chunks = iter_student_export(collect_student_ids(), export_format)
+            
+            if encoding:
+                chunks = compress_chunks(chunks, encoding)
+                if not negotiated:
+                    suffix, mimetype = COMPRESSION_ENCODINGS[encoding]
+                    filename = f"{filename}.{suffix}"
+            
+            response = Response(
+                stream_with_context(chunks),
+                mimetype=mimetype,
+                headers={"Content-Disposition": f"attachment; filename={filename}"}
+            )
+            return compressed_download(response, encoding, negotiated)
         
-        return send_file(
-            export_file,
-            mimetype=mimetype,
-            as_attachment=True,
-            download_name=f"students_export_{datetime.now().strftime('%Y%m%d')}.{export_format}"
+        # Generate export file for all filtered students, or reuse it while the data is unchanged
+        extension = EXPORT_FORMATS[export_format][1]
+        return send_cached_export(
+            {"department": department, "year": year},
+            export_format,
+            f"students_export_{datetime.now().strftime('%Y%m%d')}.{extension}",
+            lambda directory, encoding: export_student_data(collect_student_ids(), export_format, directory, encoding),
+            encoding,
+            negotiated
         )
     
     except Exception as e:
@@ -2,7 +2,14 @@ from flask import Blueprint, request, jsonify
 from models.database import db
 from models.student import Student
 from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
-from models.certifications import Certification, Project
+from services.percentile_index import update_student_score
+from services.score_summary import add_to_summary
+from services.response_cache import bump_data_versions
+from services.rollups import add_to_rollups
+from services.data_loader import load_student_records
+from services.date_window import parse_date_window
+from services.validation import parse_score
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 performance_bp = Blueprint('performance_bp', __name__)
@@ -19,27 +26,26 @@ def get_student_performance(student_id):
     if not student:
         return jsonify({"error": "Student not found"}), 404
     
-    # Get all performance metrics for the student
-    performance = PerformanceMetric.query.filter_by(student_id=student_id).all()
-    attendance = AttendanceRecord.query.filter_by(student_id=student_id).all()
-    exams = ExamResult.query.filter_by(student_id=student_id).all()
-    certifications = Certification.query.filter_by(student_id=student_id).all()
-    projects = Project.query.filter_by(student_id=student_id).all()
-    
-    result = {
-        "student": student.to_dict(),
-        "performance_metrics": [p.to_dict() for p in performance],
-        "attendance": [a.to_dict() for a in attendance],
-        "exams": [e.to_dict() for e in exams],
-        "certifications": [c.to_dict() for c in certifications],
-        "projects": [p.to_dict() for p in projects]
-    }
+    # Optional date window: ?from=YYYY-MM-DD&to=YYYY-MM-DD or ?semester=YYYY-1|2
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Get the student's performance records, limited to the window in SQL
+    records = load_student_records(student_id, window)
+    
+    result = {"student": student.to_dict()}
+    for name, table_records in records.items():
+        result[name] = [record.to_dict() for record in table_records]
     
     return jsonify(result), 200
 
 @performance_bp.route('/', methods=['POST'])
 def add_performance_metric():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
     
     # Validate required fields
     required_fields = ['student_id', 'metric_type', 'score', 'date_recorded']
@@ -55,27 +61,38 @@ def add_performance_metric():
     # Convert date string to date object
     try:
         date_recorded = datetime.strptime(data['date_recorded'], '%Y-%m-%d').date()
-    except ValueError:
+    except (TypeError, ValueError):
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
     
+    # Validate scores before they reach the summaries
+    try:
+        score, max_score = parse_score(data['score'], data.get('max_score', 100.0))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     new_metric = PerformanceMetric(
         student_id=data['student_id'],
         metric_type=data['metric_type'],
         subject=data.get('subject'),
-        score=data['score'],
-        max_score=data.get('max_score', 100.0),
+        score=score,
+        max_score=max_score,
         date_recorded=date_recorded,
         details=data.get('details')
     )
     
     db.session.add(new_metric)
+    add_to_summary(new_metric)
+    bump_data_versions([new_metric.student_id])
     db.session.commit()
+    update_student_score(new_metric.student_id)
     
     return jsonify(new_metric.to_dict()), 201
 
 @performance_bp.route('/attendance', methods=['POST'])
 def add_attendance():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
     
     # Validate required fields
     required_fields = ['student_id', 'subject', 'date', 'status']
@@ -91,7 +108,7 @@ def add_attendance():
     # Convert date string to date object
     try:
         attendance_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-    except ValueError:
+    except (TypeError, ValueError):
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
     
     # Validate status
@@ -107,13 +124,23 @@ def add_attendance():
     )
     
     db.session.add(new_attendance)
-    db.session.commit()
+    add_to_summary(new_attendance)
+    add_to_rollups(new_attendance)
+    bump_data_versions([new_attendance.student_id])
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Attendance record already exists for this subject and date"}), 409
+    update_student_score(new_attendance.student_id)
     
     return jsonify(new_attendance.to_dict()), 201
 
 @performance_bp.route('/exams', methods=['POST'])
 def add_exam_result():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
     
     # Validate required fields
     required_fields = ['student_id', 'subject', 'exam_type', 'score', 'max_score', 'date']
@@ -129,19 +156,29 @@ def add_exam_result():
     # Convert date string to date object
     try:
         exam_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-    except ValueError:
+    except (TypeError, ValueError):
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
     
+    # Validate scores before they reach the summaries and rollups
+    try:
+        score, max_score = parse_score(data['score'], data['max_score'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     new_exam = ExamResult(
         student_id=data['student_id'],
         subject=data['subject'],
         exam_type=data['exam_type'],
-        score=data['score'],
-        max_score=data['max_score'],
+        score=score,
+        max_score=max_score,
         date=exam_date
     )
     
     db.session.add(new_exam)
+    add_to_summary(new_exam)
+    add_to_rollups(new_exam)
+    bump_data_versions([new_exam.student_id])
     db.session.commit()
+    update_student_score(new_exam.student_id)
     
     return jsonify(new_exam.to_dict()), 201
\ No newline at end of file
@@ -1,61 +1,83 @@
-from flask import Blueprint, request, jsonify
-from models.database import db
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from models.student import Student
-from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
-from models.certifications import Certification, Project
 from services.prediction import predict_future_performance, recommend_improvements
+from services.batch_prediction import iter_batch_predictions
+from services.date_window import parse_date_window
+from services.response_cache import cached_student_response, PREDICTION_RESPONSE_TTL
 import json
 
 prediction_bp = Blueprint('prediction_bp', __name__)
 
 @prediction_bp.route('/future-performance/<int:student_id>', methods=['GET'])
+@cached_student_response(ttl=PREDICTION_RESPONSE_TTL, date_dependent=True)
 def get_future_performance(student_id):
     # Check if student exists
     student = Student.query.get(student_id)
     if not student:
         return jsonify({"error": "Student not found"}), 404
     
-    # Get all performance data for the student
-    performance = PerformanceMetric.query.filter_by(student_id=student_id).all()
-    attendance = AttendanceRecord.query.filter_by(student_id=student_id).all()
-    exams = ExamResult.query.filter_by(student_id=student_id).all()
-    certifications = Certification.query.filter_by(student_id=student_id).all()
-    projects = Project.query.filter_by(student_id=student_id).all()
-    
-    # Predict future performance
-    prediction = predict_future_performance(
-        student, 
-        performance, 
-        attendance, 
-        exams, 
-        certifications,
-        projects
-    )
+    # Optional date window: ?from=YYYY-MM-DD&to=YYYY-MM-DD or ?semester=YYYY-1|2
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Predict future performance from counts, aggregates and the projects, read in SQL within the window
+    prediction = predict_future_performance(student, window)
     
     return jsonify(prediction), 200
 
 @prediction_bp.route('/improvements/<int:student_id>', methods=['GET'])
+@cached_student_response(ttl=PREDICTION_RESPONSE_TTL, date_dependent=True)
 def get_improvement_recommendations(student_id):
     # Check if student exists
     student = Student.query.get(student_id)
     if not student:
         return jsonify({"error": "Student not found"}), 404
     
-    # Get all performance data for the student
-    performance = PerformanceMetric.query.filter_by(student_id=student_id).all()
-    attendance = AttendanceRecord.query.filter_by(student_id=student_id).all()
-    exams = ExamResult.query.filter_by(student_id=student_id).all()
-    certifications = Certification.query.filter_by(student_id=student_id).all()
-    projects = Project.query.filter_by(student_id=student_id).all()
-    
-    # Get recommendations for improvement
-    recommendations = recommend_improvements(
-        student, 
-        performance, 
-        attendance, 
-        exams, 
-        certifications,
-        projects
-    )
-    
-    return jsonify(recommendations), 200
\ No newline at end of file
+    # Optional date window: ?from=YYYY-MM-DD&to=YYYY-MM-DD or ?semester=YYYY-1|2
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Get recommendations for improvement from counts and aggregates read in SQL within the window
+    recommendations = recommend_improvements(student, window)
+    
+    return jsonify(recommendations), 200
+
+@prediction_bp.route('/batch', methods=['POST'])
+def get_batch_predictions():
+    # Cohort: {"student_ids": [...]} or {"department": ..., "year": ...} (no filters predicts every student)
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    
+    student_ids = data.get('student_ids')
+    department = data.get('department')
+    year = data.get('year')
+    
+    if student_ids is not None:
+        if department or year is not None:
+            return jsonify({"error": "Give either student_ids or department/year filters, not both"}), 400
+        if not isinstance(student_ids, list) or not all(isinstance(id, int) and not isinstance(id, bool) for id in student_ids):
+            return jsonify({"error": "student_ids must be a list of student ids"}), 400
+    
+    if year is not None:
+        try:
+            year = int(year)
+        except (TypeError, ValueError):
+            return jsonify({"error": "year must be an integer"}), 400
+    
+    # Optional date window: ?from=YYYY-MM-DD&to=YYYY-MM-DD or ?semester=YYYY-1|2
+    try:
+        window = parse_date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def lines():
+        # One NDJSON line per student, sent block by block while later blocks are still being predicted
+        for results in iter_batch_predictions(student_ids, department, year, window):
+            yield ''.join(json.dumps({"student": student, "prediction": prediction}) + '\n' for student, prediction in results)
+    
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
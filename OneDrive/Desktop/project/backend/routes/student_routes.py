@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
 from models.database import db
 from models.student import Student
+from models.score_summary import StudentScoreSummary
+from services.percentile_index import update_student_score, remove_student_score
+from services.response_cache import bump_data_versions
+from services.rollups import delete_student_rollups
 
 student_bp = Blueprint('student_bp', __name__)
 
@@ -47,6 +51,7 @@ def create_student():
     
     db.session.add(new_student)
     db.session.commit()
+    update_student_score(new_student.id)
     
     return jsonify(new_student.to_dict()), 201
 
@@ -75,7 +80,9 @@ def update_student(id):
         if hasattr(student, key):
             setattr(student, key, value)
     
+    bump_data_versions([student.id])
     db.session.commit()
+    update_student_score(student.id)
     
     return jsonify(student.to_dict()), 200
 
@@ -85,7 +92,11 @@ def delete_student(id):
     if not student:
         return jsonify({"error": "Student not found"}), 404
     
+    StudentScoreSummary.query.filter_by(student_id=id).delete()
+    delete_student_rollups(id)
+    bump_data_versions([id])
     db.session.delete(student)
     db.session.commit()
+    remove_student_score(id)
     
     return jsonify({"message": "Student deleted successfully"}), 200
\ No newline at end of file
@@ -1,43 +1,76 @@
-from sqlalchemy import func
+import math
+from sqlalchemy import func, case, select
+from bisect import bisect_left, bisect_right
 import numpy as np
-from models.database import db
+from models.database import db, floor_int
+from models.student import Student
 from models.performance_metric import AttendanceRecord, ExamResult
+from models.certifications import Certification, Project
+from services.data_loader import load_student_blocks
+from services.date_window import window_conditions
+from services.rollups import rollup_student_metrics
+
+# Student columns department performance can additionally be grouped by
+DEPARTMENT_BREAKDOWNS = ('year_of_study', 'semester')
+
+# Width of the histogram buckets of subject distributions, in percentage points
+HISTOGRAM_BUCKET_WIDTH = 10
+
+# Quantiles reported for subject distributions
+DISTRIBUTION_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+# Weights of the components of the overall performance score
+SCORE_WEIGHTS = {
+    "attendance": 0.15,
+    "exams": 0.40,
+    "projects": 0.20,
+    "certifications": 0.10,
+    "other_metrics": 0.15  # Presentations, symposiums, etc.
+}
+
+# Performance metric types that make up the "other metrics" score
+OTHER_METRIC_TYPES = ['presentation', 'symposium', 'internship']
 
 def calculate_overall_performance(student_id, performance_metrics, attendance_records, exam_results, certifications, projects):
     """Calculate the overall performance score for a student based on multiple metrics."""
-    
-    # Initialize weights for different metrics
-    weights = {
-        "attendance": 0.15,
-        "exams": 0.40,
-        "projects": 0.20,
-        "certifications": 0.10,
-        "other_metrics": 0.15  # Presentations, symposiums, etc.
-    }
-    
-    # Calculate attendance score
-    attendance_score = calculate_attendance_score(attendance_records)
-    
-    # Calculate exam score
-    exam_score = calculate_exam_score(exam_results)
-    
-    # Calculate project score
-    project_score = calculate_project_score(projects)
-    
-    # Calculate certification score
-    certification_score = calculate_certification_score(certifications)
-    
-    # Calculate other metrics score
-    other_metrics_score = calculate_other_metrics_score(performance_metrics)
-    
-    # Calculate weighted overall score
-    overall_score = (
-        weights["attendance"] * attendance_score +
-        weights["exams"] * exam_score +
-        weights["projects"] * project_score +
-        weights["certifications"] * certification_score +
-        weights["other_metrics"] * other_metrics_score
+    return combine_scores(
+        calculate_attendance_score(attendance_records),
+        calculate_exam_score(exam_results),
+        calculate_project_score(projects),
+        calculate_certification_score(certifications),
+        calculate_other_metrics_score(performance_metrics)
+    )
+
+def calculate_overall_from_summary(summary):
+    """Calculate the overall performance from a student's score summary row (None when they have no records)."""
+    if summary is None:
+        return combine_scores(0, 0, 0, 0, 0)
+    
+    def average(total, count):
+        return total / count if count else 0
+    
+    return combine_scores(
+        # Same operation order as calculate_attendance_score, so both round alike
+        average(summary.attendance_present, summary.attendance_total) * 100,
+        average(summary.exam_percentage_sum, summary.exam_count),
+        average(summary.project_percentage_sum, summary.project_graded_count),
+        min(summary.certification_count * 20, 100),
+        average(summary.other_metric_percentage_sum, summary.other_metric_count)
     )
+
+def weighted_overall(attendance_score, exam_score, project_score, certification_score, other_metrics_score):
+    """Weighted overall score; works on plain numbers and on NumPy arrays alike."""
+    return (
+        SCORE_WEIGHTS["attendance"] * attendance_score +
+        SCORE_WEIGHTS["exams"] * exam_score +
+        SCORE_WEIGHTS["projects"] * project_score +
+        SCORE_WEIGHTS["certifications"] * certification_score +
+        SCORE_WEIGHTS["other_metrics"] * other_metrics_score
+    )
+
+def combine_scores(attendance_score, exam_score, project_score, certification_score, other_metrics_score):
+    """Weight the component scores into the overall performance result."""
+    overall_score = weighted_overall(attendance_score, exam_score, project_score, certification_score, other_metrics_score)
     
     # Identify strengths and weaknesses
     metrics = {
@@ -61,10 +94,27 @@ def calculate_overall_performance(student_id, performance_metrics, attendance_re
             "other_metrics": round(other_metrics_score, 2)
         },
         "strengths": strengths,
-        "improvement_areas": weaknesses,
-        "percentile": calculate_percentile(overall_score)
+        "improvement_areas": weaknesses
     }
 
+def score_students(student_ids, window=None):
+    """Yield (student, overall performance) for every existing student in student_ids, in order.
+    
+    Records are loaded one table at a time for a whole block of students and bucketed by
+    student in memory, so the query count depends on the number of blocks, not of students.
+    window (a DateWindow) scores only the records dated within it.
+    """
+    for students, records in load_student_blocks(student_ids, window=window):
+        for student in students:
+            yield student, calculate_overall_performance(
+                student.id,
+                records['performance_metrics'].get(student.id, []),
+                records['attendance'].get(student.id, []),
+                records['exams'].get(student.id, []),
+                records['certifications'].get(student.id, []),
+                records['projects'].get(student.id, [])
+            )
+
 def calculate_attendance_score(attendance_records):
     """Calculate attendance score based on presence percentage."""
     if not attendance_records:
@@ -123,7 +173,7 @@ def calculate_other_metrics_score(performance_metrics):
     
     # Filter out metrics that are specifically for presentations, symposiums, etc.
     other_metrics = [m for m in performance_metrics 
-                    if m.metric_type in ['presentation', 'symposium', 'internship']]
+                    if m.metric_type in OTHER_METRIC_TYPES]
     
     if not other_metrics:
         return 0
@@ -135,24 +185,31 @@ def calculate_other_metrics_score(performance_metrics):
     
     return total_percentage / len(other_metrics) if other_metrics else 0
 
-def calculate_percentile(score):
-    """Calculate the approximate percentile of the score."""
-    # This is a simplified calculation
-    # In a real system, you would compare against all other students
-    if score >= 90:
-        return "90-100 (Top 10%)"
-    elif score >= 80:
-        return "80-90 (Top 20%)"
-    elif score >= 70:
-        return "70-80 (Top 30%)"
-    elif score >= 60:
-        return "60-70 (Top 40%)"
-    else:
-        return "Below 60"
-
-def analyze_attendance(attendance_records):
-    """Analyze attendance patterns."""
-    if not attendance_records:
+def calculate_percentile(score, cohort_scores):
+    """Percentile rank of score within a sorted list of cohort scores (ties count half), or None for an empty cohort."""
+    if not cohort_scores:
+        return None
+    
+    below = bisect_left(cohort_scores, score)
+    equal = bisect_right(cohort_scores, score) - below
+    
+    return round((below + 0.5 * equal) / len(cohort_scores) * 100, 2)
+
+def analyze_attendance(student_id, window=None):
+    """Analyze attendance patterns from per-subject, per-status counts aggregated in SQL.
+    
+    window (a DateWindow) limits the analysis to a date range.
+    """
+    counts = db.session.query(
+        AttendanceRecord.subject,
+        AttendanceRecord.status,
+        func.count(AttendanceRecord.id)
+    ).filter(
+        AttendanceRecord.student_id == student_id,
+        *window_conditions(AttendanceRecord, window)
+    ).group_by(AttendanceRecord.subject, AttendanceRecord.status).all()
+    
+    if not counts:
         return {
             "total_classes": 0,
             "present_count": 0,
@@ -162,29 +219,16 @@ def analyze_attendance(attendance_records):
             "subjects": {}
         }
     
-    total_classes = len(attendance_records)
-    present_count = sum(1 for record in attendance_records if record.status == 'present')
-    absent_count = sum(1 for record in attendance_records if record.status == 'absent')
-    excused_count = sum(1 for record in attendance_records if record.status == 'excused')
-    
-    # Analyze by subject
+    # Fold the (subject, status) counts into per-subject and overall totals
+    totals = {"total": 0, "present": 0, "absent": 0, "excused": 0}
     subjects = {}
-    for record in attendance_records:
-        if record.subject not in subjects:
-            subjects[record.subject] = {
-                "total": 0,
-                "present": 0,
-                "absent": 0,
-                "excused": 0
-            }
-        
-        subjects[record.subject]["total"] += 1
-        if record.status == 'present':
-            subjects[record.subject]["present"] += 1
-        elif record.status == 'absent':
-            subjects[record.subject]["absent"] += 1
-        elif record.status == 'excused':
-            subjects[record.subject]["excused"] += 1
+    for subject, status, count in counts:
+        data = subjects.setdefault(subject, {"total": 0, "present": 0, "absent": 0, "excused": 0})
+        data["total"] += count
+        totals["total"] += count
+        if status in data:
+            data[status] += count
+            totals[status] += count
     
     # Calculate percentages for each subject
     for subject, data in subjects.items():
@@ -192,17 +236,32 @@ def analyze_attendance(attendance_records):
             data["attendance_percentage"] = (data["present"] / data["total"]) * 100
     
     return {
-        "total_classes": total_classes,
-        "present_count": present_count,
-        "absent_count": absent_count,
-        "excused_count": excused_count,
-        "attendance_percentage": (present_count / total_classes) * 100 if total_classes > 0 else 0,
+        "total_classes": totals["total"],
+        "present_count": totals["present"],
+        "absent_count": totals["absent"],
+        "excused_count": totals["excused"],
+        "attendance_percentage": (totals["present"] / totals["total"]) * 100 if totals["total"] > 0 else 0,
         "subjects": subjects
     }
 
-def analyze_exam_performance(exam_results):
-    """Analyze exam performance patterns."""
-    if not exam_results:
+def analyze_exam_performance(student_id, window=None):
+    """Analyze exam performance patterns from per-subject normalized score aggregates computed in SQL.
+    
+    window (a DateWindow) limits the analysis to a date range.
+    """
+    normalized_score = ExamResult.score / ExamResult.max_score * 100
+    stats = db.session.query(
+        ExamResult.subject,
+        func.count(ExamResult.id),
+        func.sum(normalized_score),
+        func.max(normalized_score),
+        func.min(normalized_score)
+    ).filter(
+        ExamResult.student_id == student_id,
+        *window_conditions(ExamResult, window)
+    ).group_by(ExamResult.subject).all()
+    
+    if not stats:
         return {
             "total_exams": 0,
             "average_score": 0,
@@ -211,39 +270,223 @@ def analyze_exam_performance(exam_results):
             "subjects": {}
         }
     
-    total_exams = len(exam_results)
+    # Calculate statistics for each subject
+    subjects = {}
+    for subject, count, total, highest, lowest in stats:
+        subjects[subject] = {
+            "total_exams": count,
+            "average_score": total / count,
+            "highest_score": highest,
+            "lowest_score": lowest
+        }
+    
+    total_exams = sum(count for _, count, _, _, _ in stats)
     
-    # Calculate normalized scores
-    normalized_scores = [(exam.score / exam.max_score) * 100 for exam in exam_results]
+    return {
+        "total_exams": total_exams,
+        "average_score": sum(total for _, _, total, _, _ in stats) / total_exams,
+        "highest_score": max(highest for _, _, _, highest, _ in stats),
+        "lowest_score": min(lowest for _, _, _, _, lowest in stats),
+        "subjects": subjects
+    }
+
+def student_metric_subqueries():
+    """Per-student aggregates as subqueries keyed by student_id: attendance %, average exam %, certification and project counts.
     
-    avg_score = sum(normalized_scores) / len(normalized_scores) if normalized_scores else 0
-    highest_score = max(normalized_scores) if normalized_scores else 0
-    lowest_score = min(normalized_scores) if normalized_scores else 0
+    Attendance and exam figures are read from the monthly rollups rather than the raw records.
+    """
+    attendance, exams = rollup_student_metrics()
     
-    # Analyze by subject
-    subjects = {}
-    for exam in exam_results:
-        if exam.subject not in subjects:
-            subjects[exam.subject] = {
-                "total_exams": 0,
-                "scores": []
-            }
-        
-        subjects[exam.subject]["total_exams"] += 1
-        subjects[exam.subject]["scores"].append((exam.score / exam.max_score) * 100)
+    certifications = db.session.query(
+        Certification.student_id,
+        func.count(Certification.id).label('certification_count')
+    ).group_by(Certification.student_id).subquery()
     
-    # Calculate statistics for each subject
-    for subject, data in subjects.items():
-        if data["scores"]:
-            data["average_score"] = sum(data["scores"]) / len(data["scores"])
-            data["highest_score"] = max(data["scores"])
-            data["lowest_score"] = min(data["scores"])
-            data.pop("scores")  # Remove raw scores from the response
+    projects = db.session.query(
+        Project.student_id,
+        func.count(Project.id).label('project_count')
+    ).group_by(Project.student_id).subquery()
     
+    return attendance, exams, certifications, projects
+
+def _department_stats(totals):
+    """Turn summed per-student metrics into the department performance figures."""
+    total_students = totals["total_students"]
     return {
+        "total_students": total_students,
+        "avg_attendance": totals["attendance_sum"] / total_students,
+        "avg_exam_score": totals["exam_sum"] / total_students,
+        "total_certifications": totals["total_certifications"],
+        "total_projects": totals["total_projects"],
+        "avg_certifications": totals["total_certifications"] / total_students,
+        "avg_projects": totals["total_projects"] / total_students
+    }
+
+def department_performance(breakdown=()):
+    """Aggregate performance per department with a single grouped query.
+    
+    Each student's metrics come from per-student subqueries outer-joined to students, so students
+    without records count as 0 like before. With breakdown (a subset of DEPARTMENT_BREAKDOWNS),
+    every department also lists the same figures per year_of_study/semester group, taken from
+    the same query.
+    """
+    attendance, exams, certifications, projects = student_metric_subqueries()
+    group_columns = [Student.department] + [getattr(Student, column) for column in breakdown]
+    
+    query = db.session.query(
+        *group_columns,
+        func.count(Student.id).label('total_students'),
+        func.sum(func.coalesce(attendance.c.attendance_percentage, 0)).label('attendance_sum'),
+        func.sum(func.coalesce(exams.c.avg_exam_score, 0)).label('exam_sum'),
+        func.sum(func.coalesce(certifications.c.certification_count, 0)).label('total_certifications'),
+        func.sum(func.coalesce(projects.c.project_count, 0)).label('total_projects')
+    ).outerjoin(
+        attendance, attendance.c.student_id == Student.id
+    ).outerjoin(
+        exams, exams.c.student_id == Student.id
+    ).outerjoin(
+        certifications, certifications.c.student_id == Student.id
+    ).outerjoin(
+        projects, projects.c.student_id == Student.id
+    ).group_by(*group_columns).order_by(*group_columns)
+    
+    departments = {}
+    groups = {}
+    for row in query:
+        group = {
+            "total_students": int(row.total_students),
+            "attendance_sum": float(row.attendance_sum),
+            "exam_sum": float(row.exam_sum),
+            "total_certifications": int(row.total_certifications),
+            "total_projects": int(row.total_projects)
+        }
+        
+        # Department totals are the sums of their breakdown groups
+        totals = departments.setdefault(row.department, dict.fromkeys(group, 0))
+        for key, value in group.items():
+            totals[key] += value
+        
+        if breakdown:
+            keys = {column: getattr(row, column) for column in breakdown}
+            groups.setdefault(row.department, []).append(dict(keys, **_department_stats(group)))
+    
+    result = {}
+    for department, totals in departments.items():
+        result[department] = _department_stats(totals)
+        if breakdown:
+            result[department]["breakdown"] = groups[department]
+    
+    return result
+
+def _score_bucket(value):
+    """1-point bucket (0-100) of a percentage, computed in SQL; out-of-range values go to the end buckets."""
+    return case(
+        (value < 0, 0),
+        (value >= 100, 100),
+        else_=floor_int(value)
+    )
+
+def _bucket_distribution(bucket_counts):
+    """Fixed-width histogram and quantiles (to 1-point resolution) from {1-point bucket: count}."""
+    bucket_count = 100 // HISTOGRAM_BUCKET_WIDTH
+    histogram = [
+        {"min": index * HISTOGRAM_BUCKET_WIDTH, "max": (index + 1) * HISTOGRAM_BUCKET_WIDTH, "count": 0}
+        for index in range(bucket_count)
+    ]
+    for bucket, count in bucket_counts.items():
+        # The top bucket also holds scores of exactly 100
+        histogram[min(bucket // HISTOGRAM_BUCKET_WIDTH, bucket_count - 1)]["count"] += count
+    
+    # Nearest-rank quantiles: the first bucket whose cumulative count reaches the rank (None without data)
+    buckets = sorted(bucket_counts)
+    cumulative = np.cumsum([bucket_counts[bucket] for bucket in buckets])
+    total = int(cumulative[-1]) if buckets else 0
+    quantiles = {}
+    for quantile in DISTRIBUTION_QUANTILES:
+        rank = max(1, math.ceil(quantile * total))
+        quantiles[f"p{round(quantile * 100)}"] = buckets[bisect_left(cumulative, rank)] if total else None
+    
+    return histogram, quantiles
+
+def subject_distribution(subject, department=None, year=None, window=None):
+    """Cohort-wide exam and attendance distributions for one subject, in two grouped queries.
+    
+    Exam results are counted per exam type and 1-point score bucket, which yields the per-type
+    statistics, the score histogram and quantiles. Attendance is summarized as each student's
+    attendance rate in the subject, bucketed the same way. department/year limit the students
+    and window (a DateWindow) the records.
+    """
+    students = select(Student.id)
+    if department:
+        students = students.where(Student.department == department)
+    if year is not None:
+        students = students.where(Student.year_of_study == year)
+    
+    def cohort_conditions(model):
+        return [model.student_id.in_(students)] if department or year is not None else []
+    
+    # Exams: one row per exam type and score bucket
+    normalized_score = ExamResult.score / ExamResult.max_score * 100
+    exam_bucket = _score_bucket(normalized_score).label('bucket')
+    exam_rows = db.session.query(
+        ExamResult.exam_type,
+        exam_bucket,
+        func.count(ExamResult.id),
+        func.sum(normalized_score),
+        func.min(normalized_score),
+        func.max(normalized_score)
+    ).filter(
+        ExamResult.subject == subject,
+        *cohort_conditions(ExamResult),
+        *window_conditions(ExamResult, window)
+    ).group_by(ExamResult.exam_type, exam_bucket).all()
+    
+    exam_types = {}
+    exam_buckets = {}
+    for exam_type, bucket, count, total, lowest, highest in exam_rows:
+        stats = exam_types.setdefault(exam_type, {"count": 0, "sum": 0, "lowest_score": lowest, "highest_score": highest})
+        stats["count"] += count
+        stats["sum"] += total
+        stats["lowest_score"] = min(stats["lowest_score"], lowest)
+        stats["highest_score"] = max(stats["highest_score"], highest)
+        exam_buckets[bucket] = exam_buckets.get(bucket, 0) + count
+    
+    total_exams = sum(stats["count"] for stats in exam_types.values())
+    score_sum = sum(stats["sum"] for stats in exam_types.values())
+    for stats in exam_types.values():
+        stats["average_score"] = stats.pop("sum") / stats["count"]
+    
+    histogram, quantiles = _bucket_distribution(exam_buckets)
+    exams = {
         "total_exams": total_exams,
-        "average_score": avg_score,
-        "highest_score": highest_score,
-        "lowest_score": lowest_score,
-        "subjects": subjects
-    }
\ No newline at end of file
+        "average_score": score_sum / total_exams if total_exams else 0,
+        "highest_score": max((stats["highest_score"] for stats in exam_types.values()), default=0),
+        "lowest_score": min((stats["lowest_score"] for stats in exam_types.values()), default=0),
+        "histogram": histogram,
+        "quantiles": quantiles,
+        "exam_types": exam_types
+    }
+    
+    # Attendance: per-student rates in the subject, then counted per rate bucket
+    rates = db.session.query(
+        (func.sum(case((AttendanceRecord.status == 'present', 1), else_=0)) * 100.0 / func.count(AttendanceRecord.id)).label('rate')
+    ).filter(
+        AttendanceRecord.subject == subject,
+        *cohort_conditions(AttendanceRecord),
+        *window_conditions(AttendanceRecord, window)
+    ).group_by(AttendanceRecord.student_id).subquery()
+    
+    rate_bucket = _score_bucket(rates.c.rate).label('bucket')
+    attendance_rows = db.session.query(rate_bucket, func.count(), func.sum(rates.c.rate)).group_by(rate_bucket).all()
+    
+    attendance_buckets = {bucket: count for bucket, count, _ in attendance_rows}
+    total_students = sum(attendance_buckets.values())
+    histogram, quantiles = _bucket_distribution(attendance_buckets)
+    attendance = {
+        "total_students": total_students,
+        "average_attendance_rate": sum(total for _, _, total in attendance_rows) / total_students if total_students else 0,
+        "histogram": histogram,
+        "quantiles": quantiles
+    }
+    
+    return {"subject": subject, "exams": exams, "attendance": attendance}
@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, func, case, and_, type_coerce, Date, String
+from models.database import db, month_start
+from models.student import Student
+from models.performance_metric import AttendanceRecord, ExamResult
+from models.certifications import Certification, Project
+from models.rollups import MonthlyAttendanceRollup
+from services.cohort_scoring import LEADERBOARD_STUDENT_COLUMNS, read_frame
+from services.data_loader import iter_id_blocks
+from services.date_window import window_conditions
+from services.prediction import CURRENT_PERIOD_DAYS, current_window_start, combine_prediction, describe_trend
+
+# Students predicted per block of a department/year cohort, selected by id range so no ids are bound as parameters
+PREDICTION_BLOCK_SIZE = 10000
+
+def _dates(values):
+    return pd.to_datetime(values).to_numpy(dtype='datetime64[D]')
+
+def _first_last_count(frame, values):
+    """Per-student first and last of values (in frame order) and row count, indexed by student."""
+    grouped = pd.Series(values, index=frame['student'].to_numpy()).groupby(level=0, sort=True)
+    return pd.DataFrame({"first": grouped.first(), "last": grouped.last(), "count": grouped.size()})
+
+def _prefer_recent(sums):
+    """(count, total) per student from the recent columns, or from all records for students with no recent ones."""
+    # Float arrays even for a block without records, whose reindexed sums are object columns of ints
+    sums = {column: sums[column].to_numpy(dtype=float) for column in ['count', 'total', 'recent_count', 'recent_total']}
+    use_recent = sums['recent_count'] > 0
+    count = np.where(use_recent, sums['recent_count'], sums['count'])
+    total = np.where(use_recent, sums['recent_total'], sums['total'])
+    return count, total
+
+def _current_average(students, frame, values, recent):
+    """Per-student (count, sum) of values over recent rows, falling back to all rows like the per-student scores."""
+    columns = pd.DataFrame({
+        "student": frame['student'].to_numpy(),
+        "value": values,
+        "recent_value": np.where(recent, values, 0.0),
+        "recent": recent
+    })
+    sums = columns.groupby('student').agg(
+        count=('value', 'size'),
+        total=('value', 'sum'),
+        recent_count=('recent', 'sum'),
+        recent_total=('recent_value', 'sum')
+    )
+    return _prefer_recent(sums.reindex(students, fill_value=0))
+
+def _trend(first_last, students, strong_change, eligible=None):
+    """Trend entries built from per-student first/last values, in students order."""
+    first_last = first_last.reindex(students)
+    points = first_last['count'].fillna(0).astype(int).to_numpy()
+    trends = ((first_last['last'] - first_last['first']) / first_last['count']).to_numpy()
+    if eligible is None:
+        eligible = points >= 2
+    
+    return [
+        describe_trend(trend, count, strong_change) if ok and count >= 2
+        else {"trend": 0, "description": "Insufficient data"}
+        for trend, count, ok in zip(trends.tolist(), points.tolist(), eligible.tolist())
+    ]
+
+def _record_counts(frame, students):
+    """Number of rows of each student in students order; rows of other students in the block's id range are ignored."""
+    return frame.groupby('student').size().reindex(students, fill_value=0).to_numpy()
+
+def _scores(count, total, percentage):
+    # Students without records score the int 0, like the per-student calculations
+    return [value if n > 0 else 0 for n, value in zip(count.tolist(), percentage.tolist())]
+
+def predict_block(students, condition, window=None):
+    """Predict every student of a block from a few queries per record table, without per-student queries.
+    
+    students is a DataFrame of LEADERBOARD_STUDENT_COLUMNS; condition(column) limits a student_id
+    column to the block. Returns (student, prediction) pairs matching predict_future_performance.
+    """
+    ids = students['id'].to_numpy()
+    
+    def records(*columns):
+        model = columns[0].class_
+        # Dates come back as stored and are parsed by pandas, skipping the per-row conversion to date objects
+        selected = [type_coerce(column, String) if isinstance(column.type, Date) else column for column in columns]
+        # Rows are ordered in pandas where it matters, sparing the database a sort
+        statement = select(model.student_id, *selected).where(condition(model.student_id), *window_conditions(model, window))
+        return read_frame(statement, ['student'] + [column.key for column in columns])
+    
+    def cutoff(component):
+        return current_window_start(window, CURRENT_PERIOD_DAYS[component])
+    
+    # Attendance is the largest table, so it is counted in SQL: per month for the trend (from the
+    # rollups without a window, like the per-student trend) and recent/overall for the current score
+    if window is None:
+        rollup = MonthlyAttendanceRollup
+        monthly = select(rollup.student_id, func.sum(rollup.total), func.sum(rollup.present)).where(
+            condition(rollup.student_id)
+        ).group_by(rollup.student_id, rollup.month).order_by(rollup.student_id, rollup.month)
+    else:
+        month = month_start(AttendanceRecord.date)
+        monthly = select(
+            AttendanceRecord.student_id,
+            func.count(AttendanceRecord.id),
+            func.sum(case((AttendanceRecord.status == 'present', 1), else_=0))
+        ).where(
+            condition(AttendanceRecord.student_id), *window_conditions(AttendanceRecord, window)
+        ).group_by(AttendanceRecord.student_id, month).order_by(AttendanceRecord.student_id, month)
+    monthly = read_frame(monthly, ['student', 'total', 'present'])
+    monthly_percentages = (monthly['present'] / monthly['total'] * 100).to_numpy(dtype=float)
+    attendance_trends = _trend(_first_last_count(monthly, monthly_percentages), ids, 2)
+    
+    recent = AttendanceRecord.date >= cutoff('attendance')
+    present = AttendanceRecord.status == 'present'
+    attendance = read_frame(
+        select(
+            AttendanceRecord.student_id,
+            func.count(AttendanceRecord.id),
+            func.sum(case((present, 1), else_=0)),
+            func.sum(case((recent, 1), else_=0)),
+            func.sum(case((and_(recent, present), 1), else_=0))
+        ).where(
+            condition(AttendanceRecord.student_id), *window_conditions(AttendanceRecord, window)
+        ).group_by(AttendanceRecord.student_id),
+        ['student', 'count', 'total', 'recent_count', 'recent_total']
+    ).set_index('student').reindex(ids, fill_value=0)
+    count, total = _prefer_recent(attendance)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_attendance = _scores(count, total, total / count * 100)
+    attendance_counts = attendance['count'].to_numpy(dtype=int)
+    
+    # Exams: earliest and latest result for the trend, the last 180 days for the current score
+    exams = records(ExamResult.date, ExamResult.id, ExamResult.score, ExamResult.max_score)
+    exams['date'] = _dates(exams['date'])
+    exams = exams.sort_values(['student', 'date', 'id'])
+    exam_percentages = (exams['score'] / exams['max_score'] * 100).to_numpy(dtype=float)
+    exam_trends = _trend(_first_last_count(exams, exam_percentages), ids, 5)
+    
+    count, total = _current_average(ids, exams, exam_percentages, exams['date'].to_numpy() >= np.datetime64(cutoff('exams'), 'D'))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_exam_scores = _scores(count, total, total / count)
+    exam_counts = _record_counts(exams, ids)
+    
+    # Projects: graded projects ordered by end date (start date while unfinished), the last year for the current score
+    projects = records(Project.id, Project.start_date, Project.end_date, Project.grade, Project.max_grade)
+    project_counts = _record_counts(projects, ids)
+    projects['start_date'] = _dates(projects['start_date'])
+    projects['end_date'] = _dates(projects['end_date'])
+    graded = projects[projects['grade'].notna() & projects['max_grade'].notna()].copy()
+    graded['dated'] = graded['end_date'].fillna(graded['start_date'])
+    # Ties on the date keep primary key order, as in the per-student stable sort
+    graded = graded.sort_values(['student', 'dated', 'id'])
+    project_percentages = (graded['grade'].astype(float) / graded['max_grade'].astype(float) * 100).to_numpy()
+    project_trends = _trend(_first_last_count(graded, project_percentages), ids, 5, eligible=project_counts >= 2)
+    
+    since = np.datetime64(cutoff('projects'), 'D')
+    end_dates, start_dates = graded['end_date'].to_numpy(), graded['start_date'].to_numpy()
+    recent = (end_dates >= since) | (np.isnat(end_dates) & (start_dates >= since))
+    count, total = _current_average(ids, graded, project_percentages, recent)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_project_scores = _scores(count, total, total / count)
+    
+    certifications = records(Certification.id)
+    certification_counts = _record_counts(certifications, ids)
+    
+    results = []
+    for position, student in enumerate(students[LEADERBOARD_STUDENT_COLUMNS].to_dict('records')):
+        prediction = combine_prediction(
+            attendance_trends[position], exam_trends[position], project_trends[position],
+            current_attendance[position], current_exam_scores[position], current_project_scores[position],
+            int(certification_counts[position]), int(attendance_counts[position]),
+            int(exam_counts[position]), int(project_counts[position])
+        )
+        results.append((student, prediction))
+    
+    return results
+
+def iter_batch_predictions(student_ids=None, department=None, year=None, window=None):
+    """Yield lists of (student, prediction) pairs for a cohort, one block of students at a time.
+    
+    The cohort is the given student primary keys (unknown ones are left out) or every student
+    matching department and year. Each block costs one query for the students and six over the record tables.
+    """
+    students = select(*[getattr(Student, column) for column in LEADERBOARD_STUDENT_COLUMNS])
+    
+    if student_ids is not None:
+        # Explicit ids are bound as parameters, so they go in blocks of the usual size
+        for block in iter_id_blocks(sorted(set(student_ids))):
+            frame = read_frame(students.where(Student.id.in_(block)).order_by(Student.id), LEADERBOARD_STUDENT_COLUMNS)
+            if len(frame):
+                yield predict_block(frame, lambda column, block=block: column.in_(block), window)
+        return
+    
+    cohort = select(Student.id)
+    if department:
+        cohort = cohort.where(Student.department == department)
+    if year is not None:
+        cohort = cohort.where(Student.year_of_study == year)
+    filtered = department or year is not None
+    
+    cohort_ids = [id for (id,) in db.session.execute(cohort.order_by(Student.id))]
+    for block in iter_id_blocks(cohort_ids, PREDICTION_BLOCK_SIZE):
+        def condition(column, low=block[0], high=block[-1]):
+            in_range = column.between(low, high)
+            return and_(in_range, column.in_(cohort.scalar_subquery())) if filtered else in_range
+        
+        frame = read_frame(students.where(condition(Student.id)).order_by(Student.id), LEADERBOARD_STUDENT_COLUMNS)
+        yield predict_block(frame, condition, window)
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from models.database import db
+from models.student import Student
+from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
+from models.certifications import Certification, Project
+from services.analytics import OTHER_METRIC_TYPES, weighted_overall, combine_scores
+from services.date_window import window_conditions
+
+# Component score columns, in the order combine_scores takes them
+COMPONENT_COLUMNS = ['attendance', 'exams', 'projects', 'certifications', 'other_metrics']
+
+LEADERBOARD_STUDENT_COLUMNS = ['id', 'student_id', 'first_name', 'last_name', 'department', 'year_of_study', 'semester']
+
+def read_frame(statement, columns):
+    # Core execution hands back plain rows, skipping the ORM's per-row loading work
+    result = db.session.connection().execute(statement)
+    return pd.DataFrame.from_records(result.fetchall(), columns=columns)
+
+def _mean_by_student(student_ids, values):
+    """Per-student mean of values (a Series indexed by student, rows in record order), NaN for students without any.
+    
+    The values are added one by one in record order, like the per-student functions add them;
+    pandas' grouped sums use compensated summation and can differ from that in the last bits.
+    """
+    totals = {}
+    counts = {}
+    for student, value in zip(values.index.tolist(), values.tolist()):
+        totals[student] = totals.get(student, 0) + value
+        counts[student] = counts.get(student, 0) + 1
+    means = pd.Series({student: total / counts[student] for student, total in totals.items()}, dtype=float)
+    return means.reindex(student_ids).to_numpy(dtype=float)
+
+def json_value(value):
+    # NaN marks a component without records: it scores 0, the int the per-student functions return
+    if isinstance(value, float) and np.isnan(value):
+        return 0
+    return value.item() if isinstance(value, np.generic) else value
+
+def score_cohort(department=None, year=None, window=None):
+    """Score every student in a cohort at once from columnar copies of the five record tables.
+    
+    Returns a DataFrame with the student columns, the unrounded component scores and
+    overall_score, computed with the same formulas and weights as calculate_overall_performance.
+    A component is NaN for students without records for it. window (a DateWindow) scores only
+    the records dated within it.
+    """
+    students = select(*[getattr(Student, column) for column in LEADERBOARD_STUDENT_COLUMNS])
+    if department:
+        students = students.where(Student.department == department)
+    if year is not None:
+        students = students.where(Student.year_of_study == year)
+    frame = read_frame(students.order_by(Student.id), LEADERBOARD_STUDENT_COLUMNS)
+    cohort = students.with_only_columns(Student.id).scalar_subquery() if department or year is not None else None
+    
+    def records(*columns):
+        model = columns[0].class_
+        statement = select(model.student_id, *columns).where(*window_conditions(model, window))
+        if cohort is not None:
+            statement = statement.where(model.student_id.in_(cohort))
+        # Same per-student order as the record lists calculate_overall_performance is given
+        statement = statement.order_by(model.student_id, model.id)
+        return read_frame(statement, ['student'] + [column.key for column in columns]).set_index('student')
+    
+    student_ids = frame['id']
+    
+    # (present / total) * 100, in calculate_attendance_score's operation order so both round alike
+    attendance = records(AttendanceRecord.status)
+    attendance_counts = (attendance['status'] == 'present').groupby(level=0).agg(['sum', 'size']).reindex(student_ids)
+    frame['attendance'] = (attendance_counts['sum'] / attendance_counts['size'] * 100).to_numpy(dtype=float)
+    
+    exams = records(ExamResult.score, ExamResult.max_score)
+    frame['exams'] = _mean_by_student(student_ids, (exams['score'] / exams['max_score']) * 100)
+    
+    projects = records(Project.grade, Project.max_grade)
+    projects = projects[projects['grade'].notna() & projects['max_grade'].notna()]
+    frame['projects'] = _mean_by_student(student_ids, (projects['grade'] / projects['max_grade']) * 100)
+    
+    certifications = records(Certification.id)
+    counts = certifications.groupby(level=0).size().reindex(student_ids, fill_value=0).to_numpy()
+    frame['certifications'] = np.minimum(counts * 20, 100)
+    
+    metrics = records(PerformanceMetric.metric_type, PerformanceMetric.score, PerformanceMetric.max_score)
+    metrics = metrics[metrics['metric_type'].isin(OTHER_METRIC_TYPES)]
+    frame['other_metrics'] = _mean_by_student(student_ids, (metrics['score'] / metrics['max_score']) * 100)
+    
+    frame['overall_score'] = weighted_overall(*(frame[column].fillna(0).to_numpy() for column in COMPONENT_COLUMNS))
+    return frame
+
+def leaderboard(department=None, year=None, top=None, page=1, per_page=50, window=None):
+    """Rank a cohort by overall score and return (total ranked, entries of the requested page).
+    
+    Students with equal (rounded) overall scores share a rank; ties are listed by primary key.
+    top limits the ranking to the best top students before it is paginated.
+    """
+    frame = score_cohort(department, year, window)
+    
+    # Rank on the rounded score students are shown, rounded exactly like combine_scores does
+    frame['rounded_score'] = [round(score, 2) for score in frame['overall_score'].tolist()]
+    frame = frame.sort_values(['rounded_score', 'id'], ascending=[False, True], kind='stable')
+    frame['rank'] = frame['rounded_score'].rank(method='min', ascending=False).astype(int)
+    if top is not None:
+        frame = frame.head(top)
+    
+    total = len(frame)
+    page_frame = frame.iloc[(page - 1) * per_page:page * per_page]
+    
+    entries = []
+    for row in page_frame.itertuples(index=False):
+        student = {column: getattr(row, column) for column in LEADERBOARD_STUDENT_COLUMNS}
+        entries.append({
+            "rank": int(row.rank),
+            "student": {key: json_value(value) for key, value in student.items()},
+            "overall_performance": combine_scores(*(json_value(getattr(row, column)) for column in COMPONENT_COLUMNS))
+        })
+    
+    return total, entries
@@ -0,0 +1,47 @@
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd exports are only offered when zstandard is installed
+    zstandard = None
+
+# Encoding -> (file suffix, mimetype of a compressed download)
+COMPRESSION_ENCODINGS = {
+    'zstd': ('zst', 'application/zstd'),
+    'gzip': ('gz', 'application/gzip')
+}
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+def available_encodings():
+    """Encodings this server can produce, in order of preference."""
+    return [encoding for encoding in COMPRESSION_ENCODINGS if encoding != 'zstd' or zstandard is not None]
+
+def negotiate_encoding(accept_encodings):
+    """Pick the preferred available encoding the client accepts (werkzeug Accept-Encoding header), or None."""
+    for encoding in available_encodings():
+        if accept_encodings[encoding]:
+            return encoding
+    return None
+
+def _compressor(encoding):
+    if encoding == 'gzip':
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    if encoding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    raise ValueError(f"Unsupported compression: {encoding}")
+
+def compress_chunks(chunks, encoding):
+    """Compress an iterable of str/bytes chunks as it is consumed, yielding compressed bytes."""
+    compressor = _compressor(encoding)
+    
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    
+    yield compressor.flush()
@@ -0,0 +1,59 @@
+from collections import defaultdict
+from models.student import Student
+from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
+from models.certifications import Certification, Project
+from services.date_window import window_conditions
+
+# Student ids per IN (...) query; keeps every statement well under database parameter limits
+STUDENT_BLOCK_SIZE = 500
+
+# Per-student record tables, keyed by the name used in exports
+RECORD_MODELS = {
+    'performance_metrics': PerformanceMetric,
+    'attendance': AttendanceRecord,
+    'exams': ExamResult,
+    'certifications': Certification,
+    'projects': Project
+}
+
+def iter_id_blocks(student_ids, block_size=STUDENT_BLOCK_SIZE):
+    """Split a list of student primary keys into blocks of at most block_size."""
+    for start in range(0, len(student_ids), block_size):
+        yield student_ids[start:start + block_size]
+
+def load_records(model, student_ids, window=None):
+    """Load the records of model for a block of students with one query, grouped by student primary key.
+    
+    window (a DateWindow) limits the records to a date range.
+    """
+    grouped = defaultdict(list)
+    
+    records = model.query.filter(model.student_id.in_(student_ids), *window_conditions(model, window))
+    records = records.order_by(model.student_id, model.id)
+    for record in records:
+        grouped[record.student_id].append(record)
+    
+    return grouped
+
+def load_student_blocks(student_ids, block_size=STUDENT_BLOCK_SIZE, tables=None, window=None):
+    """Yield (students, records) for each block of student ids.
+    
+    students keeps the order of student_ids (unknown ids are left out); records maps each table
+    name in tables (default: all of RECORD_MODELS) to {student primary key: [records]},
+    limited to window when one is given.
+    Every block costs one query for the students plus one per table.
+    """
+    tables = list(RECORD_MODELS) if tables is None else tables
+    
+    for block in iter_id_blocks(student_ids, block_size):
+        found = {student.id: student for student in Student.query.filter(Student.id.in_(block))}
+        students = [found[id] for id in block if id in found]
+        records = {name: load_records(RECORD_MODELS[name], block, window) for name in tables}
+        yield students, records
+
+def load_student_records(student_id, window=None):
+    """Load one student's records from every table in RECORD_MODELS, optionally within a DateWindow."""
+    return {
+        name: load_records(model, [student_id], window).get(student_id, [])
+        for name, model in RECORD_MODELS.items()
+    }
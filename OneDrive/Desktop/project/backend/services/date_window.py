@@ -0,0 +1,80 @@
+import re
+from collections import namedtuple
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
+from models.certifications import Certification, Project
+
+# Inclusive date range; either bound may be None
+DateWindow = namedtuple('DateWindow', ['start', 'end'])
+
+DATE_FORMAT = '%Y-%m-%d'
+
+# ?semester=YYYY-1 is January-June, YYYY-2 is July-December
+SEMESTER_PATTERN = re.compile(r'^(\d{4})-([12])$')
+
+# Date column each record table is windowed on
+RECORD_DATE_COLUMNS = {
+    PerformanceMetric: PerformanceMetric.date_recorded,
+    AttendanceRecord: AttendanceRecord.date,
+    ExamResult: ExamResult.date,
+    Certification: Certification.issue_date
+}
+
+def semester_window(semester):
+    """Date range of a semester given as YYYY-1 or YYYY-2."""
+    match = SEMESTER_PATTERN.match(semester)
+    if not match:
+        raise ValueError("Invalid semester. Use YYYY-1 (January-June) or YYYY-2 (July-December)")
+    
+    year, half = int(match.group(1)), int(match.group(2))
+    if half == 1:
+        return DateWindow(date(year, 1, 1), date(year, 6, 30))
+    return DateWindow(date(year, 7, 1), date(year, 12, 31))
+
+def parse_date_window(args):
+    """Read ?from=YYYY-MM-DD, ?to=YYYY-MM-DD and ?semester=YYYY-1|2 into a DateWindow, or None when absent.
+    
+    Combining a semester with from/to narrows the window to their overlap. Raises ValueError on bad input.
+    """
+    start = end = None
+    try:
+        if args.get('from'):
+            start = datetime.strptime(args['from'], DATE_FORMAT).date()
+        if args.get('to'):
+            end = datetime.strptime(args['to'], DATE_FORMAT).date()
+    except ValueError:
+        raise ValueError("Invalid date format for from/to. Use YYYY-MM-DD") from None
+    
+    if args.get('semester'):
+        semester = semester_window(args['semester'])
+        start = max(start, semester.start) if start else semester.start
+        end = min(end, semester.end) if end else semester.end
+    
+    if start is None and end is None:
+        return None
+    if start and end and start > end:
+        raise ValueError("The date window is empty: from must not be after to")
+    return DateWindow(start, end)
+
+def _between(column, window):
+    conditions = []
+    if window.start is not None:
+        conditions.append(column >= window.start)
+    if window.end is not None:
+        conditions.append(column <= window.end)
+    return and_(*conditions)
+
+def window_conditions(model, window):
+    """Filter conditions limiting a record table to window (none when window is None).
+    
+    Projects are dated by their end date, or by their start date while they have no end date.
+    """
+    if window is None:
+        return []
+    if model is Project:
+        return [or_(
+            _between(Project.end_date, window),
+            and_(Project.end_date.is_(None), _between(Project.start_date, window))
+        )]
+    return [_between(RECORD_DATE_COLUMNS[model], window)]
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from sqlalchemy import func, select
+from models.database import db
+from models.student import Student
+from services.response_cache import ALL_STUDENTS_VERSION_ID, student_data_version
+
+# Finished exports are kept here as <key>.<extension>; exports being written start with EXPORT_TEMP_PREFIX
+EXPORT_CACHE_FOLDER = os.path.join(tempfile.gettempdir(), 'student_analytics_exports')
+
+# Total size of cached exports; the least recently used ones are removed beyond it
+EXPORT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+EXPORT_TEMP_PREFIX = 'export-'
+
+# Exports still being written after this many seconds were left behind by a failed request
+ORPHAN_MAX_AGE = 60 * 60
+
+def data_version(student_id=None):
+    """Version of the exported data from a few primary-key lookups: one student's data version, or for
+    all students the version bumped by every change plus the highest student id (new students bump nothing)."""
+    if student_id is not None:
+        return [student_id, student_data_version(student_id)]
+    
+    return [
+        student_data_version(ALL_STUDENTS_VERSION_ID),
+        db.session.execute(select(func.max(Student.id))).scalar()
+    ]
+
+def export_cache_key(params, version):
+    """Key (and ETag) of an export: its filters and format plus the data version."""
+    payload = json.dumps({"params": params, "version": version}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def cached_export_path(key, extension):
+    """Return the cached export for key, marking it as recently used, or None."""
+    path = os.path.join(EXPORT_CACHE_FOLDER, f"{key}.{extension}")
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+def export_temp_dir():
+    """Directory new exports are written to, so they can be moved into the cache without copying."""
+    os.makedirs(EXPORT_CACHE_FOLDER, exist_ok=True)
+    return EXPORT_CACHE_FOLDER
+
+def store_export(key, extension, path):
+    """Move a finished export into the cache and trim the cache to its size limit."""
+    cached_path = os.path.join(export_temp_dir(), f"{key}.{extension}")
+    if os.path.dirname(os.path.abspath(path)) == EXPORT_CACHE_FOLDER:
+        os.replace(path, cached_path)
+    else:
+        shutil.move(path, cached_path)
+    
+    cleanup_export_cache(keep=cached_path)
+    return cached_path
+
+def cleanup_export_cache(keep=None):
+    """Delete orphaned temporary exports, then least recently used exports until the cache fits its limit."""
+    if not os.path.isdir(EXPORT_CACHE_FOLDER):
+        return
+    
+    now = time.time()
+    entries = []
+    for entry in os.scandir(EXPORT_CACHE_FOLDER):
+        try:
+            stat = entry.stat()
+            if entry.name.startswith(EXPORT_TEMP_PREFIX):
+                if now - stat.st_mtime > ORPHAN_MAX_AGE:
+                    os.remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            # Removed by a concurrent request
+            continue
+    
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= EXPORT_CACHE_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
@@ -1,83 +1,538 @@
 import pandas as pd
-import numpy as np
+import codecs
+import hashlib
 import json
 import os
 import tempfile
-from datetime import datetime
-from models.database import db
+import time
+import zipfile
+import pyarrow as pa
+import pyarrow.parquet as pq
+from contextlib import contextmanager
+from openpyxl import Workbook, load_workbook
+from sqlalchemy import insert, select
+from models.database import db, insert_or_ignore
 from models.student import Student
 from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
 from models.certifications import Certification, Project
+from models.import_checkpoint import ImportCheckpoint
+from models.import_ledger import ImportLedger
+from services.data_loader import RECORD_MODELS, iter_id_blocks, load_student_blocks
+from services.compression import compress_chunks
+from services.export_cache import EXPORT_TEMP_PREFIX
+from services.percentile_index import invalidate_percentile_index
+from services.score_summary import SUMMARY_MODELS, refresh_score_summaries
+from services.response_cache import bump_data_versions
+from services.rollups import ROLLUP_MODELS, refresh_rollups
+from services.validation import ValidationReport, IMPORT_COLUMNS, as_key_strings, validate_frame
 
-def process_student_csv(filepath):
-    """Process student CSV file and import data into the database."""
-    try:
-        # Detect file format based on extension
-        file_ext = os.path.splitext(filepath)[1].lower()
-        
-        if file_ext == '.csv':
-            df = pd.read_csv(filepath)
-        elif file_ext == '.xlsx':
-            df = pd.read_excel(filepath)
-        elif file_ext == '.json':
-            with open(filepath, 'r') as file:
-                data = json.load(file)
-            df = pd.DataFrame(data)
+# Number of rows sent to the database per bulk INSERT / commit
+DEFAULT_BATCH_SIZE = 1000
+
+# Number of rows parsed, committed and checkpointed at a time by streaming imports
+DEFAULT_CHUNK_SIZE = 50000
+
+# Block size used when hashing or incrementally parsing uploads
+HASH_BLOCK_SIZE = 1024 * 1024
+
+FILE_FORMATS = ('csv', 'xlsx', 'json', 'parquet', 'arrow')
+
+# Other extensions of the same formats (Feather v2 is the Arrow IPC file format)
+FILE_FORMAT_ALIASES = {'feather': 'arrow', 'ipc': 'arrow'}
+
+# Formats carrying their own typed schema; only the columns an import needs are read
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+# Formats that need a seekable source (zip archives and files with a trailing footer)
+RANDOM_ACCESS_FORMATS = ('xlsx', 'parquet', 'arrow')
+
+# Export format -> (mimetype, file extension); columnar exports are a zip with one file per table
+EXPORT_FORMATS = {
+    'json': ('application/json', 'json'),
+    'csv': ('text/csv', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/zip', 'zip'),
+    'arrow': ('application/zip', 'zip')
+}
+
+# Streaming export formats -> (mimetype, file extension)
+STREAM_EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'json': ('application/json', 'json')
+}
+
+# Students loaded and serialized at a time by streaming exports
+EXPORT_STREAM_BLOCK_SIZE = 100
+
+# Header of the flattened CSV export; each record type fills its own columns
+EXPORT_CSV_COLUMNS = [
+    'student_id', 'first_name', 'last_name', 'email', 'department', 'year_of_study', 'semester',
+    'record_type', 'subject', 'date', 'status', 'exam_type', 'score', 'max_score',
+    'name', 'issuing_organization', 'issue_date', 'expiry_date', 'credential_id',
+    'title', 'start_date', 'end_date', 'grade', 'max_grade'
+]
+
+# Record sheets of the cohort XLSX export (after the Students sheet), keyed by table name
+XLSX_SHEETS = {
+    'performance_metrics': 'Performance Metrics',
+    'attendance': 'Attendance',
+    'exams': 'Exams',
+    'certifications': 'Certifications',
+    'projects': 'Projects'
+}
+
+def _file_format(source, file_format=None):
+    """Return the upload format (csv, xlsx, json, parquet, arrow) from file_format or the source's file name."""
+    if file_format is None:
+        name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+        file_format = os.path.splitext(str(name))[1]
+    
+    file_format = file_format.lower().lstrip('.')
+    file_format = FILE_FORMAT_ALIASES.get(file_format, file_format)
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unsupported file format: .{file_format}")
+    
+    return file_format
+
+@contextmanager
+def _open_binary(source, offset=0):
+    """Open a path, or rewind a seekable file object, positioned at offset.
+    
+    File objects are not closed; non-seekable streams are read from where they are, skipping
+    offset bytes by reading and discarding them.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            file.seek(offset)
+            yield file
+    else:
+        if source.seekable():
+            source.seek(offset)
         else:
-            raise ValueError(f"Unsupported file format: {file_ext}")
+            remaining = offset
+            while remaining:
+                block = source.read(min(remaining, HASH_BLOCK_SIZE))
+                if not block:
+                    raise ValueError("Upload stream ended before the resume position; it is not the interrupted file")
+                remaining -= len(block)
+        yield source
+
+def _read_dataframe(source, file_format=None, columns=None):
+    """Load an upload (path or binary file object) into a DataFrame based on its format.
+    
+    columns (standardized names) limits what is read from columnar formats; text formats are read whole.
+    """
+    file_format = _file_format(source, file_format)
+    
+    with _open_binary(source) as file:
+        if file_format == 'csv':
+            df = pd.read_csv(file)
+        elif file_format == 'xlsx':
+            df = pd.read_excel(file)
+        elif file_format == 'json':
+            df = pd.DataFrame(json.load(file))
+        else:
+            schema, batches = _open_record_batches(file, file_format, columns)
+            df = _arrow_to_frame(pa.Table.from_batches(list(batches), schema=schema))
+    
+    return _standardize_columns(df)
+
+def _standardize_name(col):
+    """Standardize a column name (lowercase, remove spaces)."""
+    return str(col).lower().replace(' ', '_')
+
+def _standardize_columns(df):
+    """Standardize column names (lowercase, remove spaces)."""
+    df.columns = [_standardize_name(col) for col in df.columns]
+    return df
+
+def _arrow_to_frame(table, rows_before=0):
+    """Convert an Arrow table to a DataFrame indexed by absolute data row position.
+    
+    Arrow dates become datetime64 columns, which the validators take as already parsed.
+    """
+    df = table.to_pandas(date_as_object=False)
+    df.index = pd.RangeIndex(rows_before, rows_before + len(df))
+    return df
+
+def _open_record_batches(file, file_format, columns=None, skip_rows=0):
+    """Open a Parquet or Arrow IPC file, returning (schema, record batch iterator).
+    
+    Only the columns whose standardized names are in columns are read. The first skip_rows rows
+    are skipped; Parquet row groups that lie entirely before them are never decoded.
+    """
+    if file_format == 'parquet':
+        parquet_file = pq.ParquetFile(file)
+        schema = parquet_file.schema_arrow
+        names = _select_columns(schema.names, columns)
         
-        # Standardize column names (lowercase, remove spaces)
-        df.columns = [col.lower().replace(' ', '_') for col in df.columns]
+        row_groups = []
+        for index in range(parquet_file.num_row_groups):
+            group_rows = parquet_file.metadata.row_group(index).num_rows
+            if not row_groups and skip_rows >= group_rows:
+                skip_rows -= group_rows
+            else:
+                row_groups.append(index)
         
-        # Check for required columns
-        required_columns = ['student_id', 'first_name', 'last_name', 'email', 'department', 'year_of_study', 'semester']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        batches = parquet_file.iter_batches(row_groups=row_groups, columns=names) if row_groups else iter(())
+    else:
+        try:
+            reader = pa.ipc.open_file(file)
+            batches = (reader.get_batch(index) for index in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            # Not an IPC file, so read it as an IPC stream
+            file.seek(0)
+            reader = pa.ipc.open_stream(file)
+            batches = iter(reader)
+        schema = reader.schema
+        names = _select_columns(schema.names, columns)
+        batches = (batch.select(names) for batch in batches)
+    
+    schema = pa.schema([schema.field(name) for name in names])
+    return schema, _skip_batch_rows(batches, skip_rows)
+
+def _select_columns(names, columns):
+    """Return the file column names whose standardized form is wanted (all when columns is None)."""
+    if columns is None:
+        return list(names)
+    wanted = set(columns)
+    return [name for name in names if _standardize_name(name) in wanted]
+
+def _skip_batch_rows(batches, skip_rows):
+    """Drop the first skip_rows rows from a stream of record batches."""
+    for batch in batches:
+        if skip_rows >= batch.num_rows:
+            skip_rows -= batch.num_rows
+            continue
+        if skip_rows:
+            batch = batch.slice(skip_rows)
+            skip_rows = 0
+        yield batch
+
+def _file_sha256(source):
+    """Hash a file in fixed-size blocks so large uploads never sit in memory."""
+    digest = hashlib.sha256()
+    with _open_binary(source) as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _iter_json_array(source, start_offset=0):
+    """Incrementally parse a top-level JSON array, yielding (record, end_byte_offset).
+    
+    A non-zero start_offset must point just past a previously yielded record.
+    """
+    decoder = json.JSONDecoder()
+    utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+    
+    with _open_binary(source, start_offset) as file:
+        buffer = ''
+        pos = 0
+        offset = start_offset  # byte offset of buffer[pos] in the file
+        eof = False
+        state = 'next' if start_offset else 'start'
         
-        if missing_columns:
-            raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+        def fill():
+            nonlocal buffer, pos, eof
+            block = file.read(HASH_BLOCK_SIZE)
+            if not block:
+                eof = True
+                buffer += utf8_decoder.decode(b'', final=True)
+                return
+            # Drop the consumed prefix before growing the buffer
+            buffer = buffer[pos:] + utf8_decoder.decode(block)
+            pos = 0
         
-        # Import data into database
-        students_added = 0
-        students_skipped = 0
-        errors = []
+        def advance(end):
+            # Only the text just consumed is encoded, keeping the byte offset linear in the file size
+            nonlocal pos, offset
+            offset += len(buffer[pos:end].encode('utf-8'))
+            pos = end
         
-        for _, row in df.iterrows():
+        while True:
+            end = pos
+            while end < len(buffer) and buffer[end].isspace():
+                end += 1
+            advance(end)
+            if pos >= len(buffer):
+                if eof:
+                    raise ValueError("Unexpected end of JSON input")
+                fill()
+                continue
+            
+            char = buffer[pos]
+            if state == 'start':
+                if char != '[':
+                    raise ValueError("Streaming JSON import expects a top-level array of records")
+                advance(pos + 1)
+                state = 'first'
+                continue
+            if char == ']' and state in ('first', 'next'):
+                return
+            if state == 'next':
+                if char != ',':
+                    raise ValueError(f"Malformed JSON near byte {offset}")
+                advance(pos + 1)
+                state = 'value'
+                continue
+            
             try:
-                # Check if student already exists
-                existing_student = Student.query.filter(
-                    (Student.student_id == row['student_id']) | 
-                    (Student.email == row['email'])
-                ).first()
-                
-                if existing_student:
-                    students_skipped += 1
-                    continue
-                
-                # Create new student
-                new_student = Student(
-                    student_id=row['student_id'],
-                    first_name=row['first_name'],
-                    last_name=row['last_name'],
-                    email=row['email'],
-                    department=row['department'],
-                    year_of_study=int(row['year_of_study']),
-                    semester=int(row['semester'])
-                )
-                
-                db.session.add(new_student)
-                students_added += 1
-                
-            except Exception as e:
-                errors.append(f"Error processing row for student {row['student_id']}: {str(e)}")
-        
-        # Commit changes
+                record, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise
+                fill()
+                continue
+            
+            advance(end)
+            state = 'next'
+            yield record, offset
+
+def _upload_fingerprint(source, file_hash=None):
+    """Return the upload's SHA-256: the one supplied, or hashed now if the source can be read twice."""
+    if file_hash is None and (isinstance(source, (str, os.PathLike)) or source.seekable()):
+        file_hash = _file_sha256(source)
+    return file_hash
+
+def _chunk_fingerprint(df):
+    """Fingerprint a parsed chunk by its column names and values (not its position in the file)."""
+    digest = hashlib.sha256(','.join(df.columns).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+def _ledger_entry(fingerprint, scope, import_type):
+    """Return the ledger entry recording that this file or chunk was already imported, if any."""
+    if fingerprint is None:
+        return None
+    return ImportLedger.query.filter_by(fingerprint=fingerprint, scope=scope, import_type=import_type).first()
+
+def _record_fingerprint(fingerprint, scope, import_type, rows):
+    """Add a file or chunk fingerprint to the import ledger; the caller owns the commit."""
+    db.session.connection().execute(insert_or_ignore(ImportLedger), [{
+        "fingerprint": fingerprint,
+        "scope": scope,
+        "import_type": import_type,
+        "rows": rows
+    }])
+
+def _record_applied_file(source, file_hash, import_type, rows):
+    """Record a fully imported file, preferring the hash taken while the upload was read."""
+    file_hash = getattr(source, 'sha256', None) or file_hash
+    if file_hash:
+        _record_fingerprint(file_hash, 'file', import_type, rows)
         db.session.commit()
+
+def _already_applied_result(entry, **counts):
+    """Response for a file whose fingerprint is already in the import ledger."""
+    applied_at = entry.created_at.isoformat() if entry.created_at else None
+    return {
+        "success": True,
+        "already_applied": True,
+        "message": f"This file was already imported at {applied_at}; pass force=true to import it again",
+        "file_hash": entry.fingerprint,
+        "applied_at": applied_at,
+        **counts,
+        "errors": [],
+        "rows_processed": 0
+    }
+
+def _row_index(rows_before, records):
+    """Index a chunk by absolute 0-based data row position so errors report file row numbers."""
+    return pd.RangeIndex(rows_before, rows_before + len(records))
+
+def _iter_file_chunks(source, chunksize, skip_rows=0, start_offset=None, file_format=None, columns=None):
+    """Yield (DataFrame, rows_read_so_far, byte_offset) chunks of an upload (path or binary file object).
+    
+    byte_offset is only known for incrementally parsed JSON and is None otherwise.
+    CSV and JSON are parsed as they are read, so a request stream is consumed incrementally.
+    columns (standardized names) limits what is read from Parquet and Arrow files.
+    """
+    file_format = _file_format(source, file_format)
+    rows_read = skip_rows
+    
+    if file_format == 'csv':
+        with _open_binary(source) as file:
+            # A callable keeps resuming constant-memory; a list-like skiprows is expanded into a set of row numbers
+            skiprows = (lambda row: 0 < row <= skip_rows) if skip_rows else None
+            reader = pd.read_csv(file, chunksize=chunksize, skiprows=skiprows)
+            for chunk in reader:
+                chunk.index = pd.RangeIndex(rows_read, rows_read + len(chunk))
+                rows_read += len(chunk)
+                yield _standardize_columns(chunk), rows_read, None
+    
+    elif file_format == 'json':
+        records = []
+        last_offset = start_offset
+        for record, end_offset in _iter_json_array(source, start_offset or 0):
+            records.append(record)
+            last_offset = end_offset
+            if len(records) >= chunksize:
+                yield _standardize_columns(pd.DataFrame(records, index=_row_index(rows_read, records))), rows_read + len(records), last_offset
+                rows_read += len(records)
+                records = []
+        if records:
+            yield _standardize_columns(pd.DataFrame(records, index=_row_index(rows_read, records))), rows_read + len(records), last_offset
+    
+    elif file_format in COLUMNAR_FORMATS:
+        with _open_binary(source) as file:
+            schema, batches = _open_record_batches(file, file_format, columns, skip_rows)
+            
+            # Regroup the file's own batches / row groups into chunks of chunksize rows
+            pending = []
+            pending_rows = 0
+            for batch in batches:
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                while pending_rows >= chunksize:
+                    table = pa.Table.from_batches(pending, schema=schema)
+                    rest = table.slice(chunksize)
+                    pending = rest.to_batches()
+                    pending_rows = rest.num_rows
+                    yield _standardize_columns(_arrow_to_frame(table.slice(0, chunksize), rows_read)), rows_read + chunksize, None
+                    rows_read += chunksize
+            if pending_rows:
+                table = pa.Table.from_batches(pending, schema=schema)
+                yield _standardize_columns(_arrow_to_frame(table, rows_read)), rows_read + pending_rows, None
+    
+    else:
+        # XLSX is a zip archive, so it needs a seekable source rather than a live stream
+        with _open_binary(source) as file:
+            workbook = load_workbook(file, read_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    return
+                records = []
+                for index, values in enumerate(rows):
+                    if index < skip_rows:
+                        continue
+                    records.append(values)
+                    if len(records) >= chunksize:
+                        yield _standardize_columns(pd.DataFrame(records, columns=header, index=_row_index(rows_read, records))), rows_read + len(records), None
+                        rows_read += len(records)
+                        records = []
+                if records:
+                    yield _standardize_columns(pd.DataFrame(records, columns=header, index=_row_index(rows_read, records))), rows_read + len(records), None
+            finally:
+                workbook.close()
+
+def _check_required_columns(df, required_columns):
+    """Raise a ValueError if any of the required columns is missing."""
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+def _bulk_insert(model, records, batch_size, progress=None, rows_before=0, errors_before=0):
+    """Insert mappings with executemany INSERTs, committing after every batch.
+    
+    progress(rows_processed, error_count) is called after each committed batch;
+    rows_before/errors_before account for rows already handled by the caller.
+    """
+    inserted = 0
+    errors = []
+    
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        try:
+            db.session.execute(insert(model), batch)
+            if model in SUMMARY_MODELS:
+                # Keep the affected students' score summaries, rollups and data versions in the batch's transaction
+                student_ids = {record['student_id'] for record in batch}
+                refresh_score_summaries(student_ids)
+                if model in ROLLUP_MODELS:
+                    refresh_rollups(student_ids, [model])
+                bump_data_versions(student_ids)
+            db.session.commit()
+            inserted += len(batch)
+            invalidate_percentile_index()
+        except Exception as e:
+            db.session.rollback()
+            errors.append(f"Error inserting rows {start + 1}-{start + len(batch)}: {str(e)}")
+        
+        if progress:
+            progress(rows_before + start + len(batch), errors_before + len(errors))
+    
+    return inserted, errors
+
+def process_student_csv(source, batch_size=DEFAULT_BATCH_SIZE, progress=None, file_format=None, file_hash=None, force=False):
+    """Process student CSV file and import data into the database.
+    
+    source is a path or a binary file object; file_format overrides the extension-based detection.
+    progress(rows_processed, error_count) is called after every committed batch.
+    A file already in the import ledger is not imported again unless force is set.
+    """
+    try:
+        started_at = time.perf_counter()
+        
+        file_hash = _upload_fingerprint(source, file_hash)
+        applied = None if force else _ledger_entry(file_hash, 'file', 'students')
+        if applied is not None:
+            return _already_applied_result(applied, students_added=0, students_skipped=0)
+        
+        required_columns, _ = IMPORT_COLUMNS['students']
+        df = _read_dataframe(source, file_format, required_columns)
+        _check_required_columns(df, required_columns)
+        df = df[required_columns].copy()
+        total_rows = len(df)
+        
+        df['student_id'] = as_key_strings(df['student_id'])
+        df['email'] = as_key_strings(df['email'])
+        
+        # Preload existing keys in one query instead of one lookup per row
+        existing_ids = set()
+        existing_emails = set()
+        for existing_id, existing_email in db.session.query(Student.student_id, Student.email):
+            existing_ids.add(existing_id)
+            existing_emails.add(existing_email)
+        
+        # Rows that clash with a student already in the database are skipped
+        in_db = df['student_id'].isin(existing_ids).fillna(False) | df['email'].isin(existing_emails).fillna(False)
+        students_skipped = int(in_db.sum())
+        df = df[~in_db]
+        
+        # Validate the remaining rows column by column
+        report = ValidationReport()
+        df = validate_frame(df, 'students', report)
+        
+        # Duplicates inside the file: the first occurrence of a student_id or email wins
+        involved = df['student_id'].duplicated(keep=False) | df['email'].duplicated(keep=False)
+        keep = ~involved
+        seen_ids = set()
+        seen_emails = set()
+        for index, row_id, row_email in df.loc[involved, ['student_id', 'email']].itertuples():
+            if row_id in seen_ids or row_email in seen_emails:
+                continue
+            seen_ids.add(row_id)
+            seen_emails.add(row_email)
+            keep.at[index] = True
+        
+        students_skipped += int((~keep).sum())
+        df = df[keep]
+        
+        # Bulk insert the survivors in batches
+        records = df.astype(object).to_dict('records')
+        students_added, insert_errors = _bulk_insert(
+            Student, records, batch_size, progress,
+            rows_before=total_rows - len(records),
+            errors_before=report.error_count
+        )
+        
+        # Files with rejected rows or failed batches stay out of the ledger so that they can be re-sent
+        if not insert_errors and not report.error_count:
+            _record_applied_file(source, file_hash, 'students', total_rows)
+        
+        elapsed = time.perf_counter() - started_at
         
         return {
             "success": True,
             "students_added": students_added,
             "students_skipped": students_skipped,
-            "errors": errors
+            "errors": report.messages() + insert_errors,
+            "error_report": report.to_dict(),
+            "rows_processed": total_rows,
+            "rows_per_second": round(total_rows / elapsed, 2) if elapsed > 0 else total_rows
         }
     
     except Exception as e:
@@ -85,96 +540,195 @@ def process_student_csv(filepath):
         db.session.rollback()
         raise Exception(f"File processing error: {str(e)}")
 
-def process_attendance_csv(filepath):
-    """Process attendance CSV file and import data into the database."""
+def _student_key_map():
+    """Map external student_id strings to primary keys with a single query."""
+    return dict(db.session.query(Student.student_id, Student.id))
+
+def _resolve_students(df, student_map, report):
+    """Swap external student ids for primary keys, dropping rows for unknown students."""
+    student_pk = df['student_id'].map(student_map)
+    df = report.reject(df, student_pk.isna(), "student not found", column='student_id')
+    return df.assign(student_id=student_pk[df.index].astype(int))
+
+def _to_records(df):
+    """Convert a validated frame to insert mappings (datetime64 -> date, NaN -> None)."""
+    df = df.assign(**{
+        col: df[col].dt.date for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])
+    })
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+def _import_attendance_chunk(df, student_map, report):
+    """Import one chunk of attendance rows; the caller owns the commit."""
+    df = validate_frame(df, 'attendance', report)
+    df = _resolve_students(df, student_map, report)
+    records = _to_records(df)
+    
+    # Existing (student_id, subject, date) rows are skipped by the unique key
+    records_added = 0
+    if records:
+        # Core execution keeps the driver's rowcount (ORM bulk inserts do not report it)
+        result = db.session.connection().execute(insert_or_ignore(AttendanceRecord), records)
+        records_added = result.rowcount
+        if records_added:
+            student_ids = {record['student_id'] for record in records}
+            refresh_score_summaries(student_ids)
+            refresh_rollups(student_ids, [AttendanceRecord])
+            bump_data_versions(student_ids)
+    
+    return records_added, len(records) - records_added
+
+def process_attendance_csv(source, chunksize=DEFAULT_CHUNK_SIZE, file_hash=None, progress=None, file_format=None, force=False):
+    """Process attendance CSV file in fixed-size chunks, committing and checkpointing each one.
+    
+    source is a path or a binary file object; CSV and JSON streams are parsed as they arrive.
+    Re-uploading a file whose import was interrupted resumes after the last committed chunk;
+    a non-seekable stream is only checkpointed when its file_hash is supplied up front.
+    Files and chunks already in the import ledger are skipped without validation or inserts
+    unless force is set.
+    progress(rows_processed, error_count) is called after every committed chunk.
+    """
     try:
-        # Detect file format based on extension
-        file_ext = os.path.splitext(filepath)[1].lower()
-        
-        if file_ext == '.csv':
-            df = pd.read_csv(filepath)
-        elif file_ext == '.xlsx':
-            df = pd.read_excel(filepath)
-        elif file_ext == '.json':
-            with open(filepath, 'r') as file:
-                data = json.load(file)
-            df = pd.DataFrame(data)
-        else:
-            raise ValueError(f"Unsupported file format: {file_ext}")
+        file_hash = _upload_fingerprint(source, file_hash)
+        applied = None if force else _ledger_entry(file_hash, 'file', 'attendance')
+        if applied is not None:
+            return _already_applied_result(applied, records_added=0, records_skipped=0)
         
-        # Standardize column names (lowercase, remove spaces)
-        df.columns = [col.lower().replace(' ', '_') for col in df.columns]
+        if file_hash is None:
+            # Without a hash there is nothing to resume from; track progress in a detached checkpoint
+            checkpoint = ImportCheckpoint(rows_committed=0, chunks_committed=0)
+        else:
+            checkpoint = ImportCheckpoint.query.filter_by(file_hash=file_hash, import_type='attendance').first()
         
-        # Check for required columns
-        required_columns = ['student_id', 'subject', 'date', 'status']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        if checkpoint is None:
+            checkpoint = ImportCheckpoint(file_hash=file_hash, import_type='attendance')
+            db.session.add(checkpoint)
+        elif checkpoint.status == 'completed':
+            # A forced re-import is replayed from the start; existing rows are skipped
+            checkpoint.rows_committed = 0
+            checkpoint.byte_offset = None
+            checkpoint.chunks_committed = 0
+            checkpoint.status = 'in_progress'
+        db.session.commit()
         
-        if missing_columns:
-            raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+        resumed_from_row = checkpoint.rows_committed
+        student_map = _student_key_map()
         
         # Import data into database
         records_added = 0
         records_skipped = 0
-        errors = []
+        chunks_skipped = 0
+        report = ValidationReport()
+        columns_checked = False
         
-        for _, row in df.iterrows():
-            try:
-                # Find student by student_id
-                student = Student.query.filter_by(student_id=row['student_id']).first()
-                
-                if not student:
-                    errors.append(f"Student not found: {row['student_id']}")
-                    continue
-                
-                # Parse date
-                try:
-                    if isinstance(row['date'], str):
-                        attendance_date = datetime.strptime(row['date'], '%Y-%m-%d').date()
-                    else:
-                        attendance_date = row['date']
-                except ValueError:
-                    errors.append(f"Invalid date format for student {row['student_id']}: {row['date']}")
-                    continue
-                
-                # Validate status
-                status = row['status'].lower()
-                if status not in ['present', 'absent', 'excused']:
-                    errors.append(f"Invalid status for student {row['student_id']}: {status}")
-                    continue
-                
-                # Check if record already exists
-                existing_record = AttendanceRecord.query.filter_by(
-                    student_id=student.id,
-                    subject=row['subject'],
-                    date=attendance_date
-                ).first()
-                
-                if existing_record:
-                    records_skipped += 1
-                    continue
-                
-                # Create new attendance record
-                new_record = AttendanceRecord(
-                    student_id=student.id,
-                    subject=row['subject'],
-                    date=attendance_date,
-                    status=status
-                )
-                
-                db.session.add(new_record)
-                records_added += 1
-                
-            except Exception as e:
-                errors.append(f"Error processing attendance for student {row['student_id']}: {str(e)}")
-        
-        # Commit changes
+        chunks = _iter_file_chunks(
+            source,
+            chunksize,
+            skip_rows=checkpoint.rows_committed,
+            start_offset=checkpoint.byte_offset,
+            file_format=file_format,
+            columns=IMPORT_COLUMNS['attendance'][0]
+        )
+        
+        for df, rows_read, byte_offset in chunks:
+            if not columns_checked:
+                _check_required_columns(df, IMPORT_COLUMNS['attendance'][0])
+                columns_checked = True
+            
+            # A chunk with exactly the same content was imported before (e.g. by an earlier nightly file)
+            fingerprint = _chunk_fingerprint(df)
+            if not force and _ledger_entry(fingerprint, 'chunk', 'attendance') is not None:
+                records_skipped += len(df)
+                chunks_skipped += 1
+            else:
+                errors_before = report.error_count
+                added, skipped = _import_attendance_chunk(df, student_map, report)
+                records_added += added
+                records_skipped += skipped
+                # Chunks with rejected rows stay out of the ledger so that corrected data can be re-sent
+                if report.error_count == errors_before:
+                    _record_fingerprint(fingerprint, 'chunk', 'attendance', len(df))
+            
+            # The checkpoint and fingerprint are committed in the same transaction as the chunk's rows
+            checkpoint.rows_committed = rows_read
+            checkpoint.byte_offset = byte_offset
+            checkpoint.chunks_committed += 1
+            db.session.commit()
+            if records_added:
+                invalidate_percentile_index()
+            
+            if progress:
+                progress(rows_read, report.error_count)
+        
+        checkpoint.status = 'completed'
         db.session.commit()
         
+        # Only a file seen whole by this run, without rejected rows, goes into the ledger; the clean
+        # chunks of a resumed or partly rejected file are already there
+        if not resumed_from_row and not report.error_count:
+            _record_applied_file(source, file_hash, 'attendance', checkpoint.rows_committed)
+        
         return {
             "success": True,
             "records_added": records_added,
             "records_skipped": records_skipped,
-            "errors": errors
+            "errors": report.messages(),
+            "error_report": report.to_dict(),
+            "rows_processed": checkpoint.rows_committed - resumed_from_row,
+            "resumed_from_row": resumed_from_row,
+            "chunks_committed": checkpoint.chunks_committed,
+            "chunks_skipped": chunks_skipped
+        }
+    
+    except Exception as e:
+        # Rollback the chunk in flight; earlier chunks stay committed
+        db.session.rollback()
+        raise Exception(f"File processing error: {str(e)}")
+
+def _import_student_records(source, file_format, import_type, model, batch_size, progress, file_hash=None, force=False):
+    """Shared pipeline for per-student record files: validate columns, resolve students, bulk insert.
+    
+    These imports insert every row, so a file already in the import ledger is refused unless force is set.
+    """
+    try:
+        started_at = time.perf_counter()
+        
+        file_hash = _upload_fingerprint(source, file_hash)
+        applied = None if force else _ledger_entry(file_hash, 'file', import_type)
+        if applied is not None:
+            return _already_applied_result(applied, records_added=0)
+        
+        required_columns, optional_columns = IMPORT_COLUMNS[import_type]
+        df = _read_dataframe(source, file_format, required_columns + optional_columns)
+        _check_required_columns(df, required_columns)
+        total_rows = len(df)
+        
+        # Validate whole columns before touching the database
+        report = ValidationReport()
+        df = validate_frame(df, import_type, report)
+        
+        # Resolve external student ids through a single key map
+        df = _resolve_students(df, _student_key_map(), report)
+        
+        records = _to_records(df)
+        records_added, insert_errors = _bulk_insert(
+            model, records, batch_size, progress,
+            rows_before=total_rows - len(records),
+            errors_before=report.error_count
+        )
+        
+        # Files with rejected rows or failed batches stay out of the ledger so that they can be re-sent
+        if not insert_errors and not report.error_count:
+            _record_applied_file(source, file_hash, import_type, total_rows)
+        
+        elapsed = time.perf_counter() - started_at
+        
+        return {
+            "success": True,
+            "records_added": records_added,
+            "errors": report.messages() + insert_errors,
+            "error_report": report.to_dict(),
+            "rows_processed": total_rows,
+            "rows_per_second": round(total_rows / elapsed, 2) if elapsed > 0 else total_rows
         }
     
     except Exception as e:
@@ -182,8 +736,321 @@ def process_attendance_csv(filepath):
         db.session.rollback()
         raise Exception(f"File processing error: {str(e)}")
 
-def export_student_data(student_id, export_format='json'):
-    """Export student data to the specified format."""
+def validate_upload(source, import_type, chunksize=DEFAULT_CHUNK_SIZE, file_format=None):
+    """Dry run: validate a file chunk by chunk and return the error report without touching the database."""
+    try:
+        started_at = time.perf_counter()
+        report = ValidationReport()
+        columns_checked = False
+        
+        required_columns, optional_columns = IMPORT_COLUMNS[import_type]
+        chunks = _iter_file_chunks(source, chunksize, file_format=file_format, columns=required_columns + optional_columns)
+        
+        for df, _, _ in chunks:
+            if not columns_checked:
+                _check_required_columns(df, required_columns)
+                columns_checked = True
+            validate_frame(df, import_type, report)
+        
+        elapsed = time.perf_counter() - started_at
+        
+        return {
+            "success": report.error_count == 0,
+            "dry_run": True,
+            "errors": report.messages(),
+            "error_report": report.to_dict(),
+            "rows_processed": report.rows_checked,
+            "rows_per_second": round(report.rows_checked / elapsed, 2) if elapsed > 0 else report.rows_checked
+        }
+    
+    except Exception as e:
+        raise Exception(f"File validation error: {str(e)}")
+
+def process_exam_csv(source, batch_size=DEFAULT_BATCH_SIZE, progress=None, file_format=None, file_hash=None, force=False):
+    """Process exam results file and bulk import it into the database."""
+    return _import_student_records(
+        source,
+        file_format,
+        'exams',
+        ExamResult,
+        batch_size,
+        progress,
+        file_hash,
+        force
+    )
+
+def process_performance_metric_csv(source, batch_size=DEFAULT_BATCH_SIZE, progress=None, file_format=None, file_hash=None, force=False):
+    """Process performance metrics file and bulk import it into the database."""
+    return _import_student_records(
+        source,
+        file_format,
+        'performance',
+        PerformanceMetric,
+        batch_size,
+        progress,
+        file_hash,
+        force
+    )
+
+def process_certification_csv(source, batch_size=DEFAULT_BATCH_SIZE, progress=None, file_format=None, file_hash=None, force=False):
+    """Process certifications file and bulk import it into the database."""
+    return _import_student_records(
+        source,
+        file_format,
+        'certifications',
+        Certification,
+        batch_size,
+        progress,
+        file_hash,
+        force
+    )
+
+def process_project_csv(source, batch_size=DEFAULT_BATCH_SIZE, progress=None, file_format=None, file_hash=None, force=False):
+    """Process projects file and bulk import it into the database."""
+    return _import_student_records(
+        source,
+        file_format,
+        'projects',
+        Project,
+        batch_size,
+        progress,
+        file_hash,
+        force
+    )
+
+# Tables written by columnar exports, as (file name, model)
+EXPORT_TABLES = [
+    ('students', Student),
+    ('performance_metrics', PerformanceMetric),
+    ('attendance', AttendanceRecord),
+    ('exams', ExamResult),
+    ('certifications', Certification),
+    ('projects', Project)
+]
+
+def _arrow_type(column):
+    """Map a SQLAlchemy column to the Arrow type it is exported as."""
+    column_type = column.type
+    if isinstance(column_type, db.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, db.Integer):
+        return pa.int64()
+    if isinstance(column_type, db.Float):
+        return pa.float64()
+    if isinstance(column_type, db.DateTime):
+        return pa.timestamp('us')
+    if isinstance(column_type, db.Date):
+        return pa.date32()
+    return pa.string()
+
+def _export_table(model, student_ids):
+    """Load the rows of one table for the given students into a typed Arrow table."""
+    columns = list(model.__table__.columns)
+    key = model.id if model is Student else model.student_id
+    
+    rows = []
+    for block in iter_id_blocks(student_ids):
+        rows.extend(db.session.execute(select(*columns).where(key.in_(block)).order_by(key, model.id)))
+    
+    schema = pa.schema([(column.name, _arrow_type(column)) for column in columns])
+    values = list(zip(*rows)) if rows else [[] for _ in columns]
+    return pa.Table.from_arrays(
+        [pa.array(column_values, type=field.type) for column_values, field in zip(values, schema)],
+        schema=schema
+    )
+
+def _export_columnar(student_ids, export_format, path):
+    """Write one Parquet or Arrow IPC file per table into a zip archive at path."""
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, model in EXPORT_TABLES:
+            table = _export_table(model, student_ids)
+            sink = pa.BufferOutputStream()
+            if export_format == 'parquet':
+                pq.write_table(table, sink, compression='zstd')
+            else:
+                with pa.ipc.new_file(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression='zstd')) as writer:
+                    writer.write_table(table)
+            archive.writestr(f"{name}.{export_format}", sink.getvalue().to_pybytes())
+
+def _export_xlsx(student_ids, path):
+    """Write a cohort workbook with one sheet per record type, each row keyed by the student's student_id.
+    
+    Rows are appended block by block in openpyxl's write-only mode, so memory does not grow with
+    the number of students. Record sheets use the upload column names and can be re-imported.
+    """
+    workbook = Workbook(write_only=True)
+    
+    student_columns = [column.name for column in Student.__table__.columns]
+    students_sheet = workbook.create_sheet('Students')
+    students_sheet.append(student_columns)
+    
+    sheets = {}
+    for name, title in XLSX_SHEETS.items():
+        columns = [column.name for column in RECORD_MODELS[name].__table__.columns if column.name != 'student_id']
+        sheet = workbook.create_sheet(title)
+        sheet.append(['student_id'] + columns)
+        sheets[name] = (sheet, columns)
+    
+    for students, records in load_student_blocks(student_ids):
+        for student in students:
+            students_sheet.append([getattr(student, column) for column in student_columns])
+            for name, (sheet, columns) in sheets.items():
+                for record in records[name].get(student.id, []):
+                    sheet.append([student.student_id] + [getattr(record, column) for column in columns])
+        
+        # Drop the block's objects from the session before loading the next one
+        db.session.expunge_all()
+    
+    workbook.save(path)
+
+def _student_export_data(student, records):
+    """Build the nested export dict for one student from a block loaded by load_student_blocks."""
+    student_data = {"student": student.to_dict()}
+    for name, grouped in records.items():
+        student_data[name] = [record.to_dict() for record in grouped.get(student.id, [])]
+    return student_data
+
+def iter_student_export(student_ids, export_format='ndjson'):
+    """Yield an export of the given students piece by piece, as NDJSON lines or as a JSON array.
+    
+    Students are loaded, serialized and released one block at a time, so the response starts
+    straight away and memory use does not grow with the number of students.
+    """
+    if export_format not in STREAM_EXPORT_FORMATS:
+        raise ValueError(f"Unsupported streaming export format: {export_format}")
+    
+    if export_format == 'json':
+        yield '['
+    
+    first = True
+    for students, records in load_student_blocks(student_ids, EXPORT_STREAM_BLOCK_SIZE):
+        parts = []
+        for student in students:
+            data = json.dumps(_student_export_data(student, records), default=str)
+            if export_format == 'ndjson':
+                parts.append(data + '\n')
+            else:
+                parts.append(data if first else ',\n' + data)
+            first = False
+        
+        # Drop the block's objects from the session before loading the next one
+        db.session.expunge_all()
+        
+        if parts:
+            yield ''.join(parts)
+    
+    if export_format == 'json':
+        yield ']\n'
+
+def _flatten_student_data(student_data):
+    """Flatten one student's nested export into CSV rows, one per attendance, exam, certification and project record."""
+    student = student_data["student"]
+    base_data = {
+        "student_id": student["student_id"],
+        "first_name": student["first_name"],
+        "last_name": student["last_name"],
+        "email": student["email"],
+        "department": student["department"],
+        "year_of_study": student["year_of_study"],
+        "semester": student["semester"]
+    }
+    flattened_data = []
+    
+    # Add attendance data
+    for attendance in student_data["attendance"]:
+        row = base_data.copy()
+        row.update({
+            "record_type": "attendance",
+            "subject": attendance["subject"],
+            "date": attendance["date"],
+            "status": attendance["status"]
+        })
+        flattened_data.append(row)
+    
+    # Add exam data
+    for exam in student_data["exams"]:
+        row = base_data.copy()
+        row.update({
+            "record_type": "exam",
+            "subject": exam["subject"],
+            "exam_type": exam["exam_type"],
+            "score": exam["score"],
+            "max_score": exam["max_score"],
+            "date": exam["date"]
+        })
+        flattened_data.append(row)
+    
+    # Add certification data
+    for cert in student_data["certifications"]:
+        row = base_data.copy()
+        row.update({
+            "record_type": "certification",
+            "name": cert["name"],
+            "issuing_organization": cert["issuing_organization"],
+            "issue_date": cert["issue_date"],
+            "expiry_date": cert["expiry_date"],
+            "credential_id": cert["credential_id"]
+        })
+        flattened_data.append(row)
+    
+    # Add project data
+    for project in student_data["projects"]:
+        row = base_data.copy()
+        row.update({
+            "record_type": "project",
+            "title": project["title"],
+            "subject": project["subject"],
+            "start_date": project["start_date"],
+            "end_date": project["end_date"],
+            "grade": project["grade"],
+            "max_grade": project["max_grade"]
+        })
+        flattened_data.append(row)
+    
+    return flattened_data
+
+def _iter_export_text(student_ids, export_format, single_student=False):
+    """Yield a JSON or CSV export file piece by piece, one block of students at a time.
+    
+    JSON is indented as json.dump(..., indent=2) writes it: a list of students, or the one
+    student's object when single_student. CSV rows are written under the fixed EXPORT_CSV_COLUMNS header.
+    """
+    if export_format == 'csv':
+        yield ','.join(EXPORT_CSV_COLUMNS) + '\n'
+    
+    first = True
+    for students, records in load_student_blocks(student_ids, EXPORT_STREAM_BLOCK_SIZE):
+        parts = []
+        for student in students:
+            student_data = _student_export_data(student, records)
+            if export_format == 'csv':
+                rows = _flatten_student_data(student_data)
+                if rows:
+                    parts.append(pd.DataFrame(rows, columns=EXPORT_CSV_COLUMNS).to_csv(index=False, header=False))
+            elif single_student:
+                parts.append(json.dumps(student_data, indent=2, default=str))
+            else:
+                # An element of an indented list is the element indented one level further
+                data = json.dumps(student_data, indent=2, default=str).replace('\n', '\n  ')
+                parts.append(('[\n  ' if first else ',\n  ') + data)
+            first = False
+        
+        # Drop the block's objects from the session before loading the next one
+        db.session.expunge_all()
+        
+        if parts:
+            yield ''.join(parts)
+    
+    if export_format == 'json' and not single_student:
+        yield '[]' if first else '\n]'
+
+def export_student_data(student_id, export_format='json', directory=None, compression=None):
+    """Export student data to the specified format.
+    
+    The export is written to a new file in directory (default: the system temp folder), whose path is returned.
+    JSON and CSV are written one block of students at a time, compressed on the way with
+    compression (gzip or zstd) when it is given.
+    """
     try:
         # Handle single student or multiple students
         single_student = not isinstance(student_id, list)
@@ -193,156 +1060,36 @@ def export_student_data(student_id, export_format='json'):
         else:
             student_ids = student_id
         
-        # Get student data
-        students_data = []
-        for id in student_ids:
-            student = Student.query.get(id)
-            if not student:
-                if single_student:
-                    raise ValueError(f"Student not found: {id}")
-                else:
-                    continue
-            
-            # Get all performance data for the student
-            performance = PerformanceMetric.query.filter_by(student_id=id).all()
-            attendance = AttendanceRecord.query.filter_by(student_id=id).all()
-            exams = ExamResult.query.filter_by(student_id=id).all()
-            certifications = Certification.query.filter_by(student_id=id).all()
-            projects = Project.query.filter_by(student_id=id).all()
-            
-            student_data = {
-                "student": student.to_dict(),
-                "performance_metrics": [p.to_dict() for p in performance],
-                "attendance": [a.to_dict() for a in attendance],
-                "exams": [e.to_dict() for e in exams],
-                "certifications": [c.to_dict() for c in certifications],
-                "projects": [p.to_dict() for p in projects]
-            }
-            
-            students_data.append(student_data)
+        if single_student and Student.query.get(student_id) is None:
+            raise ValueError(f"Student not found: {student_id}")
         
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False)
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
         
-        if export_format == 'json':
-            # Export as JSON
-            if single_student:
-                data_to_export = students_data[0]
-            else:
-                data_to_export = students_data
-            
-            with open(temp_file.name, 'w') as file:
-                json.dump(data_to_export, file, indent=2, default=str)
+        if compression and export_format not in ('json', 'csv'):
+            raise ValueError(f"Compression is not supported for {export_format} exports")
         
-        elif export_format == 'csv':
-            # Export as CSV
-            # For CSV, we need to flatten nested structures
-            flattened_data = []
-            
-            for student_data in students_data:
-                student = student_data["student"]
-                base_data = {
-                    "student_id": student["student_id"],
-                    "first_name": student["first_name"],
-                    "last_name": student["last_name"],
-                    "email": student["email"],
-                    "department": student["department"],
-                    "year_of_study": student["year_of_study"],
-                    "semester": student["semester"]
-                }
-                
-                # Add attendance data
-                for attendance in student_data["attendance"]:
-                    row = base_data.copy()
-                    row.update({
-                        "record_type": "attendance",
-                        "subject": attendance["subject"],
-                        "date": attendance["date"],
-                        "status": attendance["status"]
-                    })
-                    flattened_data.append(row)
-                
-                # Add exam data
-                for exam in student_data["exams"]:
-                    row = base_data.copy()
-                    row.update({
-                        "record_type": "exam",
-                        "subject": exam["subject"],
-                        "exam_type": exam["exam_type"],
-                        "score": exam["score"],
-                        "max_score": exam["max_score"],
-                        "date": exam["date"]
-                    })
-                    flattened_data.append(row)
-                
-                # Add certification data
-                for cert in student_data["certifications"]:
-                    row = base_data.copy()
-                    row.update({
-                        "record_type": "certification",
-                        "name": cert["name"],
-                        "issuing_organization": cert["issuing_organization"],
-                        "issue_date": cert["issue_date"],
-                        "expiry_date": cert["expiry_date"],
-                        "credential_id": cert["credential_id"]
-                    })
-                    flattened_data.append(row)
-                
-                # Add project data
-                for project in student_data["projects"]:
-                    row = base_data.copy()
-                    row.update({
-                        "record_type": "project",
-                        "title": project["title"],
-                        "subject": project["subject"],
-                        "start_date": project["start_date"],
-                        "end_date": project["end_date"],
-                        "grade": project["grade"],
-                        "max_grade": project["max_grade"]
-                    })
-                    flattened_data.append(row)
-            
-            # Create DataFrame and export to CSV
-            df = pd.DataFrame(flattened_data)
-            df.to_csv(temp_file.name, index=False)
-        
-        elif export_format == 'xlsx':
-            # Export as Excel
-            with pd.ExcelWriter(temp_file.name, engine='openpyxl') as writer:
-                for i, student_data in enumerate(students_data):
-                    student = student_data["student"]
-                    
-                    # Create student sheet
-                    student_df = pd.DataFrame([student])
-                    sheet_name = f"Student_{i+1}" if len(students_data) > 1 else "Student"
-                    student_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # Create attendance sheet
-                    if student_data["attendance"]:
-                        attendance_df = pd.DataFrame(student_data["attendance"])
-                        sheet_name = f"Attendance_{i+1}" if len(students_data) > 1 else "Attendance"
-                        attendance_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # Create exams sheet
-                    if student_data["exams"]:
-                        exams_df = pd.DataFrame(student_data["exams"])
-                        sheet_name = f"Exams_{i+1}" if len(students_data) > 1 else "Exams"
-                        exams_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # Create certifications sheet
-                    if student_data["certifications"]:
-                        cert_df = pd.DataFrame(student_data["certifications"])
-                        sheet_name = f"Certifications_{i+1}" if len(students_data) > 1 else "Certifications"
-                        cert_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # Create projects sheet
-                    if student_data["projects"]:
-                        projects_df = pd.DataFrame(student_data["projects"])
-                        sheet_name = f"Projects_{i+1}" if len(students_data) > 1 else "Projects"
-                        projects_df.to_excel(writer, sheet_name=sheet_name, index=False)
+        temp_file = tempfile.NamedTemporaryFile(
+            dir=directory,
+            prefix=EXPORT_TEMP_PREFIX,
+            suffix=f".{EXPORT_FORMATS[export_format][1]}",
+            delete=False
+        )
+        temp_file.close()
         
+        if export_format == 'xlsx':
+            # One sheet per record type, streamed in blocks of students
+            _export_xlsx(student_ids, temp_file.name)
+        elif export_format in COLUMNAR_FORMATS:
+            # Whole tables are queried and written column by column
+            _export_columnar(student_ids, export_format, temp_file.name)
         else:
-            raise ValueError(f"Unsupported export format: {export_format}")
+            chunks = (chunk.encode('utf-8') for chunk in _iter_export_text(student_ids, export_format, single_student))
+            if compression:
+                chunks = compress_chunks(chunks, compression)
+            with open(temp_file.name, 'wb') as file:
+                for chunk in chunks:
+                    file.write(chunk)
         
         return temp_file.name
     
@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import inspect
+from models.database import db
+from models.import_job import ImportJob
+from services.file_processor import (
+    process_student_csv, process_attendance_csv, process_exam_csv, process_performance_metric_csv,
+    process_certification_csv, process_project_csv
+)
+
+# Upper bound on imports running at the same time in this process
+MAX_IMPORT_WORKERS = 2
+
+# Uploads are kept here until their job finishes
+JOB_FOLDER = os.path.join(tempfile.gettempdir(), 'student_analytics_imports')
+
+IMPORTERS = {
+    'students': process_student_csv,
+    'attendance': process_attendance_csv,
+    'exams': process_exam_csv,
+    'performance': process_performance_metric_csv,
+    'certifications': process_certification_csv,
+    'projects': process_project_csv
+}
+
+# Importers that can safely be re-run after a restart: students skip existing keys,
+# attendance resumes from its checkpoint. The others would insert committed batches twice.
+RESUMABLE_IMPORT_TYPES = {'students', 'attendance'}
+
+_executor = ThreadPoolExecutor(max_workers=MAX_IMPORT_WORKERS, thread_name_prefix='import-job')
+
+# Interrupted jobs are picked up once per process
+_resumed = False
+_resume_lock = threading.Lock()
+
+class ImportCancelled(Exception):
+    """Raised from the progress callback to stop a job that was asked to cancel."""
+
+def new_job_filepath(filename):
+    """Return a unique path in JOB_FOLDER for storing an upload."""
+    os.makedirs(JOB_FOLDER, exist_ok=True)
+    return os.path.join(JOB_FOLDER, f"{uuid.uuid4().hex}_{filename}")
+
+def submit_import_job(app, import_type, filepath, filename, options=None):
+    """Record a queued job for an upload that is already on disk and hand it to the worker pool."""
+    if import_type not in IMPORTERS:
+        raise ValueError(f"Invalid file type: {import_type}")
+    
+    job = ImportJob(
+        id=uuid.uuid4().hex,
+        import_type=import_type,
+        filename=filename,
+        filepath=filepath,
+        options=json.dumps(options or {}),
+        status='queued'
+    )
+    db.session.add(job)
+    db.session.commit()
+    
+    _executor.submit(_run_job, app, job.id)
+    
+    return job
+
+def cancel_import_job(job):
+    """Ask a job to stop; queued jobs are cancelled immediately, running ones at their next batch."""
+    if job.status in ('completed', 'failed', 'cancelled'):
+        return job
+    
+    # Cancel a queued job only if no worker has claimed it since it was read
+    cancelled = ImportJob.query.filter_by(id=job.id, status='queued').update(
+        {"status": 'cancelled', "cancel_requested": True, "finished_at": datetime.utcnow()}, synchronize_session=False
+    )
+    if not cancelled:
+        ImportJob.query.filter_by(id=job.id).update({"cancel_requested": True}, synchronize_session=False)
+    db.session.commit()
+    db.session.refresh(job)
+    
+    # A cancelled queued job never reaches _run_job, so its upload is removed here like a finished job's
+    if cancelled and os.path.exists(job.filepath):
+        os.remove(job.filepath)
+    
+    return job
+
+def resume_import_jobs(app):
+    """Re-queue jobs left queued or running by a previous process; later calls in the same process do nothing."""
+    global _resumed
+    with _resume_lock:
+        if _resumed:
+            return
+        _resumed = True
+    
+    with app.app_context():
+        if not inspect(db.engine).has_table(ImportJob.__tablename__):
+            return
+        
+        jobs = ImportJob.query.filter(ImportJob.status.in_(['queued', 'running'])).all()
+        for job in jobs:
+            if not os.path.exists(job.filepath):
+                _finish_job(job, 'failed', error="Upload file is no longer available after restart")
+            elif job.status == 'running' and job.import_type not in RESUMABLE_IMPORT_TYPES:
+                _finish_job(job, 'failed', error=(
+                    f"Interrupted by a restart after {job.rows_processed} rows; "
+                    "re-upload the rows that were not imported"
+                ))
+            else:
+                job.status = 'queued'
+                db.session.commit()
+                _executor.submit(_run_job, app, job.id)
+
+def _finish_job(job, status, result=None, error=None):
+    job.status = status
+    job.finished_at = datetime.utcnow()
+    if result is not None:
+        job.result = json.dumps(result, default=str)
+        job.error_count = result.get('error_report', {}).get('invalid_rows', len(result.get('errors', [])))
+        job.rows_processed = result.get('rows_processed', job.rows_processed)
+        job.rows_per_second = result.get('rows_per_second', job.rows_per_second)
+    if error is not None:
+        job.error = error
+    db.session.commit()
+    
+    if os.path.exists(job.filepath):
+        os.remove(job.filepath)
+
+def _run_job(app, job_id):
+    with app.app_context():
+        # Claim the job atomically, so a job re-queued by several processes still runs once
+        claimed = ImportJob.query.filter_by(id=job_id, status='queued').update(
+            {"status": 'running', "started_at": datetime.utcnow()}, synchronize_session=False
+        )
+        db.session.commit()
+        if not claimed:
+            return
+        job = ImportJob.query.get(job_id)
+        started_at = time.perf_counter()
+        
+        def progress(rows_processed, error_count):
+            cancel_requested = db.session.query(ImportJob.cancel_requested).filter_by(id=job_id).scalar()
+            if cancel_requested:
+                raise ImportCancelled()
+            
+            elapsed = time.perf_counter() - started_at
+            job.rows_processed = rows_processed
+            job.error_count = error_count
+            job.rows_per_second = round(rows_processed / elapsed, 2) if elapsed > 0 else None
+            db.session.commit()
+        
+        try:
+            options = json.loads(job.options) if job.options else {}
+            result = IMPORTERS[job.import_type](job.filepath, progress=progress, **options)
+            _finish_job(job, 'completed', result=result)
+        except Exception as e:
+            db.session.rollback()
+            db.session.refresh(job)
+            if job.cancel_requested:
+                _finish_job(job, 'cancelled')
+            else:
+                _finish_job(job, 'failed', error=str(e))
+        finally:
+            db.session.remove()
@@ -0,0 +1,99 @@
+import threading
+from bisect import bisect_left, insort
+from models.database import db
+from models.student import Student
+from models.score_summary import StudentScoreSummary
+from services.analytics import calculate_overall_from_summary, calculate_percentile
+
+# Cohorts a student can be ranked against
+PERCENTILE_COHORTS = ('institution', 'department', 'year')
+
+# The index lives in this process: built from every student's score summary on first use,
+# then kept current by the write paths calling update_student_score/remove_student_score.
+# Bulk imports call invalidate_percentile_index and the next lookup rebuilds it.
+_lock = threading.RLock()
+_students = None  # student primary key -> (overall score, cohort keys)
+_distributions = {}  # cohort key -> sorted overall scores
+
+def _cohort_keys(student):
+    return (('institution', None), ('department', student.department), ('year', student.year_of_study))
+
+def _summary_scores(student_ids=None):
+    """Yield (student, overall score) from the score summaries, for all students or the given ones."""
+    query = db.session.query(Student, StudentScoreSummary).outerjoin(
+        StudentScoreSummary, StudentScoreSummary.student_id == Student.id
+    )
+    if student_ids is not None:
+        query = query.filter(Student.id.in_(student_ids))
+    
+    for student, summary in query:
+        yield student, calculate_overall_from_summary(summary)["overall_score"]
+
+def _ensure_built():
+    global _students
+    if _students is not None:
+        return
+    
+    students = {}
+    distributions = {}
+    for student, score in _summary_scores():
+        keys = _cohort_keys(student)
+        students[student.id] = (score, keys)
+        for key in keys:
+            distributions.setdefault(key, []).append(score)
+    
+    for scores in distributions.values():
+        scores.sort()
+    
+    _distributions.clear()
+    _distributions.update(distributions)
+    _students = students
+
+def _remove(student_id):
+    entry = _students.pop(student_id, None)
+    if entry is None:
+        return
+    
+    score, keys = entry
+    for key in keys:
+        scores = _distributions[key]
+        del scores[bisect_left(scores, score)]
+
+def student_percentile(student, score, cohort='institution'):
+    """Percentile rank of score within the student's cohort, found by binary search in O(log n)."""
+    with _lock:
+        _ensure_built()
+        key = _cohort_keys(student)[PERCENTILE_COHORTS.index(cohort)]
+        scores = _distributions.get(key, [])
+        
+        return {
+            "percentile": calculate_percentile(score, scores),
+            "percentile_cohort": cohort,
+            "cohort_size": len(scores)
+        }
+
+def update_student_score(student_id):
+    """Re-score one student after their data changed and move them within their cohorts."""
+    with _lock:
+        if _students is None:
+            return
+        
+        _remove(student_id)
+        for student, score in _summary_scores([student_id]):
+            keys = _cohort_keys(student)
+            _students[student.id] = (score, keys)
+            for key in keys:
+                insort(_distributions.setdefault(key, []), score)
+
+def remove_student_score(student_id):
+    """Drop a deleted student from the index."""
+    with _lock:
+        if _students is not None:
+            _remove(student_id)
+
+def invalidate_percentile_index():
+    """Discard the index after changes too large to apply one student at a time."""
+    global _students
+    with _lock:
+        _students = None
+        _distributions.clear()
@@ -1,13 +1,54 @@
-import numpy as np
 from datetime import datetime, timedelta
+from sqlalchemy import func, case, and_, or_, select
+from models.database import db
+from models.performance_metric import AttendanceRecord, ExamResult
+from models.certifications import Certification, Project
+from services.data_loader import load_records
+from services.date_window import window_conditions
+from services.rollups import monthly_attendance as monthly_attendance_counts, exam_count, first_and_last_exam
 
-def predict_future_performance(student, performance_metrics, attendance_records, exam_results, certifications, projects):
-    """Predict the future performance of a student based on historical data."""
+# Days before the as-of date whose records make up the current score of each component
+CURRENT_PERIOD_DAYS = {"attendance": 90, "exams": 180, "projects": 365}
+
+def record_counts(student_id, window=None):
+    """Numbers of a student's attendance records, exam results, certifications and projects within window, in one query."""
+    counts = [
+        select(func.count(model.id)).where(model.student_id == student_id, *window_conditions(model, window)).scalar_subquery()
+        for model in (AttendanceRecord, ExamResult, Certification, Project)
+    ]
+    return tuple(db.session.execute(select(*counts)).one())
+
+def student_projects(student_id, window=None):
+    """A student's projects within window; the project trend needs their grades and dates."""
+    return load_records(Project, [student_id], window).get(student_id, [])
+
+def predict_future_performance(student, window=None):
+    """Predict the future performance of a student based on historical data.
+    
+    Only the student's records within window (a DateWindow, or None for all of them) are used.
+    Attendance and exams are read as aggregates; only the projects are loaded as rows.
+    """
+    num_attendance, num_exams, num_certifications, num_projects = record_counts(student.id, window)
     
     # Extract data for trend analysis
-    attendance_trend = analyze_attendance_trend(attendance_records)
-    exam_trend = analyze_exam_trend(exam_results)
-    project_trend = analyze_project_trend(projects)
+    attendance_trend = analyze_attendance_trend(student.id, window)
+    exam_trend = analyze_exam_trend(student.id, window)
+    project_trend = analyze_project_trend(student_projects(student.id, window))
+    
+    # Calculate current performance metrics
+    current_attendance = calculate_current_attendance(student.id, window)
+    current_exam_score = calculate_current_exam_score(student.id, window)
+    current_project_score = calculate_current_project_score(student.id, window)
+    
+    return combine_prediction(
+        attendance_trend, exam_trend, project_trend,
+        current_attendance, current_exam_score, current_project_score,
+        num_certifications, num_attendance, num_exams, num_projects
+    )
+
+def combine_prediction(attendance_trend, exam_trend, project_trend, current_attendance, current_exam_score,
+                       current_project_score, num_certifications, num_attendance, num_exams, num_projects):
+    """Turn a student's trends, current scores and record counts into the prediction response."""
     
     # Calculate trend indicators
     trends = {
@@ -16,11 +57,6 @@ def predict_future_performance(student, performance_metrics, attendance_records,
         "projects": project_trend["trend"]
     }
     
-    # Calculate current performance metrics
-    current_attendance = calculate_current_attendance(attendance_records)
-    current_exam_score = calculate_current_exam_score(exam_results)
-    current_project_score = calculate_current_project_score(projects)
-    
     # Predict future metrics based on trends
     future_attendance = predict_metric(current_attendance, trends["attendance"])
     future_exam_score = predict_metric(current_exam_score, trends["exams"])
@@ -35,7 +71,7 @@ def predict_future_performance(student, performance_metrics, attendance_records,
         "other_metrics": 0.15
     }
     
-    certification_score = min(len(certifications) * 20, 100)
+    certification_score = min(num_certifications * 20, 100)
     other_metrics_score = 70  # Default value as prediction
     
     predicted_overall = (
@@ -68,54 +104,21 @@ def predict_future_performance(student, performance_metrics, attendance_records,
         },
         "outlook": outlook,
         "prediction_confidence": calculate_prediction_confidence(
-            len(attendance_records), 
-            len(exam_results), 
-            len(projects)
+            num_attendance, 
+            num_exams, 
+            num_projects
         )
     }
 
-def analyze_attendance_trend(attendance_records):
-    """Analyze the trend in attendance over time."""
-    if not attendance_records or len(attendance_records) < 2:
-        return {"trend": 0, "description": "Insufficient data"}
-    
-    # Sort records by date
-    sorted_records = sorted(attendance_records, key=lambda x: x.date)
-    
-    # Group by month
-    monthly_attendance = {}
-    for record in sorted_records:
-        month_key = f"{record.date.year}-{record.date.month}"
-        if month_key not in monthly_attendance:
-            monthly_attendance[month_key] = {"total": 0, "present": 0}
-        
-        monthly_attendance[month_key]["total"] += 1
-        if record.status == 'present':
-            monthly_attendance[month_key]["present"] += 1
-    
-    # Calculate monthly percentages
-    monthly_percentages = []
-    for month, data in monthly_attendance.items():
-        if data["total"] > 0:
-            percentage = (data["present"] / data["total"]) * 100
-            monthly_percentages.append(percentage)
-    
-    # Calculate trend
-    if len(monthly_percentages) < 2:
-        return {"trend": 0, "description": "Insufficient data"}
-    
-    # Simple linear trend
-    trend = monthly_percentages[-1] - monthly_percentages[0]
-    normalized_trend = trend / len(monthly_percentages)
-    
-    # Determine trend description
-    if normalized_trend > 2:
+def describe_trend(normalized_trend, data_points, strong_change):
+    """Trend entry of a prediction; a change per data point beyond strong_change counts as strong."""
+    if normalized_trend > strong_change:
         description = "Strongly improving"
     elif normalized_trend > 0:
         description = "Slightly improving"
     elif normalized_trend == 0:
         description = "Stable"
-    elif normalized_trend > -2:
+    elif normalized_trend > -strong_change:
         description = "Slightly declining"
     else:
         description = "Strongly declining"
@@ -123,45 +126,46 @@ def analyze_attendance_trend(attendance_records):
     return {
         "trend": normalized_trend,
         "description": description,
-        "data_points": len(monthly_percentages)
+        "data_points": data_points
     }
 
-def analyze_exam_trend(exam_results):
-    """Analyze the trend in exam performance over time."""
-    if not exam_results or len(exam_results) < 2:
-        return {"trend": 0, "description": "Insufficient data"}
-    
-    # Sort exams by date
-    sorted_exams = sorted(exam_results, key=lambda x: x.date)
+def analyze_attendance_trend(student_id, window=None):
+    """Analyze the trend in attendance over time from monthly attendance counts."""
+    monthly_attendance = monthly_attendance_counts(student_id, window)
     
-    # Calculate normalized scores
-    normalized_scores = [(exam.score / exam.max_score) * 100 for exam in sorted_exams]
+    # Calculate monthly percentages
+    monthly_percentages = []
+    for month, total, present in monthly_attendance:
+        if total > 0:
+            percentage = (present / total) * 100
+            monthly_percentages.append(percentage)
     
     # Calculate trend
-    if len(normalized_scores) < 2:
+    if len(monthly_percentages) < 2:
         return {"trend": 0, "description": "Insufficient data"}
     
-    # Simple linear trend (can be replaced with more sophisticated models)
-    trend = normalized_scores[-1] - normalized_scores[0]
-    normalized_trend = trend / len(normalized_scores)
+    # Simple linear trend
+    trend = monthly_percentages[-1] - monthly_percentages[0]
+    normalized_trend = trend / len(monthly_percentages)
     
-    # Determine trend description
-    if normalized_trend > 5:
-        description = "Strongly improving"
-    elif normalized_trend > 0:
-        description = "Slightly improving"
-    elif normalized_trend == 0:
-        description = "Stable"
-    elif normalized_trend > -5:
-        description = "Slightly declining"
-    else:
-        description = "Strongly declining"
+    return describe_trend(normalized_trend, len(monthly_percentages), 2)
+
+def analyze_exam_trend(student_id, window=None):
+    """Analyze the trend in exam performance over time from the first and last exam."""
+    total_exams = exam_count(student_id, window)
+    if total_exams < 2:
+        return {"trend": 0, "description": "Insufficient data"}
     
-    return {
-        "trend": normalized_trend,
-        "description": description,
-        "data_points": len(normalized_scores)
-    }
+    # Normalized scores of the earliest and latest exams
+    first_exam, last_exam = first_and_last_exam(student_id, window)
+    first_score = (first_exam.score / first_exam.max_score) * 100
+    last_score = (last_exam.score / last_exam.max_score) * 100
+    
+    # Simple linear trend (can be replaced with more sophisticated models)
+    trend = last_score - first_score
+    normalized_trend = trend / total_exams
+    
+    return describe_trend(normalized_trend, total_exams, 5)
 
 def analyze_project_trend(projects):
     """Analyze the trend in project performance over time."""
@@ -184,86 +188,65 @@ def analyze_project_trend(projects):
     trend = normalized_scores[-1] - normalized_scores[0]
     normalized_trend = trend / len(normalized_scores)
     
-    # Determine trend description
-    if normalized_trend > 5:
-        description = "Strongly improving"
-    elif normalized_trend > 0:
-        description = "Slightly improving"
-    elif normalized_trend == 0:
-        description = "Stable"
-    elif normalized_trend > -5:
-        description = "Slightly declining"
-    else:
-        description = "Strongly declining"
-    
-    return {
-        "trend": normalized_trend,
-        "description": description,
-        "data_points": len(normalized_scores)
-    }
+    return describe_trend(normalized_trend, len(normalized_scores), 5)
 
-def calculate_current_attendance(attendance_records):
-    """Calculate current attendance score."""
-    if not attendance_records:
-        return 0
-    
-    # Get recent records (last 3 months)
-    current_date = datetime.now().date()
-    three_months_ago = current_date - timedelta(days=90)
-    
-    recent_records = [r for r in attendance_records if r.date >= three_months_ago]
-    
-    if not recent_records:
-        recent_records = attendance_records  # Use all records if no recent ones
+def current_window_start(window, days):
+    """Start of the "current" period: the last `days` before the end of window, or before today without one."""
+    as_of = window.end if window and window.end else datetime.now().date()
+    return as_of - timedelta(days=days)
+
+def _recent_aggregates(model, student_id, window, columns, recent_condition, conditions=()):
+    """Aggregate a student's recent records in SQL, falling back to the whole window when there are none.
+    
+    The first column must be a count; conditions apply to both the recent and the fallback query.
+    """
+    query = db.session.query(*columns).filter(
+        model.student_id == student_id,
+        *window_conditions(model, window),
+        *conditions
+    )
     
-    total_records = len(recent_records)
-    present_count = sum(1 for record in recent_records if record.status == 'present')
+    row = query.filter(recent_condition).one()
+    if not row[0]:
+        row = query.one()  # Use all records if no recent ones
+    return row
+
+def calculate_current_attendance(student_id, window=None):
+    """Calculate current attendance score from the last 3 months of attendance."""
+    three_months_ago = current_window_start(window, CURRENT_PERIOD_DAYS["attendance"])
+    total_records, present_count = _recent_aggregates(
+        AttendanceRecord, student_id, window,
+        [func.count(AttendanceRecord.id), func.sum(case((AttendanceRecord.status == 'present', 1), else_=0))],
+        AttendanceRecord.date >= three_months_ago
+    )
     
     return (present_count / total_records) * 100 if total_records > 0 else 0
 
-def calculate_current_exam_score(exam_results):
-    """Calculate current exam score based on recent exams."""
-    if not exam_results:
-        return 0
-    
-    # Get recent exams (last 6 months)
-    current_date = datetime.now().date()
-    six_months_ago = current_date - timedelta(days=180)
-    
-    recent_exams = [e for e in exam_results if e.date >= six_months_ago]
-    
-    if not recent_exams:
-        recent_exams = exam_results  # Use all exams if no recent ones
-    
-    normalized_scores = [(exam.score / exam.max_score) * 100 for exam in recent_exams]
+def calculate_current_exam_score(student_id, window=None):
+    """Calculate current exam score based on recent exams (last 6 months)."""
+    six_months_ago = current_window_start(window, CURRENT_PERIOD_DAYS["exams"])
+    exam_count, total_percentage = _recent_aggregates(
+        ExamResult, student_id, window,
+        [func.count(ExamResult.id), func.sum(ExamResult.score / ExamResult.max_score * 100)],
+        ExamResult.date >= six_months_ago
+    )
     
-    return sum(normalized_scores) / len(normalized_scores) if normalized_scores else 0
+    return total_percentage / exam_count if exam_count else 0
 
-def calculate_current_project_score(projects):
-    """Calculate current project score based on recent projects."""
-    if not projects:
-        return 0
-    
-    # Filter projects with grades
-    graded_projects = [p for p in projects if p.grade is not None and p.max_grade is not None]
-    
-    if not graded_projects:
-        return 0
-    
-    # Get recent projects (last year)
-    current_date = datetime.now().date()
-    one_year_ago = current_date - timedelta(days=365)
-    
-    recent_projects = [p for p in graded_projects 
-                      if (p.end_date and p.end_date >= one_year_ago) or 
-                         (not p.end_date and p.start_date >= one_year_ago)]
-    
-    if not recent_projects:
-        recent_projects = graded_projects  # Use all projects if no recent ones
-    
-    normalized_scores = [(project.grade / project.max_grade) * 100 for project in recent_projects]
+def calculate_current_project_score(student_id, window=None):
+    """Calculate current project score based on recent graded projects (last year)."""
+    one_year_ago = current_window_start(window, CURRENT_PERIOD_DAYS["projects"])
+    project_count, total_percentage = _recent_aggregates(
+        Project, student_id, window,
+        [func.count(Project.id), func.sum(Project.grade / Project.max_grade * 100)],
+        or_(
+            Project.end_date >= one_year_ago,
+            and_(Project.end_date.is_(None), Project.start_date >= one_year_ago)
+        ),
+        conditions=[Project.grade.isnot(None), Project.max_grade.isnot(None)]  # Only graded projects count
+    )
     
-    return sum(normalized_scores) / len(normalized_scores) if normalized_scores else 0
+    return total_percentage / project_count if project_count else 0
 
 def predict_metric(current_value, trend):
     """Predict future value based on current value and trend."""
@@ -309,13 +292,23 @@ def calculate_prediction_confidence(num_attendance, num_exams, num_projects):
         "level": level
     }
 
-def recommend_improvements(student, performance_metrics, attendance_records, exam_results, certifications, projects):
-    """Generate recommendations for student improvement."""
+def subject_exam_averages(student_id, window=None):
+    """Average normalized exam score per subject, computed in SQL; subjects in order of their first exam."""
+    normalized_score = ExamResult.score / ExamResult.max_score * 100
+    rows = db.session.query(ExamResult.subject, func.avg(normalized_score)).filter(
+        ExamResult.student_id == student_id,
+        *window_conditions(ExamResult, window)
+    ).group_by(ExamResult.subject).order_by(func.min(ExamResult.id)).all()
+    return dict(rows)
+
+def recommend_improvements(student, window=None):
+    """Generate recommendations for student improvement from their records within window (a DateWindow, or None)."""
     
     recommendations = []
+    _, _, num_certifications, num_projects = record_counts(student.id, window)
     
     # Analyze attendance
-    attendance_percentage = calculate_current_attendance(attendance_records)
+    attendance_percentage = calculate_current_attendance(student.id, window)
     if attendance_percentage < 85:
         recommendations.append({
             "area": "Attendance",
@@ -327,7 +320,7 @@ def recommend_improvements(student, performance_metrics, attendance_records, exa
         })
     
     # Analyze exam performance
-    exam_score = calculate_current_exam_score(exam_results)
+    exam_score = calculate_current_exam_score(student.id, window)
     if exam_score < 80:
         recommendations.append({
             "area": "Exam Performance",
@@ -339,19 +332,8 @@ def recommend_improvements(student, performance_metrics, attendance_records, exa
         })
     
     # Analyze subjects for improvement
-    if exam_results:
-        subject_scores = {}
-        for exam in exam_results:
-            if exam.subject not in subject_scores:
-                subject_scores[exam.subject] = []
-            
-            normalized_score = (exam.score / exam.max_score) * 100
-            subject_scores[exam.subject].append(normalized_score)
-        
-        # Calculate average score for each subject
-        avg_subject_scores = {subject: sum(scores) / len(scores) 
-                             for subject, scores in subject_scores.items()}
-        
+    avg_subject_scores = subject_exam_averages(student.id, window)
+    if avg_subject_scores:
         # Find lowest performing subjects
         low_subjects = [subject for subject, score in avg_subject_scores.items() 
                        if score < 75]
@@ -368,7 +350,7 @@ def recommend_improvements(student, performance_metrics, attendance_records, exa
             })
     
     # Analyze certifications
-    if len(certifications) < 2:
+    if num_certifications < 2:
         recommendations.append({
             "area": "Professional Development",
             "current_score": None,
@@ -379,7 +361,7 @@ def recommend_improvements(student, performance_metrics, attendance_records, exa
         })
     
     # Analyze project involvement
-    if len(projects) < 3:
+    if num_projects < 3:
         recommendations.append({
             "area": "Project Experience",
             "current_score": None,
@@ -390,7 +372,7 @@ def recommend_improvements(student, performance_metrics, attendance_records, exa
         })
     
     # Check project performance
-    project_score = calculate_current_project_score(projects)
+    project_score = calculate_current_project_score(student.id, window)
     if project_score < 80:
         recommendations.append({
             "area": "Project Quality",
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from flask import current_app, request
+from sqlalchemy import select, update
+from models.database import db, insert_or_ignore
+from models.data_version import StudentDataVersion
+from services.data_loader import iter_id_blocks
+
+# Total size of cached response bodies; the least recently used are evicted beyond it
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Responses that depend on other students (cohort percentiles) are only reused for this long
+COHORT_RESPONSE_TTL = 60
+
+# Predictions depend on today's date and are kept at most this long
+PREDICTION_RESPONSE_TTL = 60 * 60
+
+# Data version row bumped by every change to any student, for cohort-wide caches (student ids start at 1)
+ALL_STUDENTS_VERSION_ID = 0
+
+# Cached responses live in this process, keyed by endpoint, student, query string and the
+# student's data version. Every write path bumps the version in the same transaction as its
+# change, so stale entries are never looked up again and age out of the LRU.
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (body, expires_at or None)
+_size = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+def bump_data_versions(student_ids):
+    """Mark the students' data, and so all students' data, as changed; the caller commits it together with the change."""
+    connection = db.session.connection()
+    for block in iter_id_blocks(sorted(set(student_ids) | {ALL_STUDENTS_VERSION_ID})):
+        connection.execute(insert_or_ignore(StudentDataVersion), [{"student_id": id, "version": 0} for id in block])
+        connection.execute(
+            update(StudentDataVersion)
+            .where(StudentDataVersion.student_id.in_(block))
+            .values(version=StudentDataVersion.version + 1)
+        )
+
+def student_data_version(student_id):
+    """Current data version of a student (0 before their first change)."""
+    version = db.session.execute(
+        select(StudentDataVersion.version).where(StudentDataVersion.student_id == student_id)
+    ).scalar()
+    return version or 0
+
+def _remove(key):
+    global _size
+    body, _ = _entries.pop(key)
+    _size -= len(body)
+
+def cache_get(key):
+    """Return the cached body for key, or None when it is missing or expired."""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            _remove(key)
+            _stats["expirations"] += 1
+            entry = None
+        
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return entry[0]
+
+def cache_put(key, body, ttl=None):
+    """Cache body under key, evicting least recently used entries beyond RESPONSE_CACHE_MAX_BYTES."""
+    global _size
+    if len(body) > RESPONSE_CACHE_MAX_BYTES:
+        return
+    
+    with _lock:
+        if key in _entries:
+            _remove(key)
+        _entries[key] = (body, time.monotonic() + ttl if ttl is not None else None)
+        _size += len(body)
+        
+        while _size > RESPONSE_CACHE_MAX_BYTES:
+            _remove(next(iter(_entries)))
+            _stats["evictions"] += 1
+
+def cache_stats():
+    """Hit/miss counters and size of this process's response cache."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(
+            _stats,
+            hit_rate=round(_stats["hits"] / lookups * 100, 2) if lookups else None,
+            entries=len(_entries),
+            bytes=_size,
+            max_bytes=RESPONSE_CACHE_MAX_BYTES
+        )
+
+def cached_student_response(ttl=None, date_dependent=False):
+    """Cache the JSON body of a per-student GET view (taking student_id) while the student's data is unchanged.
+    
+    Only 200 responses are cached. ttl bounds the age of entries that depend on more than the
+    student's own data; date_dependent views are also keyed by today's date.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(student_id):
+            key = json.dumps([
+                request.endpoint,
+                student_id,
+                student_data_version(student_id),
+                sorted(request.args.items(multi=True)),
+                date.today().isoformat() if date_dependent else None
+            ])
+            
+            body = cache_get(key)
+            if body is not None:
+                response = current_app.response_class(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response, 200
+            
+            response, status = view(student_id)
+            if status == 200:
+                cache_put(key, response.get_data(), ttl)
+            response.headers['X-Cache'] = 'MISS'
+            return response, status
+        return wrapper
+    return decorator
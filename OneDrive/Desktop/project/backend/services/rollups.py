@@ -0,0 +1,138 @@
+from sqlalchemy import func, case, select, insert, update, delete
+from models.database import db, insert_or_ignore, month_start
+from models.performance_metric import AttendanceRecord, ExamResult
+from models.rollups import MonthlyAttendanceRollup, MonthlyExamRollup
+from services.data_loader import iter_id_blocks
+from services.date_window import window_conditions
+
+# Record table -> monthly rollup table maintained from it
+ROLLUP_MODELS = {
+    AttendanceRecord: MonthlyAttendanceRollup,
+    ExamResult: MonthlyExamRollup
+}
+
+ATTENDANCE_STATUSES = ['present', 'absent', 'excused']
+
+def _rollup_delta(record):
+    if isinstance(record, AttendanceRecord):
+        delta = {"total": 1}
+        if record.status in ATTENDANCE_STATUSES:
+            delta[record.status] = 1
+        return delta
+    return {"exam_count": 1, "score_sum": record.score / record.max_score * 100}
+
+def add_to_rollups(record):
+    """Add a new attendance record or exam result to its monthly rollup; the caller commits it with the record."""
+    rollup = ROLLUP_MODELS[type(record)]
+    key = {"student_id": record.student_id, "subject": record.subject, "month": record.date.replace(day=1)}
+    
+    # Make sure the month's row exists, then increment it in place
+    connection = db.session.connection()
+    connection.execute(insert_or_ignore(rollup), [key])
+    connection.execute(
+        update(rollup)
+        .where(*[getattr(rollup, column) == value for column, value in key.items()])
+        .values(**{column: getattr(rollup, column) + value for column, value in _rollup_delta(record).items()})
+    )
+
+def _rollup_select(model, student_ids=None):
+    """SELECT computing the monthly rollup rows of model, for some students or all of them."""
+    month = month_start(model.date)
+    
+    if model is AttendanceRecord:
+        columns = [func.count(AttendanceRecord.id)] + [
+            func.sum(case((AttendanceRecord.status == status, 1), else_=0)) for status in ATTENDANCE_STATUSES
+        ]
+        names = ['total'] + ATTENDANCE_STATUSES
+    else:
+        columns = [func.count(ExamResult.id), func.sum(ExamResult.score / ExamResult.max_score * 100)]
+        names = ['exam_count', 'score_sum']
+    
+    query = select(model.student_id, model.subject, month, *columns)
+    if student_ids is not None:
+        query = query.where(model.student_id.in_(student_ids))
+    query = query.group_by(model.student_id, model.subject, month)
+    
+    return ['student_id', 'subject', 'month'] + names, query
+
+def refresh_rollups(student_ids, models=tuple(ROLLUP_MODELS)):
+    """Recompute the rollups of the given students from their records; the caller owns the commit."""
+    for model in models:
+        rollup = ROLLUP_MODELS[model]
+        for block in iter_id_blocks(sorted(set(student_ids))):
+            names, query = _rollup_select(model, block)
+            db.session.execute(delete(rollup).where(rollup.student_id.in_(block)))
+            db.session.execute(insert(rollup).from_select(names, query))
+
+def rebuild_rollups():
+    """Recompute every monthly rollup with one INSERT ... SELECT per table. Returns the rollup row counts."""
+    counts = {}
+    for model, rollup in ROLLUP_MODELS.items():
+        names, query = _rollup_select(model)
+        db.session.execute(delete(rollup))
+        db.session.execute(insert(rollup).from_select(names, query))
+        counts[rollup.__tablename__] = db.session.query(func.count()).select_from(rollup).scalar()
+    
+    db.session.commit()
+    return counts
+
+def delete_student_rollups(student_id):
+    """Remove a deleted student's rollup rows; the caller owns the commit."""
+    for rollup in ROLLUP_MODELS.values():
+        db.session.execute(delete(rollup).where(rollup.student_id == student_id))
+
+def monthly_attendance(student_id, window=None):
+    """Chronological (month, total, present) attendance counts of a student over all subjects.
+    
+    Without a window the rollups are read; a window is applied to the records in SQL and
+    grouped by month there, since rollups cannot split partial months.
+    """
+    if window is None:
+        query = db.session.query(
+            MonthlyAttendanceRollup.month,
+            func.sum(MonthlyAttendanceRollup.total),
+            func.sum(MonthlyAttendanceRollup.present)
+        ).filter(MonthlyAttendanceRollup.student_id == student_id).group_by(MonthlyAttendanceRollup.month)
+        return query.order_by(MonthlyAttendanceRollup.month).all()
+    
+    month = month_start(AttendanceRecord.date)
+    query = db.session.query(
+        month,
+        func.count(AttendanceRecord.id),
+        func.sum(case((AttendanceRecord.status == 'present', 1), else_=0))
+    ).filter(AttendanceRecord.student_id == student_id, *window_conditions(AttendanceRecord, window)).group_by(month)
+    return query.order_by(month).all()
+
+def exam_count(student_id, window=None):
+    """Number of exams of a student, from the rollups unless a window is given."""
+    if window is None:
+        count = db.session.query(func.sum(MonthlyExamRollup.exam_count)).filter(
+            MonthlyExamRollup.student_id == student_id
+        ).scalar()
+        return int(count or 0)
+    
+    return db.session.query(func.count(ExamResult.id)).filter(
+        ExamResult.student_id == student_id,
+        *window_conditions(ExamResult, window)
+    ).scalar()
+
+def first_and_last_exam(student_id, window=None):
+    """The student's earliest and latest exam results (ties broken by insertion order), via two LIMIT 1 queries."""
+    query = ExamResult.query.filter(ExamResult.student_id == student_id, *window_conditions(ExamResult, window))
+    first = query.order_by(ExamResult.date, ExamResult.id).first()
+    last = query.order_by(ExamResult.date.desc(), ExamResult.id.desc()).first()
+    return first, last
+
+def rollup_student_metrics():
+    """Per-student attendance % and average exam % as subqueries over the rollups, keyed by student_id."""
+    attendance = db.session.query(
+        MonthlyAttendanceRollup.student_id,
+        (func.sum(MonthlyAttendanceRollup.present) * 100.0 / func.sum(MonthlyAttendanceRollup.total)).label('attendance_percentage')
+    ).group_by(MonthlyAttendanceRollup.student_id).subquery()
+    
+    exams = db.session.query(
+        MonthlyExamRollup.student_id,
+        (func.sum(MonthlyExamRollup.score_sum) / func.sum(MonthlyExamRollup.exam_count)).label('avg_exam_score')
+    ).group_by(MonthlyExamRollup.student_id).subquery()
+    
+    return attendance, exams
@@ -0,0 +1,137 @@
+from datetime import datetime
+from sqlalchemy import func, case, select, insert, update, delete
+from models.database import db, insert_or_ignore
+from models.student import Student
+from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult
+from models.certifications import Certification, Project
+from models.score_summary import StudentScoreSummary
+from services.data_loader import iter_id_blocks
+from services.analytics import OTHER_METRIC_TYPES
+
+# Record tables whose rows feed the summaries
+SUMMARY_MODELS = (AttendanceRecord, ExamResult, Project, Certification, PerformanceMetric)
+
+SUMMARY_COUNTERS = [
+    'attendance_present', 'attendance_total', 'exam_count', 'exam_percentage_sum',
+    'project_graded_count', 'project_percentage_sum', 'certification_count',
+    'other_metric_count', 'other_metric_percentage_sum'
+]
+
+def record_summary_delta(record):
+    """Counter increments contributed by one new attendance, exam, project, certification or metric record."""
+    if isinstance(record, AttendanceRecord):
+        return {"attendance_total": 1, "attendance_present": 1 if record.status == 'present' else 0}
+    if isinstance(record, ExamResult):
+        return {"exam_count": 1, "exam_percentage_sum": record.score / record.max_score * 100}
+    if isinstance(record, Project):
+        if record.grade is None or record.max_grade is None:
+            return {}
+        return {"project_graded_count": 1, "project_percentage_sum": record.grade / record.max_grade * 100}
+    if isinstance(record, Certification):
+        return {"certification_count": 1}
+    if isinstance(record, PerformanceMetric):
+        if record.metric_type not in OTHER_METRIC_TYPES:
+            return {}
+        return {"other_metric_count": 1, "other_metric_percentage_sum": record.score / record.max_score * 100}
+    raise ValueError(f"No score summary counters for {type(record).__name__}")
+
+def add_to_summary(record):
+    """Add a new record to its student's summary; the caller commits it together with the record."""
+    delta = record_summary_delta(record)
+    if not delta:
+        return
+    
+    # Make sure the row exists, then increment it in place so concurrent writers do not lose updates
+    connection = db.session.connection()
+    connection.execute(insert_or_ignore(StudentScoreSummary), [{"student_id": record.student_id}])
+    connection.execute(
+        update(StudentScoreSummary)
+        .where(StudentScoreSummary.student_id == record.student_id)
+        .values(
+            updated_at=datetime.utcnow(),
+            **{column: getattr(StudentScoreSummary, column) + value for column, value in delta.items()}
+        )
+    )
+
+def _grouped_counters(block):
+    """Compute the summary counters of a block of students with one query per table.
+    
+    Attendance and certifications are counted with GROUP BY. Percentage sums are added up here
+    from the rows in primary key order, as the per-record scores and the endpoints' increments
+    add them; a SQL SUM may add in another order and differ in the last bits.
+    """
+    counters = {id: dict.fromkeys(SUMMARY_COUNTERS, 0) for id in block}
+    
+    counts = [
+        (
+            ['attendance_total', 'attendance_present'],
+            select(
+                AttendanceRecord.student_id,
+                func.count(AttendanceRecord.id),
+                func.sum(case((AttendanceRecord.status == 'present', 1), else_=0))
+            ).where(AttendanceRecord.student_id.in_(block)).group_by(AttendanceRecord.student_id)
+        ),
+        (
+            ['certification_count'],
+            select(
+                Certification.student_id,
+                func.count(Certification.id)
+            ).where(Certification.student_id.in_(block)).group_by(Certification.student_id)
+        )
+    ]
+    for columns, query in counts:
+        for student_id, *values in db.session.execute(query):
+            counters[student_id].update(zip(columns, values))
+    
+    percentages = [
+        (
+            'exam_count', 'exam_percentage_sum',
+            select(ExamResult.student_id, ExamResult.score, ExamResult.max_score).where(
+                ExamResult.student_id.in_(block)
+            ).order_by(ExamResult.student_id, ExamResult.id)
+        ),
+        (
+            'project_graded_count', 'project_percentage_sum',
+            select(Project.student_id, Project.grade, Project.max_grade).where(
+                Project.student_id.in_(block),
+                Project.grade.isnot(None),
+                Project.max_grade.isnot(None)
+            ).order_by(Project.student_id, Project.id)
+        ),
+        (
+            'other_metric_count', 'other_metric_percentage_sum',
+            select(PerformanceMetric.student_id, PerformanceMetric.score, PerformanceMetric.max_score).where(
+                PerformanceMetric.student_id.in_(block),
+                PerformanceMetric.metric_type.in_(OTHER_METRIC_TYPES)
+            ).order_by(PerformanceMetric.student_id, PerformanceMetric.id)
+        )
+    ]
+    for count_column, sum_column, query in percentages:
+        for student_id, score, max_score in db.session.execute(query):
+            student_counters = counters[student_id]
+            student_counters[count_column] += 1
+            student_counters[sum_column] += (score / max_score) * 100
+    
+    return counters
+
+def refresh_score_summaries(student_ids):
+    """Recompute the summaries of the given students from their records; the caller owns the commit."""
+    now = datetime.utcnow()
+    for block in iter_id_blocks(sorted(set(student_ids))):
+        counters = _grouped_counters(block)
+        rows = [dict(values, student_id=id, updated_at=now) for id, values in counters.items()]
+        
+        db.session.execute(delete(StudentScoreSummary).where(StudentScoreSummary.student_id.in_(block)))
+        db.session.execute(insert(StudentScoreSummary), rows)
+
+def rebuild_score_summaries():
+    """Recompute every student's summary (backfills and repairs), committing per block. Returns the student count."""
+    db.session.execute(delete(StudentScoreSummary))
+    db.session.commit()
+    
+    student_ids = [id for (id,) in db.session.query(Student.id).order_by(Student.id)]
+    for block in iter_id_blocks(student_ids):
+        refresh_score_summaries(block)
+        db.session.commit()
+    
+    return len(student_ids)
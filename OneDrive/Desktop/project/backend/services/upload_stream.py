@@ -0,0 +1,107 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from flask import Request
+
+# Uploads are kept in memory up to this size, then spill to a uniquely named file
+UPLOAD_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+UPLOAD_FOLDER = tempfile.gettempdir()
+
+class SpooledUpload:
+    """Write-once upload buffer that hashes data as it arrives.
+    
+    Data stays in memory until UPLOAD_SPOOL_MAX_SIZE, then moves to a NamedTemporaryFile,
+    so concurrent uploads never share a path and small uploads never hit the disk.
+    """
+    
+    def __init__(self, max_size=UPLOAD_SPOOL_MAX_SIZE, folder=UPLOAD_FOLDER):
+        self.max_size = max_size
+        self.folder = folder
+        self.path = None
+        self._file = io.BytesIO()
+        self._sha256 = hashlib.sha256()
+    
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+    
+    def write(self, data):
+        self._sha256.update(data)
+        if self.path is None and self._file.tell() + len(data) > self.max_size:
+            self._spill()
+        return self._file.write(data)
+    
+    def _spill(self):
+        spill_file = tempfile.NamedTemporaryFile(dir=self.folder, prefix='upload-', delete=False)
+        spill_file.write(self._file.getvalue())
+        self._file = spill_file
+        self.path = spill_file.name
+    
+    def persist(self, destination):
+        """Move the upload to destination, renaming the spill file instead of copying it when possible."""
+        if self.path is not None:
+            self._file.close()
+            shutil.move(self.path, destination)
+            self.path = None
+            self._file = open(destination, 'rb')
+        else:
+            with open(destination, 'wb') as file:
+                file.write(self._file.getvalue())
+    
+    def close(self):
+        self._file.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def __getattr__(self, name):
+        # read, seek, tell, readable, seekable, ... come from the current buffer
+        return getattr(self._file, name)
+    
+    def __iter__(self):
+        return iter(self._file)
+
+class HashingReader:
+    """Read-only wrapper around a non-seekable stream that hashes everything read through it."""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._sha256 = hashlib.sha256()
+    
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+    
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        self._sha256.update(data)
+        return data
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return False
+    
+    def __iter__(self):
+        return iter(lambda: self.read(io.DEFAULT_BUFFER_SIZE), b'')
+
+def spool_stream(stream):
+    """Copy a non-seekable stream into a SpooledUpload (used for formats that need random access)."""
+    upload = SpooledUpload()
+    for block in iter(lambda: stream.read(io.DEFAULT_BUFFER_SIZE), b''):
+        upload.write(block)
+    upload.seek(0)
+    return upload
+
+class UploadRequest(Request):
+    """Request class whose multipart file parts are written straight into a SpooledUpload.
+    
+    The upload is hashed while it is received and parsed from the buffer it was received
+    into, instead of being saved to a second file and read back.
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledUpload()
@@ -0,0 +1,210 @@
+import math
+import pandas as pd
+from models.performance_metric import METRIC_TYPES
+
+# Row numbers (and offending values) kept per error reason in a report
+MAX_ERROR_SAMPLES = 10
+
+ATTENDANCE_STATUSES = ['present', 'absent', 'excused']
+
+# Required and optional columns per upload type
+IMPORT_COLUMNS = {
+    'students': (['student_id', 'first_name', 'last_name', 'email', 'department', 'year_of_study', 'semester'], []),
+    'attendance': (['student_id', 'subject', 'date', 'status'], []),
+    'exams': (['student_id', 'subject', 'exam_type', 'score', 'max_score', 'date'], []),
+    'performance': (['student_id', 'metric_type', 'score', 'date_recorded'], ['subject', 'max_score', 'details']),
+    'certifications': (['student_id', 'name', 'issuing_organization', 'issue_date'], ['expiry_date', 'credential_id', 'credential_url']),
+    'projects': (['student_id', 'title', 'start_date'], ['description', 'end_date', 'grade', 'max_grade', 'subject'])
+}
+
+class ValidationReport:
+    """Compact error report: a count plus a few sample rows for every distinct reason.
+    
+    DataFrames passed to reject() are expected to be indexed by 0-based data row position;
+    reported row numbers are 1-based.
+    """
+    
+    def __init__(self, max_samples=MAX_ERROR_SAMPLES):
+        self.max_samples = max_samples
+        self.rows_checked = 0
+        self.invalid_rows = 0
+        self._reasons = {}
+    
+    @property
+    def error_count(self):
+        return self.invalid_rows
+    
+    def reject(self, df, mask, reason, column=None):
+        """Drop the rows selected by mask and record them under reason."""
+        mask = mask.fillna(False).astype(bool)
+        count = int(mask.sum())
+        if not count:
+            return df
+        
+        entry = self._reasons.setdefault(reason, {"count": 0, "rows": [], "values": []})
+        entry["count"] += count
+        self.invalid_rows += count
+        
+        room = self.max_samples - len(entry["rows"])
+        if room > 0:
+            sample = df.loc[mask].head(room)
+            entry["rows"].extend(int(index) + 1 for index in sample.index)
+            if column is not None:
+                entry["values"].extend(
+                    str(value.date()) if isinstance(value, pd.Timestamp) else str(value)
+                    for value in sample[column]
+                )
+        
+        return df[~mask]
+    
+    def messages(self):
+        """One line per reason, e.g. "invalid date: 3 rows (rows 4, 9, 12)"."""
+        lines = []
+        for reason, entry in self._reasons.items():
+            rows = ', '.join(str(row) for row in entry["rows"])
+            more = ', ...' if entry["count"] > len(entry["rows"]) else ''
+            lines.append(f"{reason}: {entry['count']} row(s) (rows {rows}{more})")
+        return lines
+    
+    def to_dict(self):
+        return {
+            "rows_checked": self.rows_checked,
+            "valid_rows": self.rows_checked - self.invalid_rows,
+            "invalid_rows": self.invalid_rows,
+            "errors": [
+                {
+                    "reason": reason,
+                    "count": entry["count"],
+                    "rows": entry["rows"],
+                    "sample_values": entry["values"]
+                }
+                for reason, entry in self._reasons.items()
+            ]
+        }
+
+def as_key_strings(series):
+    """Convert an identifier column to stripped strings, keeping nulls as <NA>."""
+    # Integer ids read next to blanks come back as floats (1001.0)
+    if pd.api.types.is_float_dtype(series):
+        non_null = series.dropna()
+        if (non_null % 1 == 0).all():
+            series = series.astype('Int64')
+    
+    return series.astype('string').str.strip()
+
+def parse_dates(series):
+    """Parse a whole date column (YYYY-MM-DD strings or spreadsheet dates); invalid entries become NaT."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series, format='%Y-%m-%d', errors='coerce')
+
+def reject_missing(df, columns, report):
+    """Drop rows with a blank value in any of the given columns."""
+    for col in columns:
+        df = report.reject(df, df[col].isna(), f"missing {col}")
+    return df
+
+def coerce_numbers(df, columns, report):
+    """Convert numeric columns, dropping rows whose non-blank value is not a number."""
+    for col in columns:
+        numbers = pd.to_numeric(df[col], errors='coerce')
+        df = report.reject(df, numbers.isna() & df[col].notna(), f"invalid {col}", column=col)
+        df = df.assign(**{col: numbers[df.index]})
+    return df
+
+def coerce_dates(df, columns, report):
+    """Parse date columns, dropping rows whose non-blank value is not a valid date."""
+    for col in columns:
+        dates = parse_dates(df[col])
+        df = report.reject(df, dates.isna() & df[col].notna(), f"invalid {col} (use YYYY-MM-DD)", column=col)
+        df = df.assign(**{col: dates[df.index]})
+    return df
+
+def parse_score(score, max_score):
+    """Convert a score and max_score sent to the API to floats, like the imports coerce them.
+    
+    Raises ValueError when either is not a number or max_score is not positive.
+    """
+    values = []
+    for name, value in (('score', score), ('max_score', max_score)):
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid {name}: must be a number")
+        if not math.isfinite(number):
+            raise ValueError(f"invalid {name}: must be a number")
+        values.append(number)
+    if values[1] <= 0:
+        raise ValueError("max_score must be positive")
+    return tuple(values)
+
+def validate_students(df, report):
+    df = df.assign(**{col: as_key_strings(df[col]) for col in ['first_name', 'last_name', 'email', 'department']})
+    df = coerce_numbers(df, ['year_of_study', 'semester'], report)
+    return df.assign(
+        year_of_study=df['year_of_study'].astype(int),
+        semester=df['semester'].astype(int)
+    )
+
+def validate_attendance(df, report):
+    df = coerce_dates(df, ['date'], report)
+    status = df['status'].astype(str).str.strip().str.lower()
+    df = report.reject(df, ~status.isin(ATTENDANCE_STATUSES), f"status must be one of {', '.join(ATTENDANCE_STATUSES)}", column='status')
+    return df.assign(status=status[df.index])
+
+def validate_exams(df, report):
+    df = coerce_numbers(df, ['score', 'max_score'], report)
+    df = report.reject(df, df['max_score'] <= 0, "max_score must be positive", column='max_score')
+    df = report.reject(df, (df['score'] < 0) | (df['score'] > df['max_score']), "score must be between 0 and max_score", column='score')
+    return coerce_dates(df, ['date'], report)
+
+def validate_performance_metrics(df, report):
+    df = df.assign(
+        metric_type=df['metric_type'].astype(str).str.strip().str.lower(),
+        max_score=df['max_score'].fillna(100.0)
+    )
+    df = report.reject(df, ~df['metric_type'].isin(METRIC_TYPES), f"metric_type must be one of {', '.join(METRIC_TYPES)}", column='metric_type')
+    df = coerce_numbers(df, ['score', 'max_score'], report)
+    df = report.reject(df, df['max_score'] <= 0, "max_score must be positive", column='max_score')
+    df = report.reject(df, (df['score'] < 0) | (df['score'] > df['max_score']), "score must be between 0 and max_score", column='score')
+    return coerce_dates(df, ['date_recorded'], report)
+
+def validate_certifications(df, report):
+    df = coerce_dates(df, ['issue_date', 'expiry_date'], report)
+    expired_before_issue = df['expiry_date'].notna() & (df['expiry_date'] < df['issue_date'])
+    return report.reject(df, expired_before_issue, "expiry_date is before issue_date", column='expiry_date')
+
+def validate_projects(df, report):
+    df = df.assign(max_grade=df['max_grade'].fillna(100.0))
+    df = coerce_numbers(df, ['grade', 'max_grade'], report)
+    df = report.reject(df, df['max_grade'] <= 0, "max_grade must be positive", column='max_grade')
+    out_of_range = df['grade'].notna() & ((df['grade'] < 0) | (df['grade'] > df['max_grade']))
+    df = report.reject(df, out_of_range, "grade must be between 0 and max_grade", column='grade')
+    df = coerce_dates(df, ['start_date', 'end_date'], report)
+    ends_before_start = df['end_date'].notna() & (df['end_date'] < df['start_date'])
+    return report.reject(df, ends_before_start, "end_date is before start_date", column='end_date')
+
+VALIDATORS = {
+    'students': validate_students,
+    'attendance': validate_attendance,
+    'exams': validate_exams,
+    'performance': validate_performance_metrics,
+    'certifications': validate_certifications,
+    'projects': validate_projects
+}
+
+def validate_frame(df, import_type, report):
+    """Run the column checks for import_type over one DataFrame, returning the valid rows.
+    
+    Columns come back typed: numbers as floats/ints, dates as datetime64, student_id as strings.
+    """
+    required_columns, optional_columns = IMPORT_COLUMNS[import_type]
+    df = df.reindex(columns=required_columns + optional_columns)
+    report.rows_checked += len(df)
+    
+    df['student_id'] = as_key_strings(df['student_id'])
+    df = reject_missing(df, required_columns, report)
+    
+    return VALIDATORS[import_type](df, report)
@@ -0,0 +1,108 @@
+import random
+from datetime import date, timedelta
+import pytest
+from flask import Flask
+from models.database import db, init_db
+from models.student import Student
+from models.performance_metric import PerformanceMetric, AttendanceRecord, ExamResult, METRIC_TYPES
+from models.certifications import Certification, Project
+from routes.student_routes import student_bp
+from routes.performance_routes import performance_bp
+from routes.analytics_routes import analytics_bp
+from routes.prediction_routes import prediction_bp
+from routes.file_routes import file_bp
+from services.rollups import rebuild_rollups
+from services.score_summary import rebuild_score_summaries
+from services.upload_stream import UploadRequest
+
+@pytest.fixture
+def app(tmp_path):
+    """The application as app.py builds it, on an empty SQLite database of its own."""
+    app = Flask(__name__)
+    app.request_class = UploadRequest
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'student_analytics.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['TESTING'] = True
+    init_db(app)
+    
+    app.register_blueprint(student_bp, url_prefix='/api/students')
+    app.register_blueprint(performance_bp, url_prefix='/api/performance')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(prediction_bp, url_prefix='/api/prediction')
+    app.register_blueprint(file_bp, url_prefix='/api/files')
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def seed_school(student_count=60, seed=36):
+    """Insert students with randomized records in every table and build their summaries and rollups.
+    
+    Record counts, scores, grades and dates vary per student, and some students have no records
+    at all, so that fast paths are compared with their reference functions on awkward values.
+    Returns the students' primary keys.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    
+    def some_day(days_back=720):
+        return today - timedelta(days=rng.randint(0, days_back))
+    
+    db.session.execute(Student.__table__.insert(), [
+        {
+            "student_id": f"S{index:04d}", "first_name": 'First', "last_name": f"Last{index}",
+            "email": f"s{index}@example.com", "department": rng.choice(['CS', 'EE', 'ME']),
+            "year_of_study": rng.randint(1, 4), "semester": rng.randint(1, 2)
+        }
+        for index in range(student_count)
+    ])
+    ids = list(db.session.execute(db.select(Student.id).order_by(Student.id)).scalars())
+    
+    attendance, exams, projects, certifications, metrics = [], [], [], [], []
+    for id in ids:
+        if rng.random() < 0.1:
+            continue
+        for day in rng.sample(range(720), rng.randint(1, 30)):
+            attendance.append({
+                "student_id": id, "subject": rng.choice(['Math', 'Physics']), "date": today - timedelta(days=day),
+                "status": rng.choice(['present', 'present', 'absent', 'excused'])
+            })
+        for _ in range(rng.randint(0, 8)):
+            max_score = rng.choice([30.0, 73.0, 100.0])
+            exams.append({
+                "student_id": id, "subject": rng.choice(['Math', 'Physics']), "exam_type": rng.choice(['quiz', 'midterm', 'final']),
+                "score": round(rng.uniform(0, max_score), rng.choice([0, 1, 2])), "max_score": max_score, "date": some_day()
+            })
+        for _ in range(rng.randint(0, 4)):
+            start_date = some_day()
+            projects.append({
+                "student_id": id, "title": 'Project', "start_date": start_date,
+                "end_date": start_date + timedelta(days=rng.randint(1, 90)) if rng.random() < 0.7 else None,
+                "grade": rng.choice([None, rng.randint(0, 9), round(rng.uniform(0, 10), 1)]), "max_grade": rng.choice([None, 9.0, 10.0])
+            })
+        for _ in range(rng.randint(0, 3)):
+            certifications.append({"student_id": id, "name": 'Cert', "issuing_organization": 'Org', "issue_date": some_day()})
+        for _ in range(rng.randint(0, 5)):
+            metrics.append({
+                "student_id": id, "metric_type": rng.choice(METRIC_TYPES), "score": round(rng.uniform(0, 7), 2),
+                "max_score": rng.choice([7.0, 100.0]), "date_recorded": some_day()
+            })
+    
+    for model, rows in [(AttendanceRecord, attendance), (ExamResult, exams), (Project, projects), (Certification, certifications), (PerformanceMetric, metrics)]:
+        if rows:
+            db.session.execute(model.__table__.insert(), rows)
+    db.session.commit()
+    
+    rebuild_score_summaries()
+    rebuild_rollups()
+    
+    return ids
+
+@pytest.fixture
+def school(app):
+    return seed_school()
@@ -0,0 +1,58 @@
+import json
+from datetime import date, timedelta
+import pytest
+from models.database import db
+from models.student import Student
+from services.batch_prediction import iter_batch_predictions
+from services.date_window import DateWindow
+from services.prediction import predict_future_performance
+
+WINDOWS = [None, DateWindow(date.today() - timedelta(days=365), None), DateWindow(None, date.today() - timedelta(days=200))]
+
+def expected_predictions(student_ids, window):
+    return {id: predict_future_performance(db.session.get(Student, id), window) for id in student_ids}
+
+def cohort_ids(department=None, year=None):
+    query = db.select(Student.id).order_by(Student.id)
+    if department:
+        query = query.where(Student.department == department)
+    if year is not None:
+        query = query.where(Student.year_of_study == year)
+    return list(db.session.execute(query).scalars())
+
+@pytest.mark.parametrize('window', WINDOWS)
+@pytest.mark.parametrize('department, year', [(None, None), ('CS', None), (None, 2), ('EE', 3)])
+def test_batch_predictions_match_per_student_predictions(school, department, year, window):
+    expected = expected_predictions(cohort_ids(department, year), window)
+    
+    predicted = {
+        student['id']: prediction
+        for results in iter_batch_predictions(department=department, year=year, window=window)
+        for student, prediction in results
+    }
+    
+    # Equal values and equal types (int 0 for components without records), key by key
+    assert list(predicted) == list(expected)
+    for id, prediction in expected.items():
+        assert predicted[id] == prediction
+        assert repr(predicted[id]) == repr(prediction)
+
+def test_batch_predictions_for_explicit_ids_skip_unknown_ones(school):
+    ids = school[::7] + [max(school) + 1]
+    expected = expected_predictions(school[::7], None)
+    
+    predicted = {student['id']: prediction for results in iter_batch_predictions(student_ids=ids) for student, prediction in results}
+    
+    assert predicted == expected
+
+@pytest.mark.parametrize('query', ['', '?semester=2024-2', f"?from={date.today() - timedelta(days=300)}"])
+def test_batch_endpoint_streams_the_per_student_predictions(client, school, query):
+    response = client.post(f"/api/prediction/batch{query}", json={"department": 'ME'})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    
+    single = {id: client.get(f"/api/prediction/future-performance/{id}{query}").get_json() for id in cohort_ids('ME')}
+    
+    assert [line['student']['id'] for line in lines] == list(single)
+    for line in lines:
+        assert line['prediction'] == single[line['student']['id']]
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+import pytest
+from models.database import db
+from models.student import Student
+from services.analytics import (
+    score_students, combine_scores, calculate_attendance_score, calculate_exam_score, calculate_project_score,
+    calculate_certification_score, calculate_other_metrics_score
+)
+from services.cohort_scoring import COMPONENT_COLUMNS, json_value, leaderboard, score_cohort
+from services.data_loader import load_student_blocks
+from services.date_window import DateWindow
+
+WINDOWS = [None, DateWindow(date.today() - timedelta(days=365), None), DateWindow(None, date.today() - timedelta(days=200))]
+
+def cohort_ids(department=None, year=None):
+    query = db.select(Student.id).order_by(Student.id)
+    if department:
+        query = query.where(Student.department == department)
+    if year is not None:
+        query = query.where(Student.year_of_study == year)
+    return list(db.session.execute(query).scalars())
+
+@pytest.mark.parametrize('window', WINDOWS)
+@pytest.mark.parametrize('department, year', [(None, None), ('CS', None), (None, 2), ('EE', 3)])
+def test_cohort_scores_match_per_student_scores(school, department, year, window):
+    expected = {student.id: overall for student, overall in score_students(cohort_ids(department, year), window)}
+    
+    frame = score_cohort(department, year, window)
+    scored = {
+        row.id: combine_scores(*(json_value(getattr(row, column)) for column in COMPONENT_COLUMNS))
+        for row in frame.itertuples(index=False)
+    }
+    
+    # Equal values and equal types (int 0 for components without records), key by key
+    assert list(scored) == list(expected)
+    for id, overall in expected.items():
+        assert scored[id] == overall
+        assert repr(scored[id]) == repr(overall)
+
+def test_leaderboard_ranks_the_per_student_scores(client, school):
+    expected = sorted(
+        ((overall['overall_score'], student.id, overall) for student, overall in score_students(school)),
+        key=lambda entry: (-entry[0], entry[1])
+    )
+    
+    total, entries = leaderboard(per_page=len(school))
+    
+    assert total == len(school)
+    assert [entry['student']['id'] for entry in entries] == [id for _, id, _ in expected]
+    assert [entry['overall_performance'] for entry in entries] == [overall for _, _, overall in expected]
+    for entry, previous in zip(entries[1:], entries):
+        same_score = entry['overall_performance']['overall_score'] == previous['overall_performance']['overall_score']
+        assert entry['rank'] == (previous['rank'] if same_score else entries.index(entry) + 1)
+
+@pytest.mark.parametrize('window', WINDOWS)
+def test_unrounded_components_equal_the_per_student_functions(school, window):
+    frame = score_cohort(window=window).set_index('id')
+    
+    for students, records in load_student_blocks(school, window=window):
+        for student in students:
+            expected = [
+                calculate_attendance_score(records['attendance'].get(student.id, [])),
+                calculate_exam_score(records['exams'].get(student.id, [])),
+                calculate_project_score(records['projects'].get(student.id, [])),
+                calculate_certification_score(records['certifications'].get(student.id, [])),
+                calculate_other_metrics_score(records['performance_metrics'].get(student.id, []))
+            ]
+            assert [json_value(frame.at[student.id, column]) for column in COMPONENT_COLUMNS] == expected
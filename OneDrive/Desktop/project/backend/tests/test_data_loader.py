@@ -0,0 +1,43 @@
+import json
+import os
+from models.database import db
+from models.student import Student
+from services.data_loader import RECORD_MODELS, load_student_blocks, load_student_records
+from services.file_processor import export_student_data
+
+def records_per_student(id):
+    """Reference: one query per table for a single student."""
+    return {name: model.query.filter_by(student_id=id).order_by(model.id).all() for name, model in RECORD_MODELS.items()}
+
+def test_blocks_hold_the_same_records_as_per_student_queries(school):
+    # Unknown ids are left out, and blocks smaller than the cohort split it
+    requested = school[::-1] + [max(school) + 1]
+    
+    seen = []
+    for students, records in load_student_blocks(requested, block_size=7):
+        for student in students:
+            seen.append(student.id)
+            expected = records_per_student(student.id)
+            for name in RECORD_MODELS:
+                assert records[name].get(student.id, []) == expected[name]
+    
+    assert seen == school[::-1]
+
+def test_single_student_records_match_per_student_queries(school):
+    for id in school[:10]:
+        assert load_student_records(id) == records_per_student(id)
+
+def test_json_export_matches_per_student_export(school):
+    path = export_student_data(school, 'json')
+    with open(path) as file:
+        exported = json.load(file)
+    os.remove(path)
+    
+    expected = []
+    for id in school:
+        student_data = {"student": db.session.get(Student, id).to_dict()}
+        for name, records in records_per_student(id).items():
+            student_data[name] = [record.to_dict() for record in records]
+        expected.append(student_data)
+    
+    assert exported == json.loads(json.dumps(expected, default=str))
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import event
+from models.database import db
+import services.export_cache as export_cache
+
+@pytest.fixture(autouse=True)
+def export_cache_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_cache, 'EXPORT_CACHE_FOLDER', str(tmp_path / 'exports'))
+
+def etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+def add_attendance(client, student_id, day):
+    response = client.post('/api/performance/attendance', json={
+        "student_id": student_id, "subject": 'Chemistry', "date": day, "status": 'present'
+    })
+    assert response.status_code == 201
+
+def test_conditional_get_reads_no_record_tables(client, school):
+    url = '/api/files/export-all?format=csv'
+    tag = etag(client, url)
+    
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    response = client.get(url, headers={"If-None-Match": tag})
+    
+    assert response.status_code == 304
+    assert len(statements) <= 2
+    assert not any(table in statement for statement in statements for table in ('attendance_records', 'exam_results', 'projects'))
+
+def test_a_change_to_one_student_versions_their_export_and_export_all(client, school):
+    first, second = school[0], school[1]
+    tags = {url: etag(client, url) for url in [
+        f"/api/files/export/{first}", f"/api/files/export/{second}", '/api/files/export-all'
+    ]}
+    
+    add_attendance(client, first, '2024-02-01')
+    
+    assert etag(client, f"/api/files/export/{first}") != tags[f"/api/files/export/{first}"]
+    assert etag(client, f"/api/files/export/{second}") == tags[f"/api/files/export/{second}"]
+    assert etag(client, '/api/files/export-all') != tags['/api/files/export-all']
+
+def test_new_and_deleted_students_version_export_all(client, school):
+    tag = etag(client, '/api/files/export-all')
+    
+    response = client.post('/api/students/', json={
+        "student_id": 'NEW1', "first_name": 'New', "last_name": 'Student', "email": 'new1@example.com',
+        "department": 'CS', "year_of_study": 1, "semester": 1
+    })
+    assert response.status_code == 201
+    after_create = etag(client, '/api/files/export-all')
+    assert after_create != tag
+    
+    assert client.delete(f"/api/students/{response.get_json()['id']}").status_code == 200
+    assert etag(client, '/api/files/export-all') not in (tag, after_create)
@@ -0,0 +1,31 @@
+import gzip
+import os
+import pytest
+import zstandard
+import services.export_cache as export_cache
+
+@pytest.fixture(autouse=True)
+def export_cache_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_cache, 'EXPORT_CACHE_FOLDER', str(tmp_path / 'exports'))
+
+@pytest.mark.parametrize('export_format', ['json', 'csv'])
+@pytest.mark.parametrize('encoding, decompress', [
+    ('gzip', gzip.decompress),
+    ('zstd', lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data))
+])
+def test_compressed_export_all_is_the_plain_export_compressed(client, school, export_format, encoding, decompress):
+    plain = client.get(f"/api/files/export-all?format={export_format}")
+    compressed = client.get(f"/api/files/export-all?format={export_format}&compress={encoding}")
+    
+    assert compressed.status_code == 200
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+    assert decompress(compressed.get_data()) == plain.get_data()
+    # Only the two finished exports are left in the cache, no uncompressed intermediate file
+    assert len(os.listdir(export_cache.EXPORT_CACHE_FOLDER)) == 2
+
+def test_negotiated_compression_is_sent_as_content_encoding(client, school):
+    plain = client.get('/api/files/export/1?format=json')
+    response = client.get('/api/files/export/1?format=json&compress=auto', headers={"Accept-Encoding": 'gzip'})
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == plain.get_data()
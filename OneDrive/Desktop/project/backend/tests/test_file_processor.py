@@ -0,0 +1,49 @@
+import hashlib
+import io
+import json
+import pytest
+from models.database import db
+from models.student import Student
+from models.performance_metric import AttendanceRecord
+from services.file_processor import process_attendance_csv
+from services.upload_stream import HashingReader
+
+def add_students(count):
+    db.session.add_all([
+        Student(
+            student_id=f"S{index}", first_name='First', last_name='Last', email=f"s{index}@example.com",
+            department='Science', year_of_study=1, semester=1
+        )
+        for index in range(count)
+    ])
+    db.session.commit()
+
+class Interrupted(Exception):
+    pass
+
+def interrupt_after_first_chunk(rows_processed, error_count):
+    raise Interrupted()
+
+def test_non_seekable_json_upload_resumes_from_its_checkpoint(app):
+    add_students(10)
+    records = [
+        {"student_id": f"S{index % 10}", "subject": 'Math', "date": f"2024-01-{index // 10 + 1:02d}", "status": 'present'}
+        for index in range(50)
+    ]
+    data = json.dumps(records).encode('utf-8')
+    file_hash = hashlib.sha256(data).hexdigest()
+    
+    # The first attempt stops after one committed chunk, leaving a checkpoint with a byte offset
+    first = HashingReader(io.BytesIO(data))
+    first.name = 'attendance.json'
+    with pytest.raises(Exception):
+        process_attendance_csv(first, chunksize=20, file_hash=file_hash, progress=interrupt_after_first_chunk)
+    assert AttendanceRecord.query.count() == 20
+    
+    retry = HashingReader(io.BytesIO(data))
+    retry.name = 'attendance.json'
+    result = process_attendance_csv(retry, chunksize=20, file_hash=file_hash)
+    
+    assert result['success'], result
+    assert result['records_added'] == 30
+    assert AttendanceRecord.query.count() == 50
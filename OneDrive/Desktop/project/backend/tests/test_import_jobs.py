@@ -0,0 +1,35 @@
+import os
+import uuid
+from models.database import db
+from models.import_job import ImportJob
+from services.import_jobs import new_job_filepath
+
+def test_cancelling_a_queued_job_removes_its_upload(client):
+    filepath = new_job_filepath('students.csv')
+    with open(filepath, 'w') as upload:
+        upload.write("student_id,name\nS1,Ada\n")
+    # Not handed to the worker pool, so it stays queued until cancelled
+    job = ImportJob(id=uuid.uuid4().hex, import_type='students', filename='students.csv', filepath=filepath, status='queued')
+    db.session.add(job)
+    db.session.commit()
+    
+    response = client.post(f"/api/files/jobs/{job.id}/cancel")
+    
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'cancelled'
+    assert not os.path.exists(filepath)
+
+def test_cancelling_a_running_job_leaves_it_to_the_worker(client):
+    filepath = new_job_filepath('students.csv')
+    with open(filepath, 'w') as upload:
+        upload.write("student_id,name\nS1,Ada\n")
+    job = ImportJob(id=uuid.uuid4().hex, import_type='students', filename='students.csv', filepath=filepath, status='running')
+    db.session.add(job)
+    db.session.commit()
+    
+    response = client.post(f"/api/files/jobs/{job.id}/cancel")
+    
+    assert response.get_json()['status'] == 'running'
+    assert response.get_json()['cancel_requested'] is True
+    assert os.path.exists(filepath)
+    os.remove(filepath)
@@ -0,0 +1,49 @@
+import pytest
+from models.database import db
+from models.score_summary import StudentScoreSummary
+from models.rollups import MonthlyAttendanceRollup, MonthlyExamRollup
+from services.response_cache import student_data_version
+
+def snapshot(student_id):
+    """Everything the add endpoints update besides the record itself."""
+    db.session.expire_all()
+    summary = db.session.get(StudentScoreSummary, student_id)
+    return (
+        summary.to_dict() if summary else None,
+        [rollup.to_dict() for rollup in MonthlyAttendanceRollup.query.filter_by(student_id=student_id)],
+        [rollup.to_dict() for rollup in MonthlyExamRollup.query.filter_by(student_id=student_id)],
+        student_data_version(student_id)
+    )
+
+@pytest.mark.parametrize('url, payload', [
+    ('/api/performance/exams', {"subject": 'Math', "exam_type": 'midterm', "score": 'eighty', "max_score": 100, "date": '2024-03-01'}),
+    ('/api/performance/exams', {"subject": 'Math', "exam_type": 'midterm', "score": 80, "max_score": 0, "date": '2024-03-01'}),
+    ('/api/performance/exams', {"subject": 'Math', "exam_type": 'midterm', "score": 80, "max_score": None, "date": '2024-03-01'}),
+    ('/api/performance/exams', {"subject": 'Math', "exam_type": 'midterm', "score": 80, "max_score": 100, "date": 20240301}),
+    ('/api/performance/', {"metric_type": 'assignment', "score": [80], "date_recorded": '2024-03-01'}),
+    ('/api/performance/', {"metric_type": 'assignment', "score": 8, "max_score": -10, "date_recorded": '2024-03-01'}),
+    ('/api/performance/', {"metric_type": 'assignment', "score": True, "date_recorded": '2024-03-01'}),
+    ('/api/performance/attendance', {"subject": 'Math', "date": None, "status": 'present'}),
+])
+def test_invalid_records_are_rejected_before_summaries_and_rollups_change(client, school, url, payload):
+    student_id = school[0]
+    before = snapshot(student_id)
+    
+    response = client.post(url, json={"student_id": student_id, **payload})
+    
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert snapshot(student_id) == before
+
+def test_non_object_body_is_rejected(client, school):
+    for url in ['/api/performance/', '/api/performance/attendance', '/api/performance/exams']:
+        assert client.post(url, json=[school[0]]).status_code == 400
+        assert client.post(url, data='not json', content_type='application/json').status_code == 400
+
+def test_numeric_strings_are_stored_as_numbers(client, school):
+    response = client.post('/api/performance/exams', json={
+        "student_id": school[0], "subject": 'Math', "exam_type": 'quiz', "score": '18.5', "max_score": '20', "date": '2024-03-01'
+    })
+    
+    assert response.status_code == 201
+    assert (response.get_json()['score'], response.get_json()['max_score']) == (18.5, 20.0)
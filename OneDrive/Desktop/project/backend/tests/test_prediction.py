@@ -0,0 +1,66 @@
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import event
+from models.database import db
+from models.student import Student
+from services.data_loader import load_student_records
+from services.date_window import DateWindow
+from services.prediction import (
+    predict_future_performance, recommend_improvements, combine_prediction, analyze_attendance_trend,
+    analyze_exam_trend, analyze_project_trend, calculate_current_attendance, calculate_current_exam_score,
+    calculate_current_project_score
+)
+
+WINDOWS = [None, DateWindow(date.today() - timedelta(days=365), None), DateWindow(None, date.today() - timedelta(days=200))]
+
+def predicted_from_records(student, window):
+    """The prediction computed from the student's full record lists, as the routes used to."""
+    records = load_student_records(student.id, window)
+    return combine_prediction(
+        analyze_attendance_trend(student.id, window), analyze_exam_trend(student.id, window),
+        analyze_project_trend(records['projects']),
+        calculate_current_attendance(student.id, window), calculate_current_exam_score(student.id, window),
+        calculate_current_project_score(student.id, window),
+        len(records['certifications']), len(records['attendance']), len(records['exams']), len(records['projects'])
+    )
+
+def recommended_areas_from_records(student, window):
+    records = load_student_records(student.id, window)
+    subject_scores = {}
+    for exam in records['exams']:
+        subject_scores.setdefault(exam.subject, []).append((exam.score / exam.max_score) * 100)
+    low_subjects = [subject for subject, scores in subject_scores.items() if sum(scores) / len(scores) < 75]
+    return low_subjects[:3], len(records['certifications']) < 2, len(records['projects']) < 3
+
+@pytest.mark.parametrize('window', WINDOWS)
+def test_predictions_match_the_record_based_prediction(school, window):
+    for student_id in school:
+        student = db.session.get(Student, student_id)
+        assert predict_future_performance(student, window) == predicted_from_records(student, window)
+
+@pytest.mark.parametrize('window', WINDOWS)
+def test_recommendations_match_the_record_based_recommendations(school, window):
+    for student_id in school:
+        student = db.session.get(Student, student_id)
+        areas = {item["area"]: item for item in recommend_improvements(student, window)["recommendations"]}
+        low_subjects, few_certifications, few_projects = recommended_areas_from_records(student, window)
+        
+        if low_subjects:
+            assert areas["Subject Focus"]["recommendation"] == f"Focus on improving performance in: {', '.join(low_subjects)}"
+        else:
+            assert "Subject Focus" not in areas
+        assert ("Professional Development" in areas) == few_certifications
+        assert ("Project Experience" in areas) == few_projects
+
+def test_prediction_routes_load_no_attendance_or_exam_rows(client, school):
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    
+    for url in [f"/api/prediction/future-performance/{school[0]}", f"/api/prediction/improvements/{school[0]}"]:
+        assert client.get(url).status_code == 200
+    
+    # Attendance and exams are only read through aggregates or single rows, never as whole histories
+    for statement in statements:
+        for column in ('attendance_records.status', 'exam_results.score'):
+            if column in statement:
+                assert any(part in statement for part in ('count(', 'sum(', 'avg(', 'LIMIT')), statement
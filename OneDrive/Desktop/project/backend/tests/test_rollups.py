@@ -0,0 +1,96 @@
+import io
+import json
+import random
+from datetime import date
+import pytest
+from models.database import db
+from models.student import Student
+from models.performance_metric import AttendanceRecord, ExamResult
+from models.rollups import MonthlyAttendanceRollup, MonthlyExamRollup
+from services.date_window import DateWindow
+from services.file_processor import process_exam_csv
+from services.rollups import ATTENDANCE_STATUSES, exam_count, monthly_attendance, rebuild_rollups
+
+# Covers every record, so the windowed functions read the records instead of the rollups
+EVERYTHING = DateWindow(date(1900, 1, 1), date(2999, 12, 31))
+
+def rollups_from_records():
+    """The monthly rollup rows computed in Python from the raw records, keyed by (student, subject, month).
+    
+    Records left behind by deleted students have no rollups.
+    """
+    attendance = {}
+    for record in AttendanceRecord.query.filter(AttendanceRecord.student_id.in_(db.select(Student.id))).order_by(AttendanceRecord.id):
+        row = attendance.setdefault((record.student_id, record.subject, record.date.replace(day=1)), dict.fromkeys(['total'] + ATTENDANCE_STATUSES, 0))
+        row['total'] += 1
+        row[record.status] += 1
+    
+    exams = {}
+    for exam in ExamResult.query.filter(ExamResult.student_id.in_(db.select(Student.id))).order_by(ExamResult.id):
+        row = exams.setdefault((exam.student_id, exam.subject, exam.date.replace(day=1)), {"exam_count": 0, "score_sum": 0})
+        row['exam_count'] += 1
+        row['score_sum'] += exam.score / exam.max_score * 100
+    
+    return attendance, exams
+
+def stored_rollups():
+    key = lambda rollup: (rollup.student_id, rollup.subject, rollup.month)
+    attendance = {
+        key(rollup): {column: getattr(rollup, column) for column in ['total'] + ATTENDANCE_STATUSES}
+        for rollup in MonthlyAttendanceRollup.query
+    }
+    exams = {key(rollup): {"exam_count": rollup.exam_count, "score_sum": rollup.score_sum} for rollup in MonthlyExamRollup.query}
+    return attendance, exams
+
+def assert_rollups_match_records():
+    db.session.expire_all()
+    expected_attendance, expected_exams = rollups_from_records()
+    attendance, exams = stored_rollups()
+    
+    assert attendance == expected_attendance
+    assert exams.keys() == expected_exams.keys()
+    for key, row in expected_exams.items():
+        assert exams[key]['exam_count'] == row['exam_count']
+        # Sums added in another order may differ in the last bits
+        assert exams[key]['score_sum'] == pytest.approx(row['score_sum'], rel=1e-12)
+    
+    # The readers give the same answers from the rollups as from the records
+    for id in db.session.execute(db.select(Student.id)).scalars():
+        assert monthly_attendance(id) == monthly_attendance(id, EVERYTHING)
+        assert exam_count(id) == exam_count(id, EVERYTHING)
+
+def test_rebuilt_rollups_match_the_records(school):
+    assert_rollups_match_records()
+    
+    rebuild_rollups()
+    assert_rollups_match_records()
+
+def test_rollups_maintained_by_the_endpoints_and_imports_match_the_records(client, school):
+    rng = random.Random(24)
+    for _ in range(40):
+        id = rng.choice(school)
+        day = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        client.post('/api/performance/attendance', json={
+            "student_id": id, "subject": rng.choice(['Math', 'Chemistry']), "date": day,
+            "status": rng.choice(ATTENDANCE_STATUSES)
+        })
+        response = client.post('/api/performance/exams', json={
+            "student_id": id, "subject": rng.choice(['Math', 'Chemistry']), "exam_type": 'quiz',
+            "score": round(rng.uniform(0, 20), 2), "max_score": 20, "date": day
+        })
+        assert response.status_code == 201
+    
+    keys = dict(db.session.execute(db.select(Student.id, Student.student_id)).all())
+    upload = io.BytesIO(json.dumps([
+        {
+            "student_id": keys[rng.choice(school)], "subject": 'Biology', "exam_type": 'final',
+            "score": round(rng.uniform(0, 73), 1), "max_score": 73, "date": f"2023-{rng.randint(1, 12):02d}-15"
+        }
+        for _ in range(30)
+    ]).encode('utf-8'))
+    upload.name = 'exams.json'
+    assert process_exam_csv(upload)["records_added"] == 30
+    
+    assert client.delete(f"/api/students/{school[1]}").status_code == 200
+    
+    assert_rollups_match_records()
@@ -0,0 +1,58 @@
+import random
+from types import SimpleNamespace
+from models.database import db
+from models.score_summary import StudentScoreSummary
+from services.analytics import calculate_attendance_score, calculate_overall_from_summary, score_students
+from services.score_summary import rebuild_score_summaries
+
+def summary_scores(student_ids):
+    summaries = {summary.student_id: summary for summary in StudentScoreSummary.query.filter(StudentScoreSummary.student_id.in_(student_ids))}
+    return {id: calculate_overall_from_summary(summaries.get(id)) for id in student_ids}
+
+def record_scores(student_ids):
+    return {student.id: overall for student, overall in score_students(student_ids)}
+
+def test_summary_attendance_matches_record_attendance_for_random_counts():
+    rng = random.Random(18)
+    for _ in range(5000):
+        total = rng.randint(1, 400)
+        present = rng.randint(0, total)
+        records = [SimpleNamespace(status='present')] * present + [SimpleNamespace(status='absent')] * (total - present)
+        summary = StudentScoreSummary(
+            attendance_present=present, attendance_total=total, exam_count=0, exam_percentage_sum=0.0,
+            project_graded_count=0, project_percentage_sum=0.0, certification_count=0,
+            other_metric_count=0, other_metric_percentage_sum=0.0
+        )
+        
+        assert calculate_overall_from_summary(summary)['metrics']['attendance'] == round(calculate_attendance_score(records), 2)
+        assert calculate_overall_from_summary(summary)['overall_score'] == round(0.15 * calculate_attendance_score(records), 2)
+
+def test_rebuilt_summaries_score_like_the_records(school):
+    assert summary_scores(school) == record_scores(school)
+
+def test_summaries_maintained_by_the_endpoints_score_like_the_records(client, school):
+    rng = random.Random(23)
+    for id in rng.sample(school, 20):
+        for day in range(1, rng.randint(2, 9)):
+            client.post('/api/performance/attendance', json={
+                "student_id": id, "subject": 'Chemistry', "date": f"2025-03-{day:02d}", "status": rng.choice(['present', 'absent'])
+            })
+        for _ in range(rng.randint(1, 4)):
+            client.post('/api/performance/exams', json={
+                "student_id": id, "subject": 'Chemistry', "exam_type": 'quiz', "score": round(rng.uniform(0, 40), 2),
+                "max_score": 40, "date": '2025-03-15'
+            })
+            client.post('/api/performance/', json={
+                "student_id": id, "metric_type": 'presentation', "score": round(rng.uniform(0, 9), 1),
+                "max_score": 9, "date_recorded": '2025-03-15'
+            })
+    
+    assert summary_scores(school) == record_scores(school)
+    for id in school[:15]:
+        response = client.get(f"/api/analytics/overall/{id}").get_json()
+        assert {key: response[key] for key in record_scores([id])[id]} == record_scores([id])[id]
+    
+    # Rebuilding gives the same scores as the maintained counters
+    rebuild_score_summaries()
+    db.session.expire_all()
+    assert summary_scores(school) == record_scores(school)